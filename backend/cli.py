@@ -0,0 +1,133 @@
+"""Tareas de administración de la base de datos.
+
+    python -m backend.cli init-db     crea las tablas y registra la versión
+    python -m backend.cli check       muestra la versión del esquema
+    python -m backend.cli reindex     regenera el índice de búsqueda
+    python -m backend.cli refresh-catalogo  regenera el catálogo plano
+    python -m backend.cli sync-replicas  copia la base SQLite a sus réplicas
+    python -m backend.cli reindex-codigos  regenera el índice de códigos de barras
+    python -m backend.cli snapshot    genera la instantánea del catálogo
+"""
+
+import argparse
+import asyncio
+import sqlite3
+import sys
+
+from sqlalchemy.engine import make_url
+
+from .config.db import SessionLocal, database_url, dispose_engine
+from .config.esquema import (
+    VERSION_ESQUEMA,
+    completar_indice_busqueda,
+    crear_esquema,
+    version_actual,
+)
+from .config.replicas import urls_replicas
+from .services.busqueda import reconstruir_indice
+from .services.catalogo_plano import reconstruir_catalogo_plano
+from .services.indice_codigos import indice_codigos
+from .services.instantanea import instantaneas
+
+
+async def _init_db():
+    await crear_esquema()
+    await completar_indice_busqueda()
+    print(f"Esquema creado en la versión {VERSION_ESQUEMA}")
+    return 0
+
+
+async def _check():
+    version = await version_actual()
+    print(f"Base de datos: versión {version}; código: versión {VERSION_ESQUEMA}")
+    return 0 if version == VERSION_ESQUEMA else 1
+
+
+async def _reindex():
+    async with SessionLocal() as db:
+        await reconstruir_indice(db)
+    print("Índice de búsqueda regenerado")
+    return 0
+
+
+async def _refresh_catalogo():
+    async with SessionLocal() as db:
+        await reconstruir_catalogo_plano(db)
+    print("Catálogo plano regenerado")
+    return 0
+
+
+async def _reindex_codigos():
+    if not indice_codigos.activo:
+        print("BARCODE_INDEX_PATH no está configurado")
+        return 1
+    async with SessionLocal() as db:
+        cantidad = await indice_codigos.reconstruir(db)
+    print(f"Índice de códigos de barras regenerado: {cantidad} códigos")
+    return 0
+
+
+async def _snapshot():
+    if not instantaneas.activo:
+        print("SNAPSHOT_DIR no está configurado")
+        return 1
+    async with SessionLocal() as db:
+        manifiesto = await instantaneas.generar(db, forzar=True)
+    if manifiesto is None:
+        print("Otro proceso está generando la instantánea")
+        return 1
+    print(f"Instantánea del catálogo generada: versión {manifiesto['version']}")
+    return 0
+
+
+def _copiar_sqlite(origen: str, destino: str):
+    with sqlite3.connect(origen) as fuente, sqlite3.connect(destino) as copia:
+        fuente.backup(copia)
+
+
+async def _sync_replicas():
+    """Copiar la base SQLite primaria a las réplicas SQLite, para pruebas
+    locales de DATABASE_REPLICA_URLS sin replicación real."""
+    primaria = make_url(database_url())
+    destinos = [
+        url
+        for url in map(make_url, urls_replicas())
+        if url.get_backend_name() == "sqlite"
+    ]
+    if primaria.get_backend_name() != "sqlite" or not destinos:
+        print("Solo se copian bases SQLite a réplicas SQLite")
+        return 1
+    for destino in destinos:
+        await asyncio.to_thread(_copiar_sqlite, primaria.database, destino.database)
+        print(f"Réplica {destino.database} sincronizada")
+    return 0
+
+
+COMANDOS = {
+    "init-db": _init_db,
+    "check": _check,
+    "reindex": _reindex,
+    "refresh-catalogo": _refresh_catalogo,
+    "sync-replicas": _sync_replicas,
+    "reindex-codigos": _reindex_codigos,
+    "snapshot": _snapshot,
+}
+
+
+async def _ejecutar(comando) -> int:
+    try:
+        return await comando()
+    finally:
+        await dispose_engine()
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("comando", choices=COMANDOS)
+    args = parser.parse_args(argv)
+    return asyncio.run(_ejecutar(COMANDOS[args.comando]))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Versión del esquema de la base de datos y su creación explícita.
+
+La versión aplicada se guarda en la fila "esquema" de la tabla `contadores`.
+Al arrancar basta una consulta para comprobarla; `create_all` solo se ejecuta
+cuando la base está vacía o desactualizada, o desde la línea de comandos
+(`python -m backend.cli init-db`).
+"""
+
+import logging
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import DBAPIError
+
+from .database import Base
+from .db import SessionLocal, _env_bool, get_engine
+
+# Importar los modelos para registrar todas sus tablas en Base.metadata
+from ..models import (  # noqa: F401
+    m_articulo,
+    m_busqueda,
+    m_cambio,
+    m_catalogo,
+    m_family,
+    m_seccion,
+    m_venta,
+)
+from ..models.m_articulo import Articulo
+from ..models.m_busqueda import TerminoBusqueda
+from ..models.m_contador import Contador
+from ..services.busqueda import reconstruir_indice
+from ..services.cambios import sentencias_registro_inicial
+from ..services.catalogo_plano import sentencias_reconstruccion
+
+logger = logging.getLogger(__name__)
+
+# Incrementar al añadir tablas o columnas
+VERSION_ESQUEMA = 4
+NOMBRE_CONTADOR = "esquema"
+
+# Sentencias de datos que necesita cada versión al actualizar desde una anterior
+MIGRACIONES = {
+    2: sentencias_reconstruccion,  # poblar catalogo_plano
+    3: sentencias_registro_inicial,  # registrar el catálogo existente en cambios
+}
+
+
+class EsquemaDesactualizado(RuntimeError):
+    """La base de datos no tiene la versión de esquema que espera el código."""
+
+
+async def version_actual() -> int:
+    """Versión registrada en la base de datos; 0 si no hay esquema."""
+    try:
+        async with get_engine().connect() as conn:
+            version = await conn.scalar(
+                select(Contador.valor).where(Contador.nombre == NOMBRE_CONTADOR)
+            )
+    except DBAPIError:
+        # La tabla de contadores todavía no existe
+        return 0
+    return version or 0
+
+
+async def crear_esquema():
+    """Crear las tablas que falten, migrar los datos y registrar la versión."""
+    anterior = await version_actual()
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for version, sentencias in sorted(MIGRACIONES.items()):
+            if anterior < version:
+                for sentencia in sentencias():
+                    await conn.execute(sentencia)
+        resultado = await conn.execute(
+            update(Contador)
+            .where(Contador.nombre == NOMBRE_CONTADOR)
+            .values(valor=VERSION_ESQUEMA)
+        )
+        if resultado.rowcount == 0:
+            await conn.execute(
+                insert(Contador).values(nombre=NOMBRE_CONTADOR, valor=VERSION_ESQUEMA)
+            )
+    logger.info("Esquema de la base de datos en la versión %s", VERSION_ESQUEMA)
+
+
+async def completar_indice_busqueda():
+    """Construir el índice de búsqueda si está vacío y hay artículos.
+
+    Cubre las bases sin versión, de antes de `busqueda_terminos`, que al pasar
+    a la versión 1 reciben la tabla vacía, y las cargas hechas por fuera de la
+    API.
+    """
+    async with SessionLocal() as db:
+        if await db.scalar(select(TerminoBusqueda.id).limit(1)) is not None:
+            return
+        if await db.scalar(select(Articulo.id).limit(1)) is None:
+            return
+        logger.info("Índice de búsqueda vacío: regenerando")
+        await reconstruir_indice(db)
+
+
+async def verificar_esquema():
+    """Comprobar la versión del esquema al arrancar.
+
+    Si está desactualizado se crea con `crear_esquema`, salvo que
+    DB_SCHEMA_AUTO_CREATE=0; en ese caso se detiene el arranque. Después se
+    completa el índice de búsqueda si hace falta.
+    """
+    version = await version_actual()
+    if version > VERSION_ESQUEMA:
+        raise EsquemaDesactualizado(
+            f"La base de datos está en la versión {version} y el código "
+            f"espera la {VERSION_ESQUEMA}"
+        )
+    if version < VERSION_ESQUEMA:
+        if not _env_bool("DB_SCHEMA_AUTO_CREATE", True):
+            raise EsquemaDesactualizado(
+                f"Esquema en la versión {version}, se requiere la {VERSION_ESQUEMA}; "
+                "ejecute `python -m backend.cli init-db`"
+            )
+        await crear_esquema()
+    await completar_indice_busqueda()
@@ -0,0 +1,262 @@
+"""Métricas por ruta: latencia, sentencias SQL y tiempo en la base de datos.
+
+Un middleware ASGI abre un acumulador por petición y los eventos del engine le
+suman cada sentencia ejecutada. Al terminar la petición se agrega todo, con un
+solo lock, bajo la plantilla de la ruta (p. ej. `/articulos/{articulo_id}`),
+de modo que el número de series no crece con los valores de los parámetros.
+El resultado se expone en formato de texto de Prometheus en `/metrics`.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from .monitor import ruta_actual
+
+logger = logging.getLogger(__name__)
+
+# Límites de los histogramas de latencia, en segundos
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Límites del histograma de sentencias SQL por petición
+BUCKETS_SENTENCIAS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# Etiqueta de las sentencias fuera de una petición y de las URL sin ruta
+SIN_RUTA = "-"
+
+
+class _Peticion:
+    """Acumulador de las sentencias SQL de una petición."""
+
+    __slots__ = ("sentencias", "tiempo_db", "lentas")
+
+    def __init__(self):
+        self.sentencias = 0
+        self.tiempo_db = 0.0
+        self.lentas = 0
+
+
+_peticion_actual: ContextVar = ContextVar("peticion_actual", default=None)
+
+
+class _Histograma:
+    """Histograma acumulativo con límites fijos."""
+
+    __slots__ = ("limites", "cuentas", "suma", "total")
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.cuentas = [0] * len(limites)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        for i, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.cuentas[i] += 1
+                break
+        self.suma += valor
+        self.total += 1
+
+    def lineas(self, nombre: str, etiquetas: str) -> list:
+        """Series `_bucket`, `_sum` y `_count` en formato Prometheus."""
+        resultado = []
+        acumulado = 0
+        separador = "," if etiquetas else ""
+        for limite, cuenta in zip(self.limites, self.cuentas):
+            acumulado += cuenta
+            resultado.append(
+                f'{nombre}_bucket{{{etiquetas}{separador}le="{limite}"}} {acumulado}'
+            )
+        resultado.append(
+            f'{nombre}_bucket{{{etiquetas}{separador}le="+Inf"}} {self.total}'
+        )
+        resultado.append(f"{nombre}_sum{{{etiquetas}}} {self.suma}")
+        resultado.append(f"{nombre}_count{{{etiquetas}}} {self.total}")
+        return resultado
+
+
+def _etiqueta(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metricas:
+    """Registro de métricas por ruta y de sentencias lentas."""
+
+    def __init__(self, umbral_lenta: float = 0.1, max_lentas: int = 100):
+        self.umbral_lenta = umbral_lenta
+        self._lock = threading.Lock()
+        self._latencias = {}  # (método, ruta) -> _Histograma
+        self._sentencias_por_peticion = {}  # (método, ruta) -> _Histograma
+        self._peticiones = {}  # (método, ruta, estado) -> cantidad
+        self._sentencias = {}  # ruta -> cantidad
+        self._tiempo_db = {}  # ruta -> segundos
+        self._lentas = {}  # ruta -> cantidad
+        self.ultimas_lentas = deque(maxlen=max_lentas)
+
+    def registrar(self, engine):
+        """Escuchar la ejecución de sentencias de un engine (síncrono o asíncrono)."""
+        sync_engine = getattr(engine, "sync_engine", engine)
+        event.listen(sync_engine, "before_cursor_execute", self._antes)
+        event.listen(sync_engine, "after_cursor_execute", self._despues)
+
+    def _antes(self, _conn, _cursor, _statement, _parameters, context, _executemany):
+        context._inicio_metricas = time.perf_counter()
+
+    def _despues(self, _conn, _cursor, statement, _parameters, context, _executemany):
+        duracion = time.perf_counter() - context._inicio_metricas
+        lenta = duracion >= self.umbral_lenta
+        peticion = _peticion_actual.get()
+        if peticion is not None:
+            peticion.sentencias += 1
+            peticion.tiempo_db += duracion
+            peticion.lentas += lenta
+        else:
+            with self._lock:
+                self._sumar(SIN_RUTA, 1, duracion, lenta)
+        if lenta:
+            self._sentencia_lenta(statement, duracion)
+
+    def _sentencia_lenta(self, statement: str, duracion: float):
+        ruta = ruta_actual.get()
+        self.ultimas_lentas.append(
+            {
+                "ruta": ruta,
+                "ms": round(duracion * 1000, 3),
+                "sentencia": " ".join(statement.split())[:500],
+            }
+        )
+        logger.warning(
+            "Sentencia SQL lenta (%.1f ms) en %s: %s",
+            duracion * 1000,
+            ruta,
+            " ".join(statement.split())[:200],
+        )
+
+    def _sumar(self, ruta, sentencias, tiempo_db, lentas):
+        self._sentencias[ruta] = self._sentencias.get(ruta, 0) + sentencias
+        self._tiempo_db[ruta] = self._tiempo_db.get(ruta, 0.0) + tiempo_db
+        self._lentas[ruta] = self._lentas.get(ruta, 0) + lentas
+
+    def iniciar_peticion(self):
+        """Abrir el acumulador de la petición en curso; devuelve el token."""
+        return _peticion_actual.set(_Peticion())
+
+    def terminar_peticion(self, token, metodo: str, ruta: str, estado: int, duracion):
+        """Agregar la petición en curso a las métricas de su ruta."""
+        peticion = _peticion_actual.get()
+        _peticion_actual.reset(token)
+        clave = (metodo, ruta)
+        with self._lock:
+            latencia = self._latencias.get(clave)
+            if latencia is None:
+                latencia = self._latencias[clave] = _Histograma(BUCKETS_LATENCIA)
+                self._sentencias_por_peticion[clave] = _Histograma(BUCKETS_SENTENCIAS)
+            latencia.observar(duracion)
+            self._sentencias_por_peticion[clave].observar(peticion.sentencias)
+            self._peticiones[clave + (estado,)] = (
+                self._peticiones.get(clave + (estado,), 0) + 1
+            )
+            self._sumar(ruta, peticion.sentencias, peticion.tiempo_db, peticion.lentas)
+
+    def exportar(self, gauges=None) -> str:
+        """Todas las métricas en formato de texto de Prometheus."""
+        lineas = []
+        with self._lock:
+            lineas += [
+                "# HELP http_requests_total Peticiones HTTP atendidas.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (metodo, ruta, estado), valor in sorted(self._peticiones.items()):
+                lineas.append(
+                    f'http_requests_total{{method="{metodo}",route="{_etiqueta(ruta)}",'
+                    f'status="{estado}"}} {valor}'
+                )
+            lineas += [
+                "# HELP http_request_duration_seconds Latencia de las peticiones HTTP.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (metodo, ruta), histograma in sorted(self._latencias.items()):
+                lineas += histograma.lineas(
+                    "http_request_duration_seconds",
+                    f'method="{metodo}",route="{_etiqueta(ruta)}"',
+                )
+            lineas += [
+                "# HELP db_statements_per_request Sentencias SQL por petición.",
+                "# TYPE db_statements_per_request histogram",
+            ]
+            for (metodo, ruta), histograma in sorted(
+                self._sentencias_por_peticion.items()
+            ):
+                lineas += histograma.lineas(
+                    "db_statements_per_request",
+                    f'method="{metodo}",route="{_etiqueta(ruta)}"',
+                )
+            for nombre, tipo, ayuda, datos in (
+                (
+                    "db_statements_total",
+                    "counter",
+                    "Sentencias SQL ejecutadas.",
+                    self._sentencias,
+                ),
+                (
+                    "db_statement_seconds_total",
+                    "counter",
+                    "Tiempo total en la base de datos.",
+                    self._tiempo_db,
+                ),
+                (
+                    "db_slow_statements_total",
+                    "counter",
+                    f"Sentencias SQL de más de {self.umbral_lenta} s.",
+                    self._lentas,
+                ),
+            ):
+                lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+                for ruta, valor in sorted(datos.items()):
+                    lineas.append(f'{nombre}{{route="{_etiqueta(ruta)}"}} {valor}')
+        for nombre, (ayuda, valor) in (gauges or {}).items():
+            lineas += [
+                f"# HELP {nombre} {ayuda}",
+                f"# TYPE {nombre} gauge",
+                f"{nombre} {valor}",
+            ]
+        return "\n".join(lineas) + "\n"
+
+
+metricas = Metricas(umbral_lenta=float(os.getenv("SLOW_SQL_MS", "100")) / 1000)
+
+
+class MetricasMiddleware:
+    """Middleware ASGI que mide cada petición bajo la plantilla de su ruta."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        estado = 500
+        inicio = time.perf_counter()
+        token = metricas.iniciar_peticion()
+
+        async def send_con_estado(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, send_con_estado)
+        finally:
+            # El router deja la ruta resuelta en el scope; sin ella no se usa la
+            # URL para no crear una serie por cada dirección desconocida
+            ruta = getattr(scope.get("route"), "path", SIN_RUTA)
+            metricas.terminar_peticion(
+                token, scope["method"], ruta, estado, time.perf_counter() - inicio
+            )
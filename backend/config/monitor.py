@@ -0,0 +1,181 @@
+"""Métricas del pool de conexiones y detección de sesiones no devueltas."""
+
+import logging
+import threading
+import time
+import traceback
+import weakref
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Ruta HTTP que se está atendiendo, para atribuir conexiones y sesiones
+ruta_actual: ContextVar[str] = ContextVar("ruta_actual", default="-")
+
+
+class RutaActualMiddleware:
+    """Middleware ASGI que guarda el método y la ruta de cada petición."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = ruta_actual.set(f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            ruta_actual.reset(token)
+
+
+class MonitorPool:
+    """Contadores de checkout/checkin del pool y conexiones prestadas."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prestadas = {}  # id del registro -> (ruta, instante del checkout)
+        self.conexiones_creadas = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidaciones = 0
+        self.tiempo_prestado_total = 0.0
+
+    def registrar(self, engine):
+        """Escuchar los eventos del pool de un engine (síncrono o asíncrono)."""
+        sync_engine = getattr(engine, "sync_engine", engine)
+        event.listen(sync_engine, "connect", self._connect)
+        event.listen(sync_engine, "checkout", self._checkout)
+        event.listen(sync_engine, "checkin", self._checkin)
+        event.listen(sync_engine, "invalidate", self._invalidate)
+
+    def _connect(self, _dbapi_connection, _connection_record):
+        with self._lock:
+            self.conexiones_creadas += 1
+
+    def _checkout(self, _dbapi_connection, connection_record, _connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self._prestadas[id(connection_record)] = (
+                ruta_actual.get(),
+                time.monotonic(),
+            )
+
+    def _checkin(self, _dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            prestada = self._prestadas.pop(id(connection_record), None)
+            if prestada is not None:
+                self.tiempo_prestado_total += time.monotonic() - prestada[1]
+
+    def _invalidate(self, _dbapi_connection, _connection_record, _exception):
+        with self._lock:
+            self.invalidaciones += 1
+
+    def stats(self, pool=None, umbral: float = 5.0) -> dict:
+        """Estado del pool y conexiones prestadas hace más de `umbral` segundos."""
+        ahora = time.monotonic()
+        with self._lock:
+            datos = {
+                "conexiones_creadas": self.conexiones_creadas,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidaciones": self.invalidaciones,
+                "prestadas": len(self._prestadas),
+                "tiempo_prestado_medio_ms": (
+                    self.tiempo_prestado_total / self.checkins * 1000
+                    if self.checkins
+                    else 0.0
+                ),
+                "prestadas_lentas": [
+                    {"ruta": ruta, "segundos": round(ahora - desde, 3)}
+                    for ruta, desde in self._prestadas.values()
+                    if ahora - desde > umbral
+                ],
+            }
+        if pool is not None and hasattr(pool, "size"):
+            datos.update(
+                {
+                    "pool_size": pool.size(),
+                    "pool_checkedout": pool.checkedout(),
+                    "pool_overflow": pool.overflow(),
+                }
+            )
+        return datos
+
+
+def _origen_llamada() -> str:
+    """Primer marco de la pila que pertenece al código de la aplicación."""
+    for marco in reversed(traceback.extract_stack()):
+        if "/backend/" in marco.filename and "/config/" not in marco.filename:
+            return f"{marco.filename}:{marco.lineno} in {marco.name}"
+    return "desconocido"
+
+
+def _aviso_fuga(ruta: str, origen: str):
+    logger.warning(
+        "Sesión de base de datos liberada sin cerrar (ruta %s, creada en %s)",
+        ruta,
+        origen,
+    )
+
+
+class RastreadorSesiones:
+    """Registro de sesiones abiertas, activo solo en modo depuración."""
+
+    def __init__(self, activo: bool = False):
+        self.activo = activo
+        self._lock = threading.Lock()
+        self._abiertas = {}  # id de la sesión -> (ruta, origen, instante, finalizer)
+        self.fugas = 0
+
+    def abrir(self, sesion):
+        """Registrar una sesión recién creada."""
+        ruta, origen = ruta_actual.get(), _origen_llamada()
+        finalizer = weakref.finalize(sesion, self._fuga, id(sesion), ruta, origen)
+        with self._lock:
+            self._abiertas[id(sesion)] = (ruta, origen, time.monotonic(), finalizer)
+
+    def cerrar(self, sesion):
+        """Marcar una sesión como devuelta."""
+        with self._lock:
+            registro = self._abiertas.pop(id(sesion), None)
+        if registro is not None:
+            registro[3].detach()
+
+    def _fuga(self, clave, ruta, origen):
+        with self._lock:
+            self._abiertas.pop(clave, None)
+            self.fugas += 1
+        _aviso_fuga(ruta, origen)
+
+    def abiertas(self, umbral: float = 0.0) -> list:
+        """Sesiones abiertas hace más de `umbral` segundos, con su ruta."""
+        ahora = time.monotonic()
+        with self._lock:
+            return [
+                {"ruta": ruta, "origen": origen, "segundos": round(ahora - desde, 3)}
+                for ruta, origen, desde, _ in self._abiertas.values()
+                if ahora - desde >= umbral
+            ]
+
+
+monitor_pool = MonitorPool()
+rastreador_sesiones = RastreadorSesiones()
+
+
+class SesionMonitoreada(AsyncSession):
+    """AsyncSession que avisa al rastreador al crearse y al cerrarse."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if rastreador_sesiones.activo:
+            rastreador_sesiones.abrir(self)
+
+    async def close(self):
+        rastreador_sesiones.cerrar(self)
+        await super().close()
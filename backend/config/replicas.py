@@ -0,0 +1,277 @@
+"""Réplicas de lectura y reparto de sesiones entre primario y réplicas.
+
+`DATABASE_REPLICA_URLS` (URLs separadas por comas) configura las réplicas. Las
+rutas de solo lectura usan `get_db_lectura`, que reparte las sesiones entre
+las réplicas sanas por turnos; las escrituras siguen usando `get_db` y el
+primario. Una tarea comprueba cada réplica cada DB_REPLICA_CHECK_INTERVAL
+segundos con `SELECT 1`; una réplica que falla, en la comprobación o en una
+petición, deja de recibir lecturas hasta que vuelva a responder. Sin réplicas
+sanas se lee del primario.
+
+Lectura de las propias escrituras: cuando una petición escribe en el primario
+se responde con la cookie `CLIENTE_ESCRIBIO` y, durante
+DB_READ_YOUR_WRITES_SECONDS segundos, las lecturas de ese cliente se hacen en
+el primario, para que vea sus cambios aunque las réplicas vayan retrasadas.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal, _engine_options
+from .metricas import metricas
+
+logger = logging.getLogger(__name__)
+
+# Cookie con el instante (epoch) hasta el que el cliente lee del primario
+CLIENTE_ESCRIBIO = "rw_hasta"
+
+# Origen de la sesión, guardado en `db.info["origen"]`
+PRIMARIO = "primario"
+REPLICA = "replica"
+LECTURA_PROPIA = "lectura_propia"  # primario, por una escritura reciente
+
+
+def urls_replicas() -> list:
+    """URLs de DATABASE_REPLICA_URLS."""
+    urls = os.getenv("DATABASE_REPLICA_URLS", "")
+    return [url.strip() for url in urls.split(",") if url.strip()]
+
+
+class _Replica:
+    """Engine de una réplica y el resultado de su última comprobación."""
+
+    __slots__ = ("url", "engine", "sana", "comprobada", "error")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = create_async_engine(url, **_engine_options(url))
+        self.sana = True
+        self.comprobada = None
+        self.error = None
+
+    def stats(self) -> dict:
+        pool = self.engine.pool
+        return {
+            "url": self.engine.url.render_as_string(hide_password=True),
+            "sana": self.sana,
+            "comprobada": self.comprobada,
+            "error": self.error,
+            "prestadas": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        }
+
+
+class Replicas:
+    """Réplicas configuradas, elegidas por turnos entre las sanas."""
+
+    def __init__(self, intervalo: float = 5.0, timeout: float = 2.0):
+        self.intervalo = intervalo
+        self.timeout = timeout
+        self._replicas = None
+        self._turno = 0
+        self._tarea = None
+
+    @property
+    def replicas(self) -> list:
+        """Réplicas de DATABASE_REPLICA_URLS; los engines se crean al usarlas."""
+        if self._replicas is None:
+            self._replicas = [_Replica(url) for url in urls_replicas()]
+            for replica in self._replicas:
+                metricas.registrar(replica.engine)
+        return self._replicas
+
+    def siguiente(self):
+        """Próxima réplica sana por turnos, o None si no hay ninguna."""
+        replicas = self.replicas
+        for _ in range(len(replicas)):
+            replica = replicas[self._turno % len(replicas)]
+            self._turno += 1
+            if replica.sana:
+                return replica
+        return None
+
+    def marcar_caida(self, replica: _Replica, error):
+        """Dejar de enviar lecturas a la réplica hasta la próxima comprobación."""
+        if replica.sana:
+            logger.warning("Réplica %s fuera de servicio: %s", replica.url, error)
+        replica.sana = False
+        replica.error = str(error)
+
+    async def comprobar(self):
+        """Comprobar todas las réplicas con `SELECT 1`."""
+
+        async def comprobar_una(replica):
+            try:
+                async with replica.engine.connect() as conn:
+                    await asyncio.wait_for(
+                        conn.execute(text("SELECT 1")), timeout=self.timeout
+                    )
+            except (DBAPIError, OSError, asyncio.TimeoutError) as exc:
+                self.marcar_caida(replica, repr(exc))
+            else:
+                if not replica.sana:
+                    logger.info("Réplica %s de nuevo en servicio", replica.url)
+                replica.sana = True
+                replica.error = None
+            replica.comprobada = time.time()
+
+        await asyncio.gather(*(comprobar_una(replica) for replica in self.replicas))
+
+    async def _comprobar_siempre(self):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            await self.comprobar()
+
+    async def iniciar(self):
+        """Comprobar las réplicas y lanzar la comprobación periódica."""
+        if self.replicas and self._tarea is None:
+            await self.comprobar()
+            self._tarea = asyncio.create_task(self._comprobar_siempre())
+
+    async def cerrar(self):
+        """Detener la comprobación y cerrar los pools de las réplicas."""
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+        for replica in self._replicas or ():
+            await replica.engine.dispose()
+        self._replicas = None
+
+    def stats(self) -> list:
+        """Estado de cada réplica."""
+        return [replica.stats() for replica in self.replicas]
+
+
+replicas = Replicas(
+    intervalo=float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5")),
+    timeout=float(os.getenv("DB_REPLICA_CHECK_TIMEOUT", "2")),
+)
+
+VENTANA_LECTURA_PROPIA = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
+
+def lee_sus_escrituras(request: Request) -> bool:
+    """El cliente escribió hace menos de VENTANA_LECTURA_PROPIA segundos."""
+    try:
+        return float(request.cookies.get(CLIENTE_ESCRIBIO, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+@asynccontextmanager
+async def sesion_lectura(request: Request):
+    """Sesión de solo lectura: réplica por turnos, o el primario si no hay
+    réplicas sanas o el cliente acaba de escribir."""
+    replica = None
+    if lee_sus_escrituras(request):
+        origen = LECTURA_PROPIA
+    else:
+        replica = replicas.siguiente()
+        origen = PRIMARIO if replica is None else REPLICA
+    opciones = {} if replica is None else {"bind": replica.engine}
+    async with SessionLocal(**opciones) as db:
+        db.info["origen"] = origen
+        try:
+            yield db
+        except DBAPIError as exc:
+            if replica is not None and exc.connection_invalidated:
+                replicas.marcar_caida(replica, exc)
+            raise
+
+
+async def get_db_lectura(request: Request):
+    """get a read-only database session"""
+    async with sesion_lectura(request) as db:
+        yield db
+
+
+def origen_sesion(db) -> str:
+    """Origen de una sesión de `get_db_lectura` (PRIMARIO para `get_db`)."""
+    return db.info.get("origen", PRIMARIO)
+
+
+class _Escrituras:
+    """Marca de la petición en curso: si escribió en el primario."""
+
+    __slots__ = ("escribio",)
+
+    def __init__(self):
+        self.escribio = False
+
+
+_escrituras: ContextVar = ContextVar("escrituras", default=None)
+
+
+def _marcar_escritura():
+    peticion = _escrituras.get()
+    if peticion is not None:
+        peticion.escribio = True
+
+
+@event.listens_for(Session, "after_flush")
+def _despues_de_flush(session, _flush_context):
+    if session.info.get("origen", PRIMARIO) == PRIMARIO and (
+        session.new or session.dirty or session.deleted
+    ):
+        _marcar_escritura()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _al_ejecutar(estado):
+    if (
+        estado.is_insert or estado.is_update or estado.is_delete
+    ) and estado.session.info.get("origen", PRIMARIO) == PRIMARIO:
+        _marcar_escritura()
+
+
+class LecturaPropiaMiddleware:
+    """Middleware ASGI que marca a los clientes que acaban de escribir.
+
+    Si la petición escribió en el primario y no falló, la respuesta lleva la
+    cookie `CLIENTE_ESCRIBIO` con el instante hasta el que debe leer del
+    primario.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replicas.replicas:
+            await self.app(scope, receive, send)
+            return
+        peticion = _Escrituras()
+        token = _escrituras.set(peticion)
+
+        async def send_con_cookie(mensaje):
+            if (
+                mensaje["type"] == "http.response.start"
+                and peticion.escribio
+                and mensaje["status"] < 400
+            ):
+                hasta = time.time() + VENTANA_LECTURA_PROPIA
+                cookie = (
+                    f"{CLIENTE_ESCRIBIO}={hasta:.3f}; Max-Age="
+                    f"{int(VENTANA_LECTURA_PROPIA) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                mensaje["headers"] = list(mensaje.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode())
+                ]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, send_con_cookie)
+        finally:
+            _escrituras.reset(token)
@@ -0,0 +1,22 @@
+"""Modelo del índice invertido de búsqueda por nombre."""
+
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+
+# Necesaio para cada modelo
+from ..config.database import Base
+
+
+class TerminoBusqueda(Base):
+    """Define la tabla de términos (palabras y trigramas) de los artículos."""
+
+    __tablename__ = "busqueda_terminos"
+
+    id = Column(Integer, primary_key=True, index=True)
+    termino = Column(String(64), nullable=False)
+    articulo_id = Column(
+        Integer, ForeignKey("articulos.id"), nullable=False, index=True
+    )
+
+    __table_args__ = (
+        Index("ix_busqueda_terminos_termino_articulo", "termino", "articulo_id"),
+    )
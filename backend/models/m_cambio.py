@@ -0,0 +1,21 @@
+"""Modelo del registro de cambios del catálogo."""
+
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String
+
+# Necesaio para cada modelo
+from ..config.database import Base
+
+
+class Cambio(Base):
+    """Define la última versión en la que cambió cada sección, familia o artículo.
+
+    Hay una sola fila por entidad: cada cambio reemplaza la anterior, así que el
+    registro ya está compactado y `eliminado` marca las bajas.
+    """
+
+    __tablename__ = "cambios"
+
+    entidad = Column(String(20), primary_key=True)
+    entidad_id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, index=True)
+    eliminado = Column(Boolean, nullable=False, default=False)
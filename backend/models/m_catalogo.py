@@ -0,0 +1,33 @@
+"""Modelo de la tabla de lectura del catálogo (desnormalizada)."""
+
+from sqlalchemy import Column, Float, Integer, String
+
+# Necesaio para cada modelo
+from ..config.database import Base
+
+
+class CatalogoPlano(Base):
+    """Define una fila por código de barras con su artículo, familia y sección.
+
+    Los artículos sin códigos de barras tienen una fila con `codigo_barra` nulo.
+    Se mantiene desde las rutas con backend.services.catalogo_plano; las
+    tablas normalizadas siguen siendo la fuente de verdad.
+    """
+
+    __tablename__ = "catalogo_plano"
+
+    id = Column(Integer, primary_key=True)
+    codigo_barra = Column(String(20), unique=True, index=True)
+    codigo_barra_id = Column(Integer)
+    articulo_id = Column(Integer, nullable=False, index=True)
+    cod_short = Column(String(6))
+    name = Column(String(250))
+    purchase_price = Column(Float)
+    sale_price = Column(Float)
+    und = Column(String(20))
+    tax = Column(Float)
+    family_id = Column(Integer, index=True)
+    family_cod = Column(String(10))
+    family_name = Column(String(255))
+    section_id = Column(Integer, index=True)
+    section_name = Column(String(255))
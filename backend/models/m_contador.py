@@ -0,0 +1,15 @@
+"""Modelo de la tabla de contadores."""
+
+from sqlalchemy import BigInteger, Column, String
+
+# Necesaio para cada modelo
+from ..config.database import Base
+
+
+class Contador(Base):
+    """Define la tabla de contadores con nombre (secuencias compartidas)."""
+
+    __tablename__ = "contadores"
+
+    nombre = Column(String(50), primary_key=True)
+    valor = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,46 @@
+"""Modelo de las tablas de ventas (tickets de los terminales)."""
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+
+# Necesaio para cada modelo
+from ..config.database import Base
+
+
+class Ticket(Base):
+    """Define la tabla de tickets.
+
+    Cada terminal numera sus tickets; (terminal, numero) identifica el ticket
+    y permite reenviarlo sin duplicarlo.
+    """
+
+    __tablename__ = "tickets"
+    __table_args__ = (UniqueConstraint("terminal", "numero"),)
+
+    id = Column(Integer, primary_key=True)
+    terminal = Column(String(40), nullable=False)
+    numero = Column(String(40), nullable=False)
+    fecha = Column(DateTime, nullable=False, index=True)
+    total = Column(Float, nullable=False)
+
+
+class TicketLinea(Base):
+    """Define la tabla de líneas de ticket: un artículo vendido."""
+
+    __tablename__ = "ticket_lineas"
+
+    id = Column(Integer, primary_key=True)
+    ticket_id = Column(Integer, ForeignKey("tickets.id"), nullable=False, index=True)
+    articulo_id = Column(
+        Integer, ForeignKey("articulos.id"), nullable=False, index=True
+    )
+    cantidad = Column(Float, nullable=False)
+    precio = Column(Float, nullable=False)
+    importe = Column(Float, nullable=False)
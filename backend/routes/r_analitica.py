@@ -0,0 +1,45 @@
+""" Rutas de los informes de márgenes y precios """
+
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config.replicas import get_db_lectura
+from ..schemas.sch_analitica import (
+    MargenesFamiliasResponse,
+    MargenesSeccionesResponse,
+)
+from ..services.analitica import margenes_por_familia, margenes_por_seccion
+from ..services.cambios import cache_cambios
+from ..services.version_catalogo import responder_con_cache
+
+Analitica = APIRouter()
+
+
+# Márgenes y precios por familia
+@Analitica.get("/analitica/familias", response_model=MargenesFamiliasResponse)
+async def get_margenes_familias(
+    request: Request, db: AsyncSession = Depends(get_db_lectura)
+):
+    """Artículos, margen y precios con impuesto de cada familia"""
+
+    async def construir():
+        return await margenes_por_familia(db)
+
+    return await responder_con_cache(
+        request, db, "analitica:familias", construir, cache=cache_cambios
+    )
+
+
+# Márgenes y precios por sección
+@Analitica.get("/analitica/secciones", response_model=MargenesSeccionesResponse)
+async def get_margenes_secciones(
+    request: Request, db: AsyncSession = Depends(get_db_lectura)
+):
+    """Artículos, margen y precios con impuesto de cada sección"""
+
+    async def construir():
+        return await margenes_por_seccion(db)
+
+    return await responder_con_cache(
+        request, db, "analitica:secciones", construir, cache=cache_cambios
+    )
@@ -1,23 +1,69 @@
 """Rutas para el recurso Articulo"""
 
 # Importaciones de la biblioteca estándar
-import random
-import string
-from typing import List
+import asyncio
+import io
+from typing import List, Optional
 
 # Importaciones de terceros
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Request, UploadFile
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
 
 # Importaciones locales de la aplicación
 from ..config.db import get_db
+from ..config.replicas import (
+    LECTURA_PROPIA,
+    REPLICA,
+    VENTANA_LECTURA_PROPIA,
+    get_db_lectura,
+    origen_sesion,
+    sesion_lectura,
+)
 from ..models.m_articulo import (
     Articulo as ArticuloModel,
     CodigoBarra as CodigoBarraModel,
 )
-from ..schemas.sch_articulo import Articulo, ArticuloCreate, ArticulosResponse
-from ..models.m_family import Family
+from ..schemas.sch_articulo import (
+    AjustePrecios,
+    AjustePreciosResponse,
+    Articulo,
+    ArticuloCreate,
+    ArticulosResponse,
+    CodigoResuelto,
+    CodigosLote,
+    CodigosLoteResponse,
+)
+from ..services.cambios import ARTICULO, cache_cambios, registrar_cambios
+from ..services.busqueda import buscar_ids, indexar_articulos
+from ..services.bajas import eliminar_articulos
+from ..services.cache_codigos import cache_codigos
+from ..services.dimensiones import dimensiones
+from ..services.indice_codigos import SIN_ARTICULO, indice_codigos
+from ..services.ean import revisar_codigos
+from ..services.catalogo_plano import articulos_por_codigos, refrescar
+from ..services.asignador import (
+    CodigosAgotados,
+    asignador_cod_short,
+    asignador_ean13,
+)
+from ..services.importacion import (
+    FORMATOS,
+    leer_filas,
+    procesar_lote,
+    siguiente_lote,
+)
+from ..services.paginacion import codificar_cursor, decodificar_cursor
+from ..services.precios import ajustar_precios
+from ..services.serializacion import (
+    COLUMNAS_ARTICULO,
+    articulos_dict,
+    columnas_articulo,
+)
 
 
 articulo_router = APIRouter()
@@ -27,139 +73,405 @@ articulo_router = APIRouter()
 @articulo_router.get(
     "/articulos", response_model=ArticulosResponse
 )  # Cambia List[Articulo] por ArticulosResponse
-async def get_articulos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Obtener todos los artículos de la base de datos."""
-    articulos = db.query(ArticuloModel).offset(skip).limit(limit).all()
-    return ArticulosResponse(articulos=articulos)
+async def get_articulos(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db_lectura),
+):
+    """Obtener todos los artículos de la base de datos.
+
+    Con `cursor` se pagina por clave sobre el ID, que no se degrada en páginas
+    profundas; `skip` se mantiene por compatibilidad. Las filas se leen como
+    tuplas y se codifican con orjson (ver services/serializacion.py).
+    """
+    if not 1 <= limit <= 1000:
+        raise HTTPException(status_code=400, detail="limit fuera de rango")
+    if skip < 0:
+        raise HTTPException(status_code=400, detail="skip fuera de rango")
+    query = select(*columnas_articulo()).order_by(ArticuloModel.id)
+    if cursor is not None:
+        query = query.where(ArticuloModel.id > decodificar_cursor(cursor))
+    elif skip:
+        query = query.offset(skip)
+    filas = (await db.execute(query.limit(limit))).all()
+    next_cursor = None
+    if filas and len(filas) == limit:
+        next_cursor = codificar_cursor(filas[-1].id)
+    return ORJSONResponse(
+        {"articulos": await articulos_dict(db, filas), "next_cursor": next_cursor}
+    )
+
+
+async def exportar_articulos_ndjson(request: Request, batch_size: int):
+    """Generar los artículos como NDJSON leyendo desde un cursor del servidor."""
+    consulta = (
+        select(
+            *columnas_articulo(),
+            CodigoBarraModel.codigos_barras,
+        )
+        .outerjoin(CodigoBarraModel, CodigoBarraModel.articulo_id == ArticuloModel.id)
+        .order_by(ArticuloModel.id)
+        .execution_options(yield_per=batch_size)
+    )
+    # La sesión se abre aquí porque la respuesta se envía después de que
+    # las dependencias de la ruta ya se hayan cerrado
+    async with sesion_lectura(request) as db:
+        buffer = []
+        articulo = None
+        async for fila in await db.stream(consulta):
+            if articulo is None or articulo["id"] != fila.id:
+                if articulo is not None:
+                    buffer.append(orjson.dumps(articulo))
+                    if len(buffer) >= batch_size:
+                        yield b"\n".join(buffer) + b"\n"
+                        buffer = []
+                articulo = dict(zip(COLUMNAS_ARTICULO, fila))
+                articulo["codigos_barras"] = []
+            if fila.codigos_barras is not None:
+                articulo["codigos_barras"].append(
+                    {"codigos_barras": fila.codigos_barras}
+                )
+        if articulo is not None:
+            buffer.append(orjson.dumps(articulo))
+        if buffer:
+            yield b"\n".join(buffer) + b"\n"
+
+
+# Exportar todos los artículos como NDJSON
+@articulo_router.get("/articulos/export")
+async def export_articulos(request: Request, batch_size: int = 1000):
+    """Exportar el catálogo completo en streaming, un artículo por línea."""
+    if not 1 <= batch_size <= 10000:
+        raise HTTPException(status_code=400, detail="batch_size fuera de rango")
+    return StreamingResponse(
+        exportar_articulos_ndjson(request, batch_size),
+        media_type="application/x-ndjson",
+    )
+
+
+def _usar_cache(db: AsyncSession) -> bool:
+    """Quien acaba de escribir lee del primario, sin pasar por la caché, que
+    puede tener datos leídos de una réplica retrasada."""
+    return origen_sesion(db) != LECTURA_PROPIA
+
+
+def _vigencia_cache(db: AsyncSession):
+    """Vigencia de lo leído de una réplica: la ventana de lectura propia, que
+    acota su retraso; lo leído del primario usa la de la caché."""
+    return VENTANA_LECTURA_PROPIA if origen_sesion(db) == REPLICA else None
+
+
+async def _etiqueta_cache(db: AsyncSession, version: int) -> tuple:
+    """Etiqueta de caché de lo que se lea en `db`: una réplica puede ir por
+    detrás de `version`, así que se usa la versión que ve su propia sesión."""
+    if origen_sesion(db) == REPLICA:
+        version = await cache_cambios.leer(db)
+    return cache_codigos.etiqueta(version)
 
 
 # Obtener articulo por código de barra
 @articulo_router.get("/articulos/codigo/{codigo_barra}", response_model=Articulo)
-async def read_articulo_by_codigo(codigo_barra: str, db: Session = Depends(get_db)):
+async def read_articulo_by_codigo(
+    codigo_barra: str, db: AsyncSession = Depends(get_db_lectura)
+):
     """Obtener un artículo por su código de barra"""
-    db_articulo = (
-        db.query(ArticuloModel)
-        .join(CodigoBarraModel)
-        .filter(CodigoBarraModel.codigos_barras == codigo_barra)
-        .first()
-    )
-    if db_articulo is None:
+    version = await cache_cambios.version(db)
+    if _usar_cache(db):
+        cached = cache_codigos.get(codigo_barra, version)
+        if cached is not None:
+            return cached
+    # Los códigos que no existen se descartan con el índice, sin consultas
+    if indice_codigos.buscar([codigo_barra]).get(codigo_barra) == SIN_ARTICULO:
         raise HTTPException(status_code=404, detail="Articulo not found")
-    return db_articulo
+    # Se lee del catálogo plano: una sola tabla, sin joins
+    etiqueta = await _etiqueta_cache(db, version)
+    resuelto = (await articulos_por_codigos(db, [codigo_barra])).get(codigo_barra)
+    if resuelto is None:
+        raise HTTPException(status_code=404, detail="Articulo not found")
+    articulo_id, articulo = resuelto
+    cache_codigos.set(
+        codigo_barra, articulo_id, articulo, etiqueta, ttl=_vigencia_cache(db)
+    )
+    return articulo
 
 
-# Obtener articulo por nombre
-@articulo_router.get("/articulos/nombre/{nombre}", response_model=List[Articulo])
-async def read_articulo_by_nombre(nombre: str, db: Session = Depends(get_db)):
-    """Obtener un artículo por su nombre"""
-    db_articulos = (
-        db.query(ArticuloModel).filter(ArticuloModel.name.ilike(f"%{nombre}%")).all()
-    )
-    if not db_articulos:
-        raise HTTPException(status_code=404, detail="Articulo not found")
-    return db_articulos
+# Resolver varios códigos de barras en una sola petición
+@articulo_router.post("/articulos/codigos", response_model=CodigosLoteResponse)
+async def resolve_codigos(
+    lote: CodigosLote, db: AsyncSession = Depends(get_db_lectura)
+):
+    """Resolver una cesta de códigos de barras con una sola consulta IN.
+
+    Los resultados conservan el orden (y las repeticiones) de la entrada.
+    """
+    resueltos = {}
+    version = await cache_cambios.version(db)
+    for codigo in set(lote.codigos) if _usar_cache(db) else ():
+        cached = cache_codigos.get(codigo, version)
+        if cached is not None:
+            resueltos[codigo] = cached
+    faltantes = set(lote.codigos) - resueltos.keys()
+    faltantes -= {
+        codigo
+        for codigo, articulo_id in indice_codigos.buscar(faltantes).items()
+        if articulo_id == SIN_ARTICULO
+    }
+    if faltantes:
+        etiqueta = await _etiqueta_cache(db, version)
+        encontrados = await articulos_por_codigos(db, faltantes)
+        for codigo, (articulo_id, articulo) in encontrados.items():
+            cache_codigos.set(
+                codigo, articulo_id, articulo, etiqueta, ttl=_vigencia_cache(db)
+            )
+            resueltos[codigo] = articulo
+
+    encontrados, desconocidos = [], []
+    for codigo in lote.codigos:
+        if codigo in resueltos:
+            encontrados.append(
+                CodigoResuelto(codigo_barra=codigo, articulo=resueltos[codigo])
+            )
+        else:
+            desconocidos.append(codigo)
+    return CodigosLoteResponse(encontrados=encontrados, desconocidos=desconocidos)
+
+
+# Estadísticas de la caché de códigos de barras
+@articulo_router.get("/articulos/cache")
+async def get_cache_stats():
+    """Obtener los contadores de la caché de códigos de barras"""
+    return cache_codigos.stats()
 
 
-def generar_codigo_barra_aleatorio():
-    """Generar un código de barras aleatorio"""
-    base = "775" + "".join(random.choices(string.digits, k=9))
-    digito_control = calcular_digito_control_ean13(base)
-    return base + digito_control
+# Estadísticas del índice compartido de códigos de barras
+@articulo_router.get("/articulos/indice")
+async def get_indice_stats():
+    """Tamaño del índice mapeado en memoria y de su delta"""
+    return indice_codigos.stats()
 
 
-def calcular_digito_control_ean13(base):
-    """Calcular el dígito de control de un código EAN-13."""
-    suma = sum((3 if i % 2 == 0 else 1) * int(n) for i, n in enumerate(base[:12]))
-    modulo = suma % 10
-    digito_control = (10 - modulo) % 10
-    return str(digito_control)
+# Obtener articulo por nombre
+@articulo_router.get("/articulos/nombre/{nombre}", response_model=List[Articulo])
+async def read_articulo_by_nombre(
+    nombre: str,
+    skip: int = 0,
+    limit: int = 50,
+    db: AsyncSession = Depends(get_db_lectura),
+):
+    """Buscar artículos por nombre usando el índice de búsqueda, por relevancia"""
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit fuera de rango")
+    if skip < 0:
+        raise HTTPException(status_code=400, detail="skip fuera de rango")
+    ids = await buscar_ids(db, nombre, skip=skip, limit=limit)
+    if not ids:
+        raise HTTPException(status_code=404, detail="Articulo not found")
+    filas = await db.execute(
+        select(*columnas_articulo()).where(ArticuloModel.id.in_(ids))
+    )
+    por_id = {articulo["id"]: articulo for articulo in await articulos_dict(db, filas)}
+    return ORJSONResponse(
+        [por_id[articulo_id] for articulo_id in ids if articulo_id in por_id]
+    )
 
 
 # Crear un nuevo artículo
 @articulo_router.post("/articulos/", response_model=Articulo)
-async def create_articulo(articulo_data: ArticuloCreate, db: Session = Depends(get_db)):
+async def create_articulo(
+    articulo_data: ArticuloCreate, db: AsyncSession = Depends(get_db)
+):
     """Crear un nuevo artículo."""
-    # Generar código corto único
-    while True:
-        cod_short = "".join(random.choices(string.digits, k=6))
-        if (
-            not db.query(ArticuloModel)
-            .filter(ArticuloModel.cod_short == cod_short)
-            .first()
-        ):
-            break
-
-    # Encontrar el ID de la familia por el nombre
-    familia = db.query(Family).filter(Family.name == articulo_data.family_name).first()
-    if not familia:
+    # Encontrar el ID de la familia por el nombre, sin consultar la base de datos
+    familia_id = await dimensiones.familia(db, articulo_data.family_name)
+    if familia_id is None:
         raise HTTPException(status_code=404, detail="Familia not found")
 
+    # Validar los códigos recibidos y buscar duplicados con una sola consulta
+    codigos = [
+        codigo.codigos_barras
+        for codigo in articulo_data.codigos_barras
+        if codigo.codigos_barras
+    ]
+    if codigos:
+        revision = await revisar_codigos(db, codigos)
+        if revision["invalidos"]:
+            raise HTTPException(
+                status_code=422,
+                detail="Códigos de barras no válidos (EAN-8, UPC-A o EAN-13): "
+                f"{revision['invalidos']}",
+            )
+        duplicados = sorted(set(revision["repetidos"] + revision["existentes"]))
+        if duplicados:
+            raise HTTPException(
+                status_code=400, detail=f"Código de barras duplicado: {duplicados}"
+            )
+
+    # El asignador usa su propia conexión; se devuelve antes la de esta sesión
+    # para no agotar el pool con muchas altas simultáneas
+    await db.commit()
+
+    # Asignar el código corto y, si no se proporcionan, el código de barras
+    try:
+        cod_short = await asignador_cod_short.siguiente()
+        if not codigos:
+            codigos = [await asignador_ean13.siguiente()]
+    except CodigosAgotados as exc:
+        raise HTTPException(
+            status_code=409, detail=f"No quedan códigos libres: {exc}"
+        ) from exc
+
     # Preparar el diccionario
     articulo_dict = articulo_data.dict(
         exclude_unset=True, exclude={"family_name", "codigos_barras"}
     )
-    articulo_dict.update({"family_id": familia.id, "cod_short": cod_short})
+    articulo_dict.update({"family_id": familia_id, "cod_short": cod_short})
 
     db_articulo = ArticuloModel(**articulo_dict)
+    # El artículo y sus códigos se confirman juntos: si otra petición registró
+    # uno de los códigos después de la revisión, no queda nada a medias
     try:
         db.add(db_articulo)
-        db.commit()
-        db.refresh(db_articulo)
+        await db.flush()
+        for codigo_barra in codigos:
+            db_codigo = CodigoBarraModel(
+                codigos_barras=codigo_barra, articulo_id=db_articulo.id
+            )
+            db.add(db_codigo)
+        await indexar_articulos(
+            db, [(db_articulo.id, db_articulo.name)], reemplazar=False
+        )
+        await refrescar(db, articulos=[db_articulo.id])
+        await registrar_cambios(db, ARTICULO, [db_articulo.id])
+        await db.commit()
     except IntegrityError as exc:
-        db.rollback()
+        await db.rollback()
+        duplicados = (await revisar_codigos(db, codigos))["existentes"]
+        if duplicados:
+            raise HTTPException(
+                status_code=400, detail=f"Código de barras duplicado: {duplicados}"
+            ) from exc
         raise HTTPException(
             status_code=400, detail="Error al crear el artículo, posible duplicado."
         ) from exc
+    await db.refresh(db_articulo, attribute_names=["codigos_barras"])
+    cache_codigos.invalidar_codigos(codigos)
+    indice_codigos.agregar(codigos, db_articulo.id)
+    return db_articulo
 
-    # Manejar códigos de barras
-    codigos_barras_provided = articulo_data.codigos_barras
-    if codigos_barras_provided:
-        for codigo in codigos_barras_provided:
-            db_codigo = CodigoBarraModel(
-                codigos_barras=codigo.codigos_barras, articulo_id=db_articulo.id
-            )
-            db.add(db_codigo)
-    else:
-        # Generar un código de barras si no se proporciona ninguno
-        codigo_barra = generar_codigo_barra_aleatorio()
-        db_codigo = CodigoBarraModel(
-            codigos_barras=codigo_barra, articulo_id=db_articulo.id
-        )
-        db.add(db_codigo)
 
-    db.commit()
-    return db_articulo
+# Importar artículos en bloque desde un archivo CSV o JSONL
+@articulo_router.post("/articulos/import")
+async def import_articulos(
+    archivo: UploadFile,
+    formato: Optional[str] = None,
+    chunk_size: int = 1000,
+    db: AsyncSession = Depends(get_db),
+):
+    """Importar artículos desde un archivo enviado como multipart/form-data
+    (campo `archivo`), procesándolo por lotes.
+
+    El formato se toma del parámetro `formato` o del Content-Type (text/csv) o
+    la extensión del archivo; en CSV los códigos de barras se separan con "|".
+    """
+    if formato is None:
+        es_csv = "csv" in (archivo.content_type or "") or (
+            archivo.filename or ""
+        ).lower().endswith(".csv")
+        formato = "csv" if es_csv else "jsonl"
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=400, detail="Formato no soportado")
+    if not 1 <= chunk_size <= 10000:
+        raise HTTPException(status_code=400, detail="chunk_size fuera de rango")
+
+    # El archivo ya está en disco (o en memoria si es pequeño); se lee por
+    # lotes en un hilo para no bloquear el event loop
+    texto = io.TextIOWrapper(archivo.file, encoding="utf-8-sig", newline="")
+    filas = leer_filas(texto, formato)
+    total = creados = 0
+    errores = []
+    while True:
+        try:
+            lote = await asyncio.to_thread(siguiente_lote, filas, chunk_size)
+        except UnicodeDecodeError as exc:
+            raise HTTPException(
+                status_code=400,
+                detail=f"El archivo no está en UTF-8; se crearon {creados} "
+                "artículos antes del error",
+            ) from exc
+        if not lote:
+            break
+        procesados, errores_lote = await procesar_lote(db, lote)
+        total, creados = total + len(lote), creados + procesados
+        errores.extend(errores_lote)
+
+    return {"total": total, "creados": creados, "errores": errores}
+
+
+# Ajustar precios de una familia, una sección o una lista de códigos cortos
+@articulo_router.post("/articulos/precios", response_model=AjustePreciosResponse)
+async def ajustar_precios_articulos(
+    ajuste: AjustePrecios, db: AsyncSession = Depends(get_db)
+):
+    """Aplicar un cambio porcentual o fijo de precios con un solo UPDATE.
+
+    Con `dry_run` solo se devuelve el impacto agregado, sin modificar nada.
+    """
+    impacto = await ajustar_precios(db, ajuste)
+    if impacto["aplicado"]:
+        # La caché guarda artículos completos, con sus precios
+        cache_codigos.limpiar()
+    return impacto
 
 
 # Actualizar un artículo por su ID
 @articulo_router.put("/articulos/{articulo_id}", response_model=Articulo)
-def update_articulo(
-    articulo_id: int, articulo: ArticuloCreate, db: Session = Depends(get_db)
+async def update_articulo(
+    articulo_id: int, articulo: ArticuloCreate, db: AsyncSession = Depends(get_db)
 ):
     """Actualizar un artículo por su ID"""
-    db_articulo = (
-        db.query(ArticuloModel).filter(ArticuloModel.id == articulo_id).first()
+    db_articulo = await db.scalar(
+        select(ArticuloModel)
+        .where(ArticuloModel.id == articulo_id)
+        .options(selectinload(ArticuloModel.codigos_barras))
     )
     if db_articulo is None:
         raise HTTPException(status_code=404, detail="Articulo not found")
+    # Los códigos de barras no se modifican aquí y la familia se resuelve por nombre
     for var, value in vars(articulo).items():
-        if value:
+        if value and var not in ("codigos_barras", "family_name"):
             setattr(db_articulo, var, value)
+    if articulo.family_name:
+        familia_id = await dimensiones.familia(db, articulo.family_name)
+        if familia_id is None:
+            raise HTTPException(status_code=404, detail="Familia not found")
+        db_articulo.family_id = familia_id
     db.add(db_articulo)
-    db.commit()
-    db.refresh(db_articulo)
+    if articulo.name:
+        await indexar_articulos(db, [(articulo_id, articulo.name)])
+    await refrescar(db, articulos=[articulo_id])
+    await registrar_cambios(db, ARTICULO, [articulo_id])
+    await db.commit()
+    cache_codigos.invalidar_articulo(articulo_id)
     return db_articulo
 
 
 # Eliminar un artículo por su ID
 @articulo_router.delete("/articulos/{articulo_id}", response_model=Articulo)
-def delete_articulo(articulo_id: int, db: Session = Depends(get_db)):
+async def delete_articulo(articulo_id: int, db: AsyncSession = Depends(get_db)):
     """Eliminar un artículo por su ID"""
-    db_articulo = (
-        db.query(ArticuloModel).filter(ArticuloModel.id == articulo_id).first()
+    db_articulo = await db.scalar(
+        select(ArticuloModel)
+        .where(ArticuloModel.id == articulo_id)
+        .options(selectinload(ArticuloModel.codigos_barras))
     )
     if db_articulo is None:
         raise HTTPException(status_code=404, detail="Articulo not found")
-    db.delete(db_articulo)
-    db.commit()
+    # Igual que las bajas masivas: con sus códigos de barras, sus términos de
+    # búsqueda y sus filas planas; 409 si tiene ventas
+    _, codigos = await eliminar_articulos(db, ArticuloModel.id == articulo_id)
+    await registrar_cambios(db, ARTICULO, [articulo_id], eliminado=True)
+    await db.commit()
+    cache_codigos.invalidar_articulo(articulo_id)
+    indice_codigos.quitar(codigos)
     return db_articulo
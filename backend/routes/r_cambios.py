@@ -0,0 +1,29 @@
+""" Rutas del registro de cambios para la sincronización de terminales """
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config.replicas import get_db_lectura
+from ..schemas.sch_cambios import CambiosResponse
+from ..services.cambios import cambios_desde
+
+Cambios = APIRouter()
+
+
+# Cambios del catálogo desde una versión
+@Cambios.get("/changes", response_model=CambiosResponse)
+async def get_changes(
+    since: int = 0, limit: int = 1000, db: AsyncSession = Depends(get_db_lectura)
+):
+    """Secciones, familias y artículos cambiados después de la versión `since`.
+
+    Con `since=0` se obtiene el catálogo completo. Los terminales aplican las
+    altas en el orden secciones, familias, artículos y guardan `version`;
+    mientras `mas` sea verdadero deben volver a pedir desde esa versión.
+    """
+    if since < 0:
+        raise HTTPException(status_code=400, detail="since fuera de rango")
+    if not 1 <= limit <= 5000:
+        raise HTTPException(status_code=400, detail="limit fuera de rango")
+    return ORJSONResponse(await cambios_desde(db, since, limit))
@@ -0,0 +1,201 @@
+""" Rutas de lectura del catálogo plano """
+
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config.replicas import get_db_lectura
+from ..models.m_catalogo import CatalogoPlano
+from ..schemas.sch_catalogo import CatalogoItem, CatalogoResponse
+from ..services.instantanea import instantaneas, leer_manifiesto
+from ..services.paginacion import codificar_cursor, decodificar_cursor
+
+Catalogo = APIRouter()
+
+# Columnas del listado, en el orden de CatalogoItem
+CAMPOS_ITEM = tuple(CatalogoItem.model_fields)
+
+# Bytes leídos del archivo por cada trozo de la respuesta
+TROZO_INSTANTANEA = 1 << 20
+
+
+# Listar el catálogo plano
+@Catalogo.get("/catalogo", response_model=CatalogoResponse)
+async def get_catalogo(
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    family_id: Optional[int] = None,
+    section_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db_lectura),
+):
+    """Una fila por código de barras, paginada por clave y sin joins"""
+    if not 1 <= limit <= 1000:
+        raise HTTPException(status_code=400, detail="limit fuera de rango")
+    query = select(
+        CatalogoPlano.id, *(getattr(CatalogoPlano, campo) for campo in CAMPOS_ITEM)
+    ).order_by(CatalogoPlano.id)
+    if cursor is not None:
+        query = query.where(CatalogoPlano.id > decodificar_cursor(cursor))
+    if family_id is not None:
+        query = query.where(CatalogoPlano.family_id == family_id)
+    if section_id is not None:
+        query = query.where(CatalogoPlano.section_id == section_id)
+    filas = (await db.execute(query.limit(limit))).all()
+    next_cursor = codificar_cursor(filas[-1].id) if len(filas) == limit else None
+    # Tuplas a diccionarios y orjson, sin validar cada fila con pydantic
+    return ORJSONResponse(
+        {
+            "items": [dict(zip(CAMPOS_ITEM, fila[1:])) for fila in filas],
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+# Obtener una fila del catálogo por código de barras
+@Catalogo.get("/catalogo/codigo/{codigo_barra}", response_model=CatalogoItem)
+async def get_catalogo_por_codigo(
+    codigo_barra: str, db: AsyncSession = Depends(get_db_lectura)
+):
+    """Artículo, familia y sección de un código de barras"""
+    fila = (
+        await db.execute(
+            select(CatalogoPlano.__table__).where(
+                CatalogoPlano.codigo_barra == codigo_barra
+            )
+        )
+    ).first()
+    if fila is None:
+        raise HTTPException(status_code=404, detail="Codigo not found")
+    return CatalogoItem.model_validate(fila)
+
+
+def _abrir_instantanea(version: Optional[int]):
+    """(versión, archivo abierto) de la instantánea pedida o de la última."""
+    if not instantaneas.activo:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="SNAPSHOT_DIR no está configurado",
+        )
+    version = instantaneas.ultima() if version is None else version
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="La instantánea todavía no se generó",
+            headers={"Retry-After": "5"},
+        )
+    try:
+        # Abierto, el archivo sigue legible aunque se borre por una versión nueva
+        return version, open(instantaneas.ruta(version), "rb")
+    except FileNotFoundError as exc:
+        raise HTTPException(
+            status_code=404, detail="Versión de instantánea no disponible"
+        ) from exc
+
+
+def _rango(cabecera: str, tamano: int):
+    """(inicio, fin) inclusivo de un Range de un solo tramo; None para servir el
+    archivo completo (sin Range o con varios tramos); 416 si no se puede servir."""
+    if not cabecera or not cabecera.startswith("bytes=") or "," in cabecera:
+        return None
+    desde, _, hasta = cabecera[len("bytes=") :].strip().partition("-")
+    try:
+        if desde:
+            inicio = int(desde)
+            fin = min(int(hasta), tamano - 1) if hasta else tamano - 1
+        else:
+            inicio, fin = max(tamano - int(hasta), 0), tamano - 1
+    except ValueError:
+        return None
+    if inicio > fin or inicio >= tamano:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Rango fuera del archivo",
+            headers={"Content-Range": f"bytes */{tamano}"},
+        )
+    return inicio, fin
+
+
+def _trozos(archivo, inicio: int, largo: int):
+    """Leer `largo` bytes desde `inicio` por trozos y cerrar el archivo."""
+    try:
+        while largo > 0:
+            trozo = os.pread(archivo.fileno(), min(largo, TROZO_INSTANTANEA), inicio)
+            if not trozo:
+                break
+            inicio += len(trozo)
+            largo -= len(trozo)
+            yield trozo
+    finally:
+        archivo.close()
+
+
+# Descargar la instantánea del catálogo
+@Catalogo.get("/catalogo/snapshot")
+async def get_snapshot(request: Request, version: Optional[int] = None):
+    """Secciones, familias, artículos y códigos de barras en un solo archivo
+    comprimido por columnas, con soporte de Range e If-Range.
+
+    Tras cargarla el terminal pide `GET /changes?since=` con la versión de la
+    cabecera X-Catalog-Version.
+    """
+    version, archivo = _abrir_instantanea(version)
+    tamano = os.fstat(archivo.fileno()).st_size
+    etag = f'"snap-{version}"'
+    cabeceras = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "X-Catalog-Version": str(version),
+        "Content-Disposition": f'attachment; filename="catalogo-{version}.snap"',
+    }
+    try:
+        if request.headers.get("if-none-match") == etag:
+            archivo.close()
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabeceras)
+        rango = None
+        si_rango = request.headers.get("if-range")
+        if si_rango is None or si_rango == etag:
+            rango = _rango(request.headers.get("range"), tamano)
+    except HTTPException:
+        archivo.close()
+        raise
+    codigo = status.HTTP_200_OK
+    inicio, fin = 0, tamano - 1
+    if rango is not None:
+        inicio, fin = rango
+        codigo = status.HTTP_206_PARTIAL_CONTENT
+        cabeceras["Content-Range"] = f"bytes {inicio}-{fin}/{tamano}"
+    cabeceras["Content-Length"] = str(fin - inicio + 1)
+    return StreamingResponse(
+        _trozos(archivo, inicio, fin - inicio + 1),
+        status_code=codigo,
+        media_type="application/octet-stream",
+        headers=cabeceras,
+    )
+
+
+# Manifiesto de la instantánea del catálogo
+@Catalogo.get("/catalogo/snapshot/manifiesto")
+async def get_snapshot_manifiesto(version: Optional[int] = None):
+    """Versión, filas y posición de cada columna dentro del archivo"""
+    version, archivo = _abrir_instantanea(version)
+    with archivo:
+        manifiesto, inicio = leer_manifiesto(archivo)
+        tamano = os.fstat(archivo.fileno()).st_size
+    return {**manifiesto, "inicio_bloques": inicio, "tamano": tamano}
+
+
+# Pedir una instantánea nueva
+@Catalogo.post("/catalogo/snapshot", status_code=status.HTTP_202_ACCEPTED)
+async def post_snapshot():
+    """Adelantar la comprobación; se genera en segundo plano si el catálogo cambió"""
+    if not instantaneas.activo:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="SNAPSHOT_DIR no está configurado",
+        )
+    instantaneas.pedir()
+    return instantaneas.stats()
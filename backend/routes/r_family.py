@@ -1,21 +1,67 @@
 """ Rutas para el CRUD de familias """
 
-from fastapi import APIRouter, HTTPException, status, Response
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.m_family import Family
 from ..models.m_seccion import Section
-from ..config.db import SessionLocal
-from ..schemas.sch_family import FamiliaCreate, FamiliaUpdate, FamiliaResponse
+from ..config.db import get_db
+from ..config.replicas import get_db_lectura
+from ..schemas.sch_family import (
+    BajaFamilias,
+    BajaFamiliasResponse,
+    FamiliaCreate,
+    FamiliaResponse,
+    FamiliasResponse,
+    FamiliaUpdate,
+)
+from ..services.bajas import (
+    DESVINCULAR,
+    dar_de_baja_familias,
+    resolver_familias,
+)
+from ..services.cache_codigos import cache_codigos
+from ..services.cambios import FAMILIA, registrar_cambios
+from ..services.catalogo_plano import refrescar
+from ..services.dimensiones import dimensiones
+from ..services.version_catalogo import cache_catalogo, responder_con_cache
 
 Familia = APIRouter()
 
+# Qué hacer con los artículos de una familia eliminada
+ModoBaja = Literal["desvincular", "reasignar", "eliminar"]
+
 
 # Obtener todas las familias
-@Familia.get("/families")
-async def get_families():
+@Familia.get("/families", response_model=FamiliasResponse)
+async def get_families(request: Request, db: AsyncSession = Depends(get_db_lectura)):
     """get all families"""
-    db = SessionLocal()
-    families = db.query(Family).all()
-    return {"families": families}
+
+    async def construir():
+        # Una sola consulta con el nombre de la sección, sin cargar objetos ORM
+        filas = await db.execute(
+            select(
+                Family.id,
+                Family.cod,
+                Family.name,
+                Family.section_id,
+                Section.name.label("section_name"),
+            )
+            .outerjoin(Section, Family.section_id == Section.id)
+            .order_by(Family.id)
+        )
+        return {"families": [dict(fila._mapping) for fila in filas]}
+
+    return await responder_con_cache(request, db, "families", construir)
+
+
+# Estadísticas de la caché de familias y secciones por nombre
+@Familia.get("/families/cache")
+async def get_dimensiones_stats():
+    """Tamaño de la caché de dimensiones y cantidad de recargas"""
+    return dimensiones.stats()
 
 
 # Función para generar el código de la familia a partir del nombre
@@ -29,7 +75,7 @@ def generate_family_code_from_name(name: str) -> str:
 
 # Crear una nueva familia
 @Familia.post("/families", response_model=FamiliaResponse)
-async def create_family(family: FamiliaCreate):
+async def create_family(family: FamiliaCreate, db: AsyncSession = Depends(get_db)):
     """create a new family"""
     if not family.section_name:
         raise HTTPException(
@@ -39,137 +85,150 @@ async def create_family(family: FamiliaCreate):
 
     family_code = generate_family_code_from_name(family.name)
 
-    db = SessionLocal()
     try:
-        seccion = db.query(Section).filter(Section.name == family.section_name).first()
-        if not seccion:
+        # Nombres y códigos se resuelven en la caché de dimensiones
+        seccion_id = await dimensiones.seccion(db, family.section_name)
+        if seccion_id is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"La sección con el nombre {family.section_name} no existe.",
             )
 
-        if db.query(Family).filter(Family.cod == family_code).first():
+        if await dimensiones.familia(db, cod=family_code) is not None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="El código de la familia generado ya existe.",
             )
 
-        new_family = Family(name=family.name, cod=family_code, section_id=seccion.id)
+        new_family = Family(name=family.name, cod=family_code, section_id=seccion_id)
         db.add(new_family)
-        db.commit()
-        db.refresh(new_family)
+        await db.flush()
+        await cache_catalogo.incrementar(db)
+        await registrar_cambios(db, FAMILIA, [new_family.id])
+        await db.commit()
+        dimensiones.invalidar()
 
         # Devolver el objeto con la información actualizada, incluido el section_name
         return FamiliaResponse(
             id=new_family.id,
             cod=new_family.cod,
             name=new_family.name,
-            section_name=seccion.name,  # Aquí asignamos el nombre de la sección del objeto sección
+            section_name=family.section_name,
         )
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         ) from e
-    finally:
-        db.close()
 
 
 # Actualizar una familia existente
 @Familia.put(
     "/families/by-name/{family_name}", response_model=FamiliaResponse
 )  # Actualización por nombre
-async def update_family_by_name(family_name: str, family_update: FamiliaUpdate):
+async def update_family_by_name(
+    family_name: str, family_update: FamiliaUpdate, db: AsyncSession = Depends(get_db)
+):
     """update an existing family by name"""
-    db = SessionLocal()
     try:
         # Buscar la familia existente por nombre
-        existing_family = db.query(Family).filter(Family.name == family_name).first()
-        if not existing_family:
+        familia_id = await dimensiones.familia(db, family_name)
+        if familia_id is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"La familia con el nombre {family_name} no existe.",
             )
+        cod, name, seccion_id = await dimensiones.datos_familia(db, familia_id)
 
         # Actualizar la familia basándose en los datos proporcionados
+        valores = {}
         if family_update.name:
-            existing_family.name = family_update.name
-            existing_family.cod = generate_family_code_from_name(family_update.name)
+            name = valores["name"] = family_update.name
+            cod = valores["cod"] = generate_family_code_from_name(family_update.name)
 
         if family_update.section_name:
-            seccion = (
-                db.query(Section)
-                .filter(Section.name == family_update.section_name)
-                .first()
-            )
-            if not seccion:
+            seccion_id = await dimensiones.seccion(db, family_update.section_name)
+            if seccion_id is None:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"La sección con el nombre {family_update.section_name} no existe.",
                 )
-            existing_family.section_id = seccion.id
-
-        db.commit()
-        db.refresh(existing_family)
-
-        return FamiliaResponse(
-            id=existing_family.id,
-            cod=existing_family.cod,
-            name=existing_family.name,
-            section_name=(
-                seccion.name
-                if family_update.section_name
-                else existing_family.section.name
-            ),
-        )
+            valores["section_id"] = seccion_id
+            seccion = family_update.section_name
+        else:
+            datos_seccion = await dimensiones.datos_seccion(db, seccion_id)
+            seccion = datos_seccion[1] if datos_seccion else None
+
+        if valores:
+            await db.execute(
+                update(Family).where(Family.id == familia_id).values(**valores)
+            )
+        await refrescar(db, familias=[familia_id])
+        await cache_catalogo.incrementar(db)
+        await registrar_cambios(db, FAMILIA, [familia_id])
+        await db.commit()
+        dimensiones.invalidar()
+        cache_codigos.limpiar()
+
+        return FamiliaResponse(id=familia_id, cod=cod, name=name, section_name=seccion)
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         ) from e
-    finally:
-        db.close()
 
 
 # Eliminar una familia
 @Familia.delete("/families/{family_id}")
-async def delete_family(family_id: int):
+async def delete_family(
+    family_id: int,
+    articulos: ModoBaja = DESVINCULAR,
+    destino: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
     """delete an existing family"""
-    db = SessionLocal()
-    family = db.query(Family).get(family_id)
-    if family is None:
+    if await db.get(Family, family_id) is None:
         raise HTTPException(status_code=404, detail="Family not found")
-    db.delete(family)
-    db.commit()
-    return {"message": "Family deleted"}
+    conteo = await dar_de_baja_familias(db, [family_id], articulos, destino)
+    return {"message": "Family deleted", **conteo}
 
 
 # Eliminar una familia por nombre
 @Familia.delete(
     "/families/by-name/{family_name}", status_code=status.HTTP_204_NO_CONTENT
 )
-async def delete_family_by_name(family_name: str):
+async def delete_family_by_name(
+    family_name: str,
+    articulos: ModoBaja = DESVINCULAR,
+    destino: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
     """delete an existing family by name"""
-    db = SessionLocal()
     try:
-        # Buscar la familia existente por nombre
-        existing_family = db.query(Family).filter(Family.name == family_name).first()
-        if not existing_family:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"La familia con el nombre '{family_name}' no existe.",
-            )
-
-        # Eliminar la familia encontrada
-        db.delete(existing_family)
-        db.commit()
+        familia_ids = await resolver_familias(db, nombres=[family_name])
+        await dar_de_baja_familias(db, familia_ids, articulos, destino)
 
         # Retornar una respuesta vacía
         return Response(status_code=status.HTTP_204_NO_CONTENT)
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         ) from e
-    finally:
-        db.close()
+
+
+# Eliminar varias familias con sus artículos
+@Familia.post("/families/bulk-delete", response_model=BajaFamiliasResponse)
+async def bulk_delete_families(baja: BajaFamilias, db: AsyncSession = Depends(get_db)):
+    """delete many families, unlinking, moving or deleting their articles"""
+    familia_ids = await resolver_familias(db, baja.ids, baja.names)
+    return await dar_de_baja_familias(db, familia_ids, baja.articulos, baja.destino)
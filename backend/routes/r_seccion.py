@@ -1,94 +1,151 @@
 """ Rutas para el CRUD de secciones """
 
-from fastapi import APIRouter, HTTPException
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.m_seccion import Section
-from ..config.db import SessionLocal
-from ..schemas.sch_seccion import SeccionCreate, SeccionUpdate
+from ..config.db import get_db
+from ..config.replicas import get_db_lectura
+from ..schemas.sch_seccion import (
+    BajaSecciones,
+    BajaSeccionesResponse,
+    SeccionCreate,
+    SeccionUpdate,
+)
+from ..services.bajas import (
+    DESVINCULAR,
+    dar_de_baja_secciones,
+    resolver_secciones,
+)
+from ..services.cache_codigos import cache_codigos
+from ..services.cambios import SECCION, registrar_cambios
+from ..services.catalogo_plano import refrescar
+from ..services.dimensiones import dimensiones
+from ..services.version_catalogo import cache_catalogo, responder_con_cache
 
 Seccion = APIRouter()
 
+# Qué hacer con las familias de una sección eliminada
+ModoBaja = Literal["desvincular", "reasignar", "eliminar"]
+
 """ Sección: Sección de un curso """
 
 
 # Obtener todas las secciones
 @Seccion.get("/sections")
-async def get_sections():
+async def get_sections(request: Request, db: AsyncSession = Depends(get_db_lectura)):
     """get all sections"""
-    db = SessionLocal()
-    sections = db.query(Section).all()
-    return {"sections": sections}
+
+    async def construir():
+        filas = await db.execute(
+            select(Section.id, Section.cod, Section.name).order_by(Section.id)
+        )
+        return {"sections": [dict(fila._mapping) for fila in filas]}
+
+    return await responder_con_cache(request, db, "sections", construir)
 
 
 # Crear una nueva sección
 @Seccion.post("/sections", response_model=SeccionCreate)
-async def create_section(section: SeccionCreate):
+async def create_section(section: SeccionCreate, db: AsyncSession = Depends(get_db)):
     """create a new section"""
-    with SessionLocal() as db:
-        # Generar el código corto
-        short_code = section.nombre[:4].upper()
+    # Generar el código corto
+    short_code = section.nombre[:4].upper()
 
-        new_section = Section(name=section.nombre, cod=short_code)
-        db.add(new_section)
-        db.commit()
-        db.refresh(new_section)
-        return section
+    new_section = Section(name=section.nombre, cod=short_code)
+    db.add(new_section)
+    await db.flush()
+    await cache_catalogo.incrementar(db)
+    await registrar_cambios(db, SECCION, [new_section.id])
+    await db.commit()
+    dimensiones.invalidar()
+    return section
 
 
 # Actualizar una sección existente
 @Seccion.put("/sections/{section_id}", response_model=SeccionUpdate)
-async def update_section(section_id: int, section: SeccionUpdate):
+async def update_section(
+    section_id: int, section: SeccionUpdate, db: AsyncSession = Depends(get_db)
+):
     """update an existing section"""
-    db = SessionLocal()
-    db_section = db.query(Section).get(section_id)
+    db_section = await db.get(Section, section_id)
     if db_section is None:
         raise HTTPException(status_code=404, detail="Section not found")
     db_section.name = section.nombre if section.nombre else db_section.name
     # Generar el nuevo código si el nombre ha cambiado
     if section.nombre:
         db_section.cod = section.nombre[:4].upper()
-    db.commit()
-    db.refresh(db_section)
+    await refrescar(db, secciones=[db_section.id])
+    await cache_catalogo.incrementar(db)
+    await registrar_cambios(db, SECCION, [db_section.id])
+    await db.commit()
+    dimensiones.invalidar()
+    cache_codigos.limpiar()
     return SeccionUpdate(nombre=db_section.name, cod=db_section.cod)
 
 
 # Actualizar una sección existente por nombre
 @Seccion.put("/sections/by-name/{section_name}", response_model=SeccionUpdate)
-async def update_section_by_name(section_name: str, section: SeccionUpdate):
+async def update_section_by_name(
+    section_name: str, section: SeccionUpdate, db: AsyncSession = Depends(get_db)
+):
     """update an existing section by name"""
-    db = SessionLocal()
-    db_section = db.query(Section).filter(Section.name == section_name).first()
-    if db_section is None:
+    section_id = await dimensiones.seccion(db, section_name)
+    if section_id is None:
         raise HTTPException(status_code=404, detail="Section not found")
-    db_section.name = section.nombre if section.nombre else db_section.name
+    cod, nombre = await dimensiones.datos_seccion(db, section_id)
     # Generar el nuevo código si el nombre ha cambiado
     if section.nombre:
-        db_section.cod = section.nombre[:4].upper()
-    db.commit()
-    db.refresh(db_section)
-    return SeccionUpdate(nombre=db_section.name, cod=db_section.cod)
+        nombre, cod = section.nombre, section.nombre[:4].upper()
+        await db.execute(
+            update(Section).where(Section.id == section_id).values(name=nombre, cod=cod)
+        )
+    await refrescar(db, secciones=[section_id])
+    await cache_catalogo.incrementar(db)
+    await registrar_cambios(db, SECCION, [section_id])
+    await db.commit()
+    dimensiones.invalidar()
+    cache_codigos.limpiar()
+    return SeccionUpdate(nombre=nombre, cod=cod)
 
 
 # Eliminar una sección
 @Seccion.delete("/sections/{section_id}")
-async def delete_section(section_id: int):
+async def delete_section(
+    section_id: int,
+    familias: ModoBaja = DESVINCULAR,
+    destino: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
     """delete an existing section"""
-    db = SessionLocal()
-    section = db.query(Section).get(section_id)
-    if section is None:
+    if await db.get(Section, section_id) is None:
         raise HTTPException(status_code=404, detail="Section not found")
-    db.delete(section)
-    db.commit()
-    return {"message": "Section deleted"}
+    # Por defecto sus familias quedan sin sección
+    conteo = await dar_de_baja_secciones(db, [section_id], familias, destino)
+    return {"message": "Section deleted", **conteo}
 
 
 # Eliminar una sección por nombre
 @Seccion.delete("/sections/by-name/{section_name}")
-async def delete_section_by_name(section_name: str):
+async def delete_section_by_name(
+    section_name: str,
+    familias: ModoBaja = DESVINCULAR,
+    destino: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
     """delete an existing section by name"""
-    db = SessionLocal()
-    section = db.query(Section).filter(Section.name == section_name).first()
-    if section is None:
+    section_id = await dimensiones.seccion(db, section_name)
+    if section_id is None:
         raise HTTPException(status_code=404, detail="Section not found")
-    db.delete(section)
-    db.commit()
-    return {"message": "Section deleted"}
+    conteo = await dar_de_baja_secciones(db, [section_id], familias, destino)
+    return {"message": "Section deleted", **conteo}
+
+
+# Eliminar varias secciones con sus familias
+@Seccion.post("/sections/bulk-delete", response_model=BajaSeccionesResponse)
+async def bulk_delete_sections(baja: BajaSecciones, db: AsyncSession = Depends(get_db)):
+    """delete many sections, unlinking, moving or deleting their families"""
+    seccion_ids = await resolver_secciones(db, baja.ids, baja.names)
+    return await dar_de_baja_secciones(db, seccion_ids, baja.familias, baja.destino)
@@ -0,0 +1,65 @@
+""" Rutas de diagnóstico del servicio """
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..config.db import get_engine
+from ..config.metricas import metricas
+from ..config.monitor import monitor_pool, rastreador_sesiones
+from ..config.replicas import replicas
+
+Sistema = APIRouter()
+
+
+# Estado del pool de conexiones
+@Sistema.get("/debug/pool")
+async def get_pool_stats(umbral: float = 5.0):
+    """Métricas del pool y, en modo DB_LEAK_DEBUG, las sesiones sin devolver"""
+    datos = monitor_pool.stats(get_engine().pool, umbral=umbral)
+    datos["leak_debug"] = rastreador_sesiones.activo
+    if rastreador_sesiones.activo:
+        datos["sesiones_abiertas"] = rastreador_sesiones.abiertas(umbral)
+        datos["sesiones_perdidas"] = rastreador_sesiones.fugas
+    return datos
+
+
+# Métricas en formato Prometheus
+@Sistema.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Latencia, sentencias SQL y tiempo en base de datos por ruta, y el pool"""
+    pool = monitor_pool.stats(get_engine().pool)
+    gauges = {
+        "db_pool_checked_out": ("Conexiones prestadas.", pool["prestadas"]),
+        "db_pool_connections_created": (
+            "Conexiones abiertas desde el arranque.",
+            pool["conexiones_creadas"],
+        ),
+    }
+    if "pool_size" in pool:
+        gauges["db_pool_size"] = ("Tamaño del pool.", pool["pool_size"])
+        gauges["db_pool_overflow"] = ("Conexiones de desborde.", pool["pool_overflow"])
+    if replicas.replicas:
+        gauges["db_replicas_healthy"] = (
+            "Réplicas de lectura en servicio.",
+            sum(replica["sana"] for replica in replicas.stats()),
+        )
+    return PlainTextResponse(
+        metricas.exportar(gauges), media_type="text/plain; version=0.0.4"
+    )
+
+
+# Estado de las réplicas de lectura
+@Sistema.get("/debug/replicas")
+async def get_replicas():
+    """Réplicas configuradas, su última comprobación y conexiones prestadas"""
+    return {"replicas": replicas.stats()}
+
+
+# Últimas sentencias SQL lentas
+@Sistema.get("/debug/sql-lentas")
+async def get_sentencias_lentas():
+    """Últimas sentencias que superaron SLOW_SQL_MS, con su ruta"""
+    return {
+        "umbral_ms": metricas.umbral_lenta * 1000,
+        "sentencias": list(metricas.ultimas_lentas),
+    }
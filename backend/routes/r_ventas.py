@@ -0,0 +1,82 @@
+""" Rutas de ingesta de ventas de los terminales """
+
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config.db import get_db
+from ..schemas.sch_venta import IngestaResponse, TicketsLote
+from ..services.ventas import articulos_inexistentes, buffer_ventas
+
+Ventas = APIRouter()
+
+# Segundos que el terminal debe esperar si el buffer está lleno
+REINTENTAR_EN = 1
+
+
+def _fecha_utc(fecha) -> datetime:
+    """Fecha sin zona horaria, en UTC; la de recepción si no se envía."""
+    if fecha is None:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    if fecha.tzinfo is not None:
+        return fecha.astimezone(timezone.utc).replace(tzinfo=None)
+    return fecha
+
+
+# Recibir tickets de venta
+@Ventas.post(
+    "/ventas/tickets",
+    response_model=IngestaResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def ingest_tickets(lote: TicketsLote, db: AsyncSession = Depends(get_db)):
+    """Aceptar tickets completos y dejarlos en el buffer de escritura.
+
+    La respuesta 202 indica que los tickets se escribirán en el próximo lote.
+    Con el buffer lleno se responde 503 con Retry-After y el terminal debe
+    reenviar los mismos tickets.
+    """
+    inexistentes = await articulos_inexistentes(
+        db, {linea.articulo_id for ticket in lote.tickets for linea in ticket.lineas}
+    )
+    # Se devuelve la conexión antes de responder: el buffer no la necesita
+    await db.commit()
+    if inexistentes:
+        raise HTTPException(
+            status_code=422, detail=f"Artículos inexistentes: {inexistentes}"
+        )
+
+    tickets = []
+    for ticket in lote.tickets:
+        lineas = [
+            (
+                linea.articulo_id,
+                linea.cantidad,
+                linea.precio,
+                round(linea.cantidad * linea.precio, 2),
+            )
+            for linea in ticket.lineas
+        ]
+        total = round(sum(linea[3] for linea in lineas), 2)
+        tickets.append(
+            (ticket.terminal, ticket.numero, _fecha_utc(ticket.fecha), total, lineas)
+        )
+    if not buffer_ventas.agregar(tickets):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Buffer de ventas lleno, reintentar",
+            headers={"Retry-After": str(REINTENTAR_EN)},
+        )
+    return IngestaResponse(
+        tickets=len(tickets),
+        lineas=sum(len(ticket[4]) for ticket in tickets),
+        pendientes=buffer_ventas.pendientes,
+    )
+
+
+# Estado del buffer de ventas
+@Ventas.get("/ventas/buffer")
+async def get_buffer_ventas():
+    """Líneas pendientes de escribir y contadores de lotes, rechazos y errores"""
+    return buffer_ventas.stats()
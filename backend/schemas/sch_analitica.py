@@ -0,0 +1,61 @@
+"""Esquemas de los informes de márgenes y precios."""
+
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class ResumenMargen(BaseModel):
+    """Margen sobre el precio sin impuesto, en porcentaje."""
+
+    articulos: int  # Artículos con precio de compra y de venta
+    promedio: Optional[float]
+    min: Optional[float]
+    max: Optional[float]
+
+
+class ResumenPrecio(BaseModel):
+    """Precio de venta con impuesto y artículos por tramo de precio."""
+
+    articulos: int  # Artículos con precio de venta
+    promedio: Optional[float]
+    min: Optional[float]
+    max: Optional[float]
+    distribucion: List[int]  # Un valor por tramo, uno más que `tramos`
+
+
+class MargenesFamilia(BaseModel):
+    """Agregados de los artículos de una familia."""
+
+    id: Optional[int]
+    cod: Optional[str]
+    name: Optional[str]
+    section_id: Optional[int]
+    section_name: Optional[str]
+    articulos: int
+    margen: ResumenMargen
+    precio_con_impuesto: ResumenPrecio
+
+
+class MargenesSeccion(BaseModel):
+    """Agregados de los artículos de las familias de una sección."""
+
+    id: Optional[int]
+    cod: Optional[str]
+    name: Optional[str]
+    articulos: int
+    margen: ResumenMargen
+    precio_con_impuesto: ResumenPrecio
+
+
+class MargenesFamiliasResponse(BaseModel):
+    """Informe por familia con los límites de los tramos de precio."""
+
+    tramos: List[float]
+    familias: List[MargenesFamilia]
+
+
+class MargenesSeccionesResponse(BaseModel):
+    """Informe por sección con los límites de los tramos de precio."""
+
+    tramos: List[float]
+    secciones: List[MargenesSeccion]
@@ -1,7 +1,12 @@
 """ Esquema de Articulo. """
 
-from typing import Optional, List
-from pydantic import BaseModel
+from typing import Literal, Optional, List
+from pydantic import BaseModel, Field, model_validator
+
+# Máximo de códigos que se resuelven en una sola petición
+MAX_CODIGOS_LOTE = 5000
+# Máximo de códigos cortos que se pueden repreciar por lista
+MAX_COD_SHORT_AJUSTE = 50000
 
 
 class CodigoBarraBase(BaseModel):
@@ -9,6 +14,11 @@ class CodigoBarraBase(BaseModel):
 
     codigos_barras: Optional[str]
 
+    class Config:
+        """Configuración del esquema."""
+
+        from_attributes = True
+
 
 class CodigoBarraCreate(CodigoBarraBase):
     """Modelo para crear un nuevo código de barras."""
@@ -63,9 +73,9 @@ class Articulo(ArticuloBase):
     """Modelo completo para el manejo de los artículos"""
 
     id: int
-    family_id: (
-        int  # Mantener el ID de la familia en la respuesta para referencias internas
-    )
+    # Mantener el ID de la familia en la respuesta para referencias internas;
+    # es nulo si se dio de baja la familia sin mover sus artículos
+    family_id: Optional[int] = None
 
     class Config:
         """Configuración del esquema."""
@@ -77,3 +87,71 @@ class ArticulosResponse(BaseModel):
     """Modelo de respuesta para obtener una lista de artículos."""
 
     articulos: List[Articulo]
+    next_cursor: Optional[str] = None  # Cursor para pedir la página siguiente
+
+
+class CodigosLote(BaseModel):
+    """Modelo para resolver varios códigos de barras a la vez."""
+
+    codigos: List[str] = Field(max_length=MAX_CODIGOS_LOTE)
+
+
+class CodigoResuelto(BaseModel):
+    """Código de barras junto con el artículo al que pertenece."""
+
+    codigo_barra: str
+    articulo: Articulo
+
+
+class CodigosLoteResponse(BaseModel):
+    """Modelo de respuesta de la resolución en lote, en el orden recibido."""
+
+    encontrados: List[CodigoResuelto]
+    desconocidos: List[str]
+
+
+class AjustePrecios(BaseModel):
+    """Cambio de precios para una familia, una sección o una lista de códigos cortos."""
+
+    family_name: Optional[str] = None
+    section_name: Optional[str] = None
+    cod_shorts: Optional[List[str]] = Field(
+        default=None, max_length=MAX_COD_SHORT_AJUSTE
+    )
+    campo: Literal["sale_price", "purchase_price", "ambos"] = "sale_price"
+    tipo: Literal["porcentaje", "monto"]
+    valor: float  # Porcentaje (10 = +10 %) o monto a sumar; negativo para bajar
+    redondeo: Optional[float] = Field(
+        default=None, gt=0
+    )  # Múltiplo al que se redondea, p. ej. 0.10
+    margen_minimo: Optional[float] = Field(
+        default=None, ge=0
+    )  # sale_price >= purchase_price * (1 + margen_minimo)
+    dry_run: bool = False
+
+    @model_validator(mode="after")
+    def un_solo_filtro(self):
+        """Exigir exactamente uno de family_name, section_name o cod_shorts."""
+        filtros = [self.family_name, self.section_name, self.cod_shorts]
+        if sum(filtro is not None for filtro in filtros) != 1:
+            raise ValueError(
+                "Indique exactamente uno de family_name, section_name o cod_shorts"
+            )
+        return self
+
+
+class ImpactoPrecio(BaseModel):
+    """Suma de un precio antes y después del ajuste."""
+
+    antes: float
+    despues: float
+
+
+class AjustePreciosResponse(BaseModel):
+    """Impacto agregado de un ajuste de precios."""
+
+    articulos: int
+    sale_price: ImpactoPrecio
+    purchase_price: ImpactoPrecio
+    ajustados_por_margen: int  # Artículos cuyo precio de venta subió al mínimo
+    aplicado: bool
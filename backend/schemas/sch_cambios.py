@@ -0,0 +1,58 @@
+"""Esquemas del registro de cambios (sincronización incremental)."""
+
+from typing import List, Optional
+from pydantic import BaseModel
+
+from .sch_articulo import Articulo
+
+
+class SeccionCambio(BaseModel):
+    """Estado actual de una sección."""
+
+    id: int
+    cod: Optional[str]
+    name: Optional[str]
+
+
+class FamiliaCambio(BaseModel):
+    """Estado actual de una familia."""
+
+    id: int
+    cod: Optional[str]
+    name: Optional[str]
+    section_id: Optional[int]
+
+
+class CambiosSecciones(BaseModel):
+    """Secciones creadas o modificadas e IDs de las eliminadas."""
+
+    upserts: List[SeccionCambio]
+    deletes: List[int]
+
+
+class CambiosFamilias(BaseModel):
+    """Familias creadas o modificadas e IDs de las eliminadas."""
+
+    upserts: List[FamiliaCambio]
+    deletes: List[int]
+
+
+class CambiosArticulos(BaseModel):
+    """Artículos creados o modificados (con sus códigos) e IDs de los eliminados."""
+
+    upserts: List[Articulo]
+    deletes: List[int]
+
+
+class CambiosResponse(BaseModel):
+    """Cambios compactados desde una versión.
+
+    `version` es la que el terminal debe enviar como `since` en la próxima
+    petición; `mas` indica que quedan cambios por pedir.
+    """
+
+    version: int
+    mas: bool
+    sections: CambiosSecciones
+    families: CambiosFamilias
+    articulos: CambiosArticulos
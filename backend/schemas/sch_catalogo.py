@@ -0,0 +1,34 @@
+"""Esquemas del catálogo plano (modelo de lectura)."""
+
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class CatalogoItem(BaseModel):
+    """Un código de barras con su artículo, familia y sección."""
+
+    codigo_barra: Optional[str]
+    articulo_id: int
+    cod_short: Optional[str]
+    name: Optional[str]
+    purchase_price: Optional[float]
+    sale_price: Optional[float]
+    und: Optional[str]
+    tax: Optional[float]
+    family_id: Optional[int]
+    family_cod: Optional[str]
+    family_name: Optional[str]
+    section_id: Optional[int]
+    section_name: Optional[str]
+
+    class Config:
+        """Configuración del esquema."""
+
+        from_attributes = True
+
+
+class CatalogoResponse(BaseModel):
+    """Página del catálogo plano."""
+
+    items: List[CatalogoItem]
+    next_cursor: Optional[str] = None
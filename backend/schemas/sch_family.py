@@ -1,7 +1,10 @@
 """Esquemas para el modelo Familia"""
 
-from typing import Optional
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field, model_validator
+
+# Máximo de familias por baja masiva
+MAX_FAMILIAS_BAJA = 10000
 
 
 class FamiliaCreate(BaseModel):
@@ -24,7 +27,7 @@ class FamiliaResponse(BaseModel):
     id: int
     cod: str
     name: str
-    section_name: str
+    section_name: Optional[str] = None  # Nula si la familia quedó sin sección
 
 
 class FamiliaUpdate(BaseModel):
@@ -33,3 +36,46 @@ class FamiliaUpdate(BaseModel):
     name: Optional[str]
     cod: Optional[str]
     section_name: Optional[str]
+
+
+class FamiliaDetalle(BaseModel):
+    """Modelo de una familia en los listados, con el nombre de su sección"""
+
+    id: int
+    cod: str
+    name: str
+    section_id: Optional[int] = None
+    section_name: Optional[str] = None
+
+
+class FamiliasResponse(BaseModel):
+    """Modelo de respuesta para obtener una lista de familias"""
+
+    families: List[FamiliaDetalle]
+
+
+class BajaFamilias(BaseModel):
+    """Familias a eliminar, por ID o por nombre, y qué hacer con sus artículos"""
+
+    ids: List[int] = Field(default=[], max_length=MAX_FAMILIAS_BAJA)
+    names: List[str] = Field(default=[], max_length=MAX_FAMILIAS_BAJA)
+    articulos: Literal["desvincular", "reasignar", "eliminar"] = "desvincular"
+    destino: Optional[str] = None  # Nombre de la familia que recibe los artículos
+
+    @model_validator(mode="after")
+    def validar(self):
+        """Exigir alguna familia, y destino solo al reasignar."""
+        if not self.ids and not self.names:
+            raise ValueError("Indique al menos una familia en ids o names")
+        if (self.articulos == "reasignar") != (self.destino is not None):
+            raise ValueError("destino es obligatorio al reasignar, y solo entonces")
+        return self
+
+
+class BajaFamiliasResponse(BaseModel):
+    """Cantidades afectadas por la baja de familias"""
+
+    familias_eliminadas: int
+    articulos_eliminados: int
+    articulos_movidos: int
+    codigos_eliminados: int
@@ -1,7 +1,10 @@
 """Esquema para el manejo de las secciones"""
 
-from typing import Optional
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field, model_validator
+
+# Máximo de secciones por baja masiva
+MAX_SECCIONES_BAJA = 1000
 
 
 class SeccionCreate(BaseModel):
@@ -21,3 +24,31 @@ class SeccionUpdate(BaseModel):
 
     nombre: Optional[str]
     cod: Optional[str]
+
+
+class BajaSecciones(BaseModel):
+    """Secciones a eliminar, por ID o por nombre, y qué hacer con sus familias"""
+
+    ids: List[int] = Field(default=[], max_length=MAX_SECCIONES_BAJA)
+    names: List[str] = Field(default=[], max_length=MAX_SECCIONES_BAJA)
+    familias: Literal["desvincular", "reasignar", "eliminar"] = "desvincular"
+    destino: Optional[str] = None  # Nombre de la sección que recibe las familias
+
+    @model_validator(mode="after")
+    def validar(self):
+        """Exigir alguna sección, y destino solo al reasignar."""
+        if not self.ids and not self.names:
+            raise ValueError("Indique al menos una sección en ids o names")
+        if (self.familias == "reasignar") != (self.destino is not None):
+            raise ValueError("destino es obligatorio al reasignar, y solo entonces")
+        return self
+
+
+class BajaSeccionesResponse(BaseModel):
+    """Cantidades afectadas por la baja de secciones"""
+
+    secciones_eliminadas: int
+    familias_eliminadas: int
+    familias_movidas: int
+    articulos_eliminados: int
+    codigos_eliminados: int
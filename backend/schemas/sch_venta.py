@@ -0,0 +1,40 @@
+"""Esquemas de la ingesta de ventas."""
+
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+# Máximo de líneas por ticket y de tickets por petición
+MAX_LINEAS_TICKET = 1000
+MAX_TICKETS_LOTE = 500
+
+
+class LineaTicket(BaseModel):
+    """Un artículo vendido: cantidad y precio unitario cobrado."""
+
+    articulo_id: int
+    cantidad: float = Field(gt=0)
+    precio: float = Field(ge=0)
+
+
+class TicketCreate(BaseModel):
+    """Ticket completo de un terminal; `fecha` es la de recepción si falta."""
+
+    terminal: str = Field(min_length=1, max_length=40)
+    numero: str = Field(min_length=1, max_length=40)
+    fecha: Optional[datetime] = None
+    lineas: List[LineaTicket] = Field(min_length=1, max_length=MAX_LINEAS_TICKET)
+
+
+class TicketsLote(BaseModel):
+    """Tickets enviados en una sola petición."""
+
+    tickets: List[TicketCreate] = Field(min_length=1, max_length=MAX_TICKETS_LOTE)
+
+
+class IngestaResponse(BaseModel):
+    """Tickets y líneas aceptados y líneas pendientes de escribir en el buffer."""
+
+    tickets: int
+    lineas: int
+    pendientes: int
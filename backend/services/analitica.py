@@ -0,0 +1,229 @@
+"""Márgenes y precios agregados por familia y por sección.
+
+El margen de un artículo es (sale_price - purchase_price) / sale_price en
+porcentaje, sobre el precio sin impuesto; el precio de venta al público es
+sale_price * (1 + tax). Los dos informes salen de una sola consulta agrupada
+por `family_id` y tramo de precio, sin joins: la base de datos recorre los
+artículos una vez y devuelve una fila por familia y tramo, que aquí se combinan
+por familia o por sección.
+
+Los informes se guardan serializados con la versión del registro de cambios
+(`cache_cambios`): cualquier cambio de precios, artículos, familias o
+secciones la incrementa y el informe se recalcula en la petición siguiente.
+"""
+
+import os
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.m_articulo import Articulo as ArticuloModel
+from ..models.m_family import Family
+from ..models.m_seccion import Section
+
+# Límites de los tramos de precio con impuesto: [0, 1), [1, 2), ... [1000, ∞)
+TRAMOS_PRECIO = tuple(
+    float(limite)
+    for limite in os.getenv(
+        "ANALYTICS_PRICE_BUCKETS", "1,2,5,10,20,50,100,200,500,1000"
+    ).split(",")
+)
+
+
+def _redondear(valor):
+    return None if valor is None else round(valor, 2)
+
+
+def _promedio(suma, cantidad):
+    return round(suma / cantidad, 2) if cantidad else None
+
+
+def _menor(actual, valor):
+    if actual is None or valor is None:
+        return valor if actual is None else actual
+    return min(actual, valor)
+
+
+def _mayor(actual, valor):
+    if actual is None or valor is None:
+        return valor if actual is None else actual
+    return max(actual, valor)
+
+
+class _Acumulado:
+    """Sumas, mínimos y máximos de un grupo, combinables entre grupos."""
+
+    __slots__ = (
+        "articulos",
+        "con_margen",
+        "suma_margen",
+        "margen_min",
+        "margen_max",
+        "con_precio",
+        "suma_precio",
+        "precio_min",
+        "precio_max",
+        "distribucion",
+    )
+
+    def __init__(self):
+        self.articulos = self.con_margen = self.con_precio = 0
+        self.suma_margen = self.suma_precio = 0.0
+        self.margen_min = self.margen_max = None
+        self.precio_min = self.precio_max = None
+        self.distribucion = [0] * (len(TRAMOS_PRECIO) + 1)
+
+    def sumar(self, otro: "_Acumulado"):
+        """Añadir los artículos de otro grupo."""
+        self.articulos += otro.articulos
+        self.con_margen += otro.con_margen
+        self.suma_margen += otro.suma_margen
+        self.margen_min = _menor(self.margen_min, otro.margen_min)
+        self.margen_max = _mayor(self.margen_max, otro.margen_max)
+        self.con_precio += otro.con_precio
+        self.suma_precio += otro.suma_precio
+        self.precio_min = _menor(self.precio_min, otro.precio_min)
+        self.precio_max = _mayor(self.precio_max, otro.precio_max)
+        for indice, cantidad in enumerate(otro.distribucion):
+            self.distribucion[indice] += cantidad
+
+    def resumen(self) -> dict:
+        """Artículos, margen y precio con impuesto, redondeados."""
+        return {
+            "articulos": self.articulos,
+            "margen": {
+                "articulos": self.con_margen,
+                "promedio": _promedio(self.suma_margen, self.con_margen),
+                "min": _redondear(self.margen_min),
+                "max": _redondear(self.margen_max),
+            },
+            "precio_con_impuesto": {
+                "articulos": self.con_precio,
+                "promedio": _promedio(self.suma_precio, self.con_precio),
+                "min": _redondear(self.precio_min),
+                "max": _redondear(self.precio_max),
+                "distribucion": self.distribucion,
+            },
+        }
+
+
+def _expresiones():
+    """Expresiones SQL (margen, precio con impuesto, tramo) por artículo."""
+    venta = ArticuloModel.sale_price
+    compra = ArticuloModel.purchase_price
+    margen = case(((venta > 0) & compra.is_not(None), (venta - compra) * 100.0 / venta))
+    precio = venta * (1 + func.coalesce(ArticuloModel.tax, 0))
+    tramo = case(
+        *((precio < limite, indice) for indice, limite in enumerate(TRAMOS_PRECIO)),
+        else_=len(TRAMOS_PRECIO),
+    )
+    return margen, precio, tramo
+
+
+async def _por_familia(db: AsyncSession) -> dict:
+    """{family_id: _Acumulado} con una consulta agrupada por familia y tramo."""
+    margen, precio, tramo = _expresiones()
+    filas = await db.execute(
+        select(
+            ArticuloModel.family_id,
+            tramo,
+            func.count(),
+            func.count(margen),
+            func.sum(margen),
+            func.min(margen),
+            func.max(margen),
+            func.count(precio),
+            func.sum(precio),
+            func.min(precio),
+            func.max(precio),
+        ).group_by(ArticuloModel.family_id, tramo)
+    )
+    acumulados = {}
+    for familia_id, indice, *valores in filas:
+        parcial = _Acumulado()
+        (
+            parcial.articulos,
+            parcial.con_margen,
+            parcial.suma_margen,
+            parcial.margen_min,
+            parcial.margen_max,
+            parcial.con_precio,
+            parcial.suma_precio,
+            parcial.precio_min,
+            parcial.precio_max,
+        ) = valores
+        parcial.suma_margen = parcial.suma_margen or 0.0
+        parcial.suma_precio = parcial.suma_precio or 0.0
+        parcial.distribucion[indice] = parcial.con_precio
+        acumulados.setdefault(familia_id, _Acumulado()).sumar(parcial)
+    return acumulados
+
+
+def _agrupar(acumulados: dict, grupo_de) -> list:
+    """[(grupo, _Acumulado)] combinando las familias por `grupo_de(family_id)`;
+    el grupo nulo va al final."""
+    grupos = {}
+    for familia_id, acumulado in acumulados.items():
+        grupos.setdefault(grupo_de(familia_id), _Acumulado()).sumar(acumulado)
+    return sorted(grupos.items(), key=lambda item: (item[0] is None, item[0] or 0))
+
+
+async def margenes_por_familia(db: AsyncSession) -> dict:
+    """Informe por familia; los artículos sin familia van en `id` nulo."""
+    acumulados = await _por_familia(db)
+    familias = {
+        fila.id: fila
+        for fila in await db.execute(
+            select(
+                Family.id,
+                Family.cod,
+                Family.name,
+                Family.section_id,
+                Section.name.label("section_name"),
+            ).outerjoin(Section, Section.id == Family.section_id)
+        )
+    }
+    informe = []
+    for familia_id, acumulado in _agrupar(
+        acumulados, lambda id_: id_ if id_ in familias else None
+    ):
+        familia = familias.get(familia_id)
+        informe.append(
+            {
+                "id": familia_id,
+                "cod": familia.cod if familia else None,
+                "name": familia.name if familia else None,
+                "section_id": familia.section_id if familia else None,
+                "section_name": familia.section_name if familia else None,
+                **acumulado.resumen(),
+            }
+        )
+    return {"tramos": list(TRAMOS_PRECIO), "familias": informe}
+
+
+async def margenes_por_seccion(db: AsyncSession) -> dict:
+    """Informe por sección; los artículos sin sección van en `id` nulo."""
+    acumulados = await _por_familia(db)
+    secciones = {
+        fila.id: fila
+        for fila in await db.execute(select(Section.id, Section.cod, Section.name))
+    }
+    seccion_de = {
+        familia_id: seccion_id
+        for familia_id, seccion_id in await db.execute(
+            select(Family.id, Family.section_id)
+        )
+        if seccion_id in secciones
+    }
+    informe = []
+    for seccion_id, acumulado in _agrupar(acumulados, seccion_de.get):
+        seccion = secciones.get(seccion_id)
+        informe.append(
+            {
+                "id": seccion_id,
+                "cod": seccion.cod if seccion else None,
+                "name": seccion.name if seccion else None,
+                **acumulado.resumen(),
+            }
+        )
+    return {"tramos": list(TRAMOS_PRECIO), "secciones": informe}
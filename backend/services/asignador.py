@@ -0,0 +1,130 @@
+"""Asignación de códigos cortos y EAN-13 por bloques reservados en la base de datos.
+
+Cada proceso reserva un bloque de números incrementando una fila de la tabla
+`contadores` en una transacción propia; el UPDATE bloquea la fila, así que dos
+procesos nunca obtienen el mismo rango. Los números del bloque se reparten
+después en memoria, sin consultas por código. Al reservar un bloque se
+descartan, con una sola consulta, los valores que ya existían (por ejemplo,
+los generados al azar antes de usar este asignador).
+"""
+
+import asyncio
+import os
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from ..config.db import SessionLocal
+from ..models.m_articulo import (
+    Articulo as ArticuloModel,
+    CodigoBarra as CodigoBarraModel,
+)
+from ..models.m_contador import Contador
+from .codigos import formatear_cod_short, formatear_ean13
+from .ean import generar_ean13
+
+TAMANO_BLOQUE = int(os.getenv("CODE_BLOCK_SIZE", "1000"))
+
+
+class CodigosAgotados(Exception):
+    """No quedan números libres en la secuencia."""
+
+
+async def reservar_bloque(nombre: str, cantidad: int) -> range:
+    """Incrementar el contador `nombre` y devolver el rango reservado."""
+    async with SessionLocal() as db:
+        for _ in range(2):
+            try:
+                async with db.begin():
+                    resultado = await db.execute(
+                        update(Contador)
+                        .where(Contador.nombre == nombre)
+                        .values(valor=Contador.valor + cantidad)
+                    )
+                    if resultado.rowcount == 0:
+                        await db.execute(
+                            insert(Contador).values(nombre=nombre, valor=cantidad)
+                        )
+                    fin = await db.scalar(
+                        select(Contador.valor).where(Contador.nombre == nombre)
+                    )
+                return range(fin - cantidad, fin)
+            except IntegrityError:
+                # Otro proceso creó el contador a la vez; se reintenta el UPDATE
+                continue
+    raise RuntimeError(f"No se pudo reservar un bloque del contador {nombre}")
+
+
+class Asignador:
+    """Reparte números de una secuencia reservándolos por bloques."""
+
+    def __init__(self, nombre: str, maximo: int, formatear, ocupados, lote=None):
+        self.nombre = nombre
+        self.maximo = maximo
+        self.formatear = formatear
+        self.ocupados = ocupados
+        self.formatear_lote = lote  # Formatea una lista de números de una vez
+        self._libres = []
+        self._lock = None
+
+    async def siguientes(self, cantidad: int) -> list:
+        """Devolver `cantidad` códigos nuevos y sin usar."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while len(self._libres) < cantidad:
+                bloque = await reservar_bloque(
+                    self.nombre, max(TAMANO_BLOQUE, cantidad - len(self._libres))
+                )
+                if bloque.start >= self.maximo:
+                    raise CodigosAgotados(self.nombre)
+                bloque = range(bloque.start, min(bloque.stop, self.maximo))
+                tomados = await self.ocupados(bloque)
+                self._libres.extend(n for n in bloque if n not in tomados)
+            codigos, self._libres = self._libres[:cantidad], self._libres[cantidad:]
+        if self.formatear_lote is not None:
+            return self.formatear_lote(codigos)
+        return [self.formatear(n) for n in codigos]
+
+    async def siguiente(self) -> str:
+        """Devolver un código nuevo."""
+        return (await self.siguientes(1))[0]
+
+
+async def _cod_short_ocupados(bloque: range) -> set:
+    async with SessionLocal() as db:
+        existentes = await db.scalars(
+            select(ArticuloModel.cod_short).where(
+                ArticuloModel.cod_short.between(
+                    formatear_cod_short(bloque.start),
+                    formatear_cod_short(bloque.stop - 1),
+                )
+            )
+        )
+        return {int(codigo) for codigo in existentes if codigo.isdigit()}
+
+
+async def _ean13_ocupados(bloque: range) -> set:
+    async with SessionLocal() as db:
+        existentes = await db.scalars(
+            select(CodigoBarraModel.codigos_barras).where(
+                CodigoBarraModel.codigos_barras.between(
+                    formatear_ean13(bloque.start)[:12] + "0",
+                    formatear_ean13(bloque.stop - 1)[:12] + "9",
+                )
+            )
+        )
+        # El número de secuencia son los 9 dígitos tras el prefijo
+        return {
+            int(codigo[3:12])
+            for codigo in existentes
+            if len(codigo) == 13 and codigo.isdigit()
+        }
+
+
+asignador_cod_short = Asignador(
+    "cod_short", 10**6, formatear_cod_short, _cod_short_ocupados
+)
+asignador_ean13 = Asignador(
+    "ean13", 10**9, formatear_ean13, _ean13_ocupados, lote=generar_ean13
+)
@@ -0,0 +1,288 @@
+"""Bajas masivas de familias y secciones con sentencias por conjuntos.
+
+Al dar de baja familias o secciones sus dependientes se desvinculan (quedan
+sin familia o sin sección), se reasignan a un destino o se eliminan en
+cascada: secciones → familias → artículos → códigos de barras. Cada paso es un
+DELETE o UPDATE sobre el conjunto completo, filtrado por subconsulta, dentro
+de una sola transacción; la cantidad de sentencias no depende de la cantidad
+de artículos. `catalogo_plano`, el índice de búsqueda y el registro de cambios
+se actualizan en la misma transacción.
+
+No se eliminan artículos con ventas registradas: la baja responde 409 y no
+cambia nada.
+"""
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.m_articulo import (
+    Articulo as ArticuloModel,
+    CodigoBarra as CodigoBarraModel,
+)
+from ..models.m_catalogo import CatalogoPlano
+from ..models.m_family import Family
+from ..models.m_seccion import Section
+from ..models.m_venta import TicketLinea
+from .busqueda import desindexar_articulos
+from .cache_codigos import cache_codigos
+from .cambios import ARTICULO, FAMILIA, SECCION, registrar_cambios
+from .dimensiones import dimensiones
+from .indice_codigos import indice_codigos
+from .version_catalogo import cache_catalogo
+
+# Qué hacer con los dependientes de lo que se da de baja
+DESVINCULAR = "desvincular"
+REASIGNAR = "reasignar"
+ELIMINAR = "eliminar"
+
+
+def _sin_sincronizar(sentencia):
+    """Sentencia masiva que no recorre los objetos cargados en la sesión."""
+    return sentencia.execution_options(synchronize_session=False)
+
+
+async def resolver_familias(db: AsyncSession, ids=(), nombres=()) -> list:
+    """IDs de las familias indicadas por ID o por nombre; 404 si falta alguna."""
+    ids, nombres = set(ids), set(nombres)
+    encontradas = set()
+    if ids:
+        existentes = set(await db.scalars(select(Family.id).where(Family.id.in_(ids))))
+        if ids - existentes:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Familias inexistentes: {sorted(ids - existentes)}",
+            )
+        encontradas |= existentes
+    if nombres:
+        por_nombre = await dimensiones.familias(db, nombres)
+        faltan = nombres - por_nombre.keys()
+        if faltan:
+            raise HTTPException(
+                status_code=404, detail=f"Familias inexistentes: {sorted(faltan)}"
+            )
+        encontradas |= set(por_nombre.values())
+    return sorted(encontradas)
+
+
+async def resolver_secciones(db: AsyncSession, ids=(), nombres=()) -> list:
+    """IDs de las secciones indicadas por ID o por nombre; 404 si falta alguna."""
+    ids, nombres = set(ids), set(nombres)
+    encontradas = set()
+    if ids:
+        existentes = set(
+            await db.scalars(select(Section.id).where(Section.id.in_(ids)))
+        )
+        if ids - existentes:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Secciones inexistentes: {sorted(ids - existentes)}",
+            )
+        encontradas |= existentes
+    if nombres:
+        por_nombre = await dimensiones.secciones(db, nombres)
+        faltan = nombres - por_nombre.keys()
+        if faltan:
+            raise HTTPException(
+                status_code=404, detail=f"Secciones inexistentes: {sorted(faltan)}"
+            )
+        encontradas |= set(por_nombre.values())
+    return sorted(encontradas)
+
+
+async def _destino(db: AsyncSession, buscar, nombre, dados_de_baja: list):
+    """ID del destino de una reasignación, resuelto con `buscar(db, nombre)`;
+    404 si no existe, 400 si falta o si también se da de baja."""
+    if nombre is None:
+        raise HTTPException(status_code=400, detail="Indique el destino al reasignar")
+    destino_id = await buscar(db, nombre)
+    if destino_id is None:
+        raise HTTPException(status_code=404, detail=f"Destino inexistente: {nombre}")
+    if destino_id in dados_de_baja:
+        raise HTTPException(
+            status_code=400, detail="El destino no puede ser uno de los eliminados"
+        )
+    return destino_id
+
+
+async def eliminar_articulos(db: AsyncSession, condicion) -> tuple:
+    """Eliminar los artículos que cumplen `condicion` con sus códigos de barras,
+    sus términos de búsqueda y sus filas planas.
+
+    Devuelve (ids de artículo, códigos de barras eliminados); 409 si alguno
+    tiene ventas.
+    """
+    articulo_ids = select(ArticuloModel.id).where(condicion)
+    if await db.scalar(
+        select(TicketLinea.id).where(TicketLinea.articulo_id.in_(articulo_ids)).limit(1)
+    ):
+        raise HTTPException(
+            status_code=409,
+            detail="Hay artículos con ventas registradas; reasígnelos en lugar de eliminarlos",
+        )
+    ids = (await db.scalars(articulo_ids)).all()
+    codigos = (
+        await db.scalars(
+            select(CodigoBarraModel.codigos_barras).where(
+                CodigoBarraModel.articulo_id.in_(articulo_ids)
+            )
+        )
+    ).all()
+    await desindexar_articulos(db, articulo_ids)
+    await db.execute(
+        _sin_sincronizar(
+            delete(CodigoBarraModel).where(
+                CodigoBarraModel.articulo_id.in_(articulo_ids)
+            )
+        )
+    )
+    await db.execute(
+        _sin_sincronizar(
+            delete(CatalogoPlano).where(CatalogoPlano.articulo_id.in_(articulo_ids))
+        )
+    )
+    await db.execute(_sin_sincronizar(delete(ArticuloModel).where(condicion)))
+    return ids, codigos
+
+
+async def _mover_articulos(db: AsyncSession, familia_ids: list, destino_id):
+    """Pasar los artículos de `familia_ids` a la familia `destino_id` (o a
+    ninguna) y copiar la familia y la sección nuevas a sus filas planas."""
+    await db.execute(
+        _sin_sincronizar(
+            update(ArticuloModel)
+            .where(ArticuloModel.family_id.in_(familia_ids))
+            .values(family_id=destino_id)
+        )
+    )
+    valores = dict.fromkeys(
+        ("family_id", "family_cod", "family_name", "section_id", "section_name")
+    )
+    if destino_id is not None:
+        fila = (
+            await db.execute(
+                select(
+                    Family.id,
+                    Family.cod,
+                    Family.name,
+                    Family.section_id,
+                    Section.name,
+                )
+                .outerjoin(Section, Section.id == Family.section_id)
+                .where(Family.id == destino_id)
+            )
+        ).one()
+        valores = dict(zip(valores, fila))
+    await db.execute(
+        _sin_sincronizar(
+            update(CatalogoPlano)
+            .where(CatalogoPlano.family_id.in_(familia_ids))
+            .values(**valores)
+        )
+    )
+
+
+async def _confirmar(db: AsyncSession, articulos: tuple, cambios: list) -> None:
+    """Registrar los cambios, confirmar e invalidar las cachés de dimensiones
+    y de códigos.
+    `articulos` es (ids, eliminados)."""
+    await cache_catalogo.incrementar(db)
+    ids, eliminados = articulos
+    if ids:
+        await registrar_cambios(db, ARTICULO, ids, eliminado=eliminados)
+    for entidad, entidad_ids, eliminado in cambios:
+        if entidad_ids:
+            await registrar_cambios(db, entidad, entidad_ids, eliminado=eliminado)
+    await db.commit()
+    dimensiones.invalidar()
+    cache_codigos.limpiar()
+
+
+async def dar_de_baja_familias(
+    db: AsyncSession, familia_ids: list, articulos: str = DESVINCULAR, destino=None
+) -> dict:
+    """Eliminar las familias y desvincular, reasignar a la familia `destino` o
+    eliminar sus artículos; confirma y devuelve las cantidades afectadas."""
+    destino_id = None
+    if articulos == REASIGNAR:
+        destino_id = await _destino(db, dimensiones.familia, destino, familia_ids)
+    de_familias = ArticuloModel.family_id.in_(familia_ids)
+    codigos = []
+    if articulos == ELIMINAR:
+        articulo_ids, codigos = await eliminar_articulos(db, de_familias)
+    else:
+        articulo_ids = (
+            await db.scalars(select(ArticuloModel.id).where(de_familias))
+        ).all()
+        await _mover_articulos(db, familia_ids, destino_id)
+    await db.execute(_sin_sincronizar(delete(Family).where(Family.id.in_(familia_ids))))
+    await _confirmar(
+        db,
+        (articulo_ids, articulos == ELIMINAR),
+        [(FAMILIA, familia_ids, True)],
+    )
+    indice_codigos.quitar(codigos)
+    eliminados = len(articulo_ids) if articulos == ELIMINAR else 0
+    return {
+        "familias_eliminadas": len(familia_ids),
+        "articulos_eliminados": eliminados,
+        "articulos_movidos": len(articulo_ids) - eliminados,
+        "codigos_eliminados": len(codigos),
+    }
+
+
+async def dar_de_baja_secciones(
+    db: AsyncSession, seccion_ids: list, familias: str = DESVINCULAR, destino=None
+) -> dict:
+    """Eliminar las secciones y desvincular, reasignar a la sección `destino` o
+    eliminar sus familias, con sus artículos; confirma y devuelve las
+    cantidades afectadas."""
+    destino_id = None
+    if familias == REASIGNAR:
+        destino_id = await _destino(db, dimensiones.seccion, destino, seccion_ids)
+    de_secciones = Family.section_id.in_(seccion_ids)
+    familia_ids = (await db.scalars(select(Family.id).where(de_secciones))).all()
+    articulo_ids, codigos = [], []
+    if familias == ELIMINAR:
+        articulo_ids, codigos = await eliminar_articulos(
+            db, ArticuloModel.family_id.in_(select(Family.id).where(de_secciones))
+        )
+        await db.execute(_sin_sincronizar(delete(Family).where(de_secciones)))
+    else:
+        await db.execute(
+            _sin_sincronizar(
+                update(Family).where(de_secciones).values(section_id=destino_id)
+            )
+        )
+        seccion_nueva = None
+        if destino_id is not None:
+            seccion_nueva = await db.scalar(
+                select(Section.name).where(Section.id == destino_id)
+            )
+        await db.execute(
+            _sin_sincronizar(
+                update(CatalogoPlano)
+                .where(CatalogoPlano.section_id.in_(seccion_ids))
+                .values(section_id=destino_id, section_name=seccion_nueva)
+            )
+        )
+    await db.execute(
+        _sin_sincronizar(delete(Section).where(Section.id.in_(seccion_ids)))
+    )
+    await _confirmar(
+        db,
+        (articulo_ids, True),
+        [
+            (FAMILIA, familia_ids, familias == ELIMINAR),
+            (SECCION, seccion_ids, True),
+        ],
+    )
+    indice_codigos.quitar(codigos)
+    eliminadas = len(familia_ids) if familias == ELIMINAR else 0
+    return {
+        "secciones_eliminadas": len(seccion_ids),
+        "familias_eliminadas": eliminadas,
+        "familias_movidas": len(familia_ids) - eliminadas,
+        "articulos_eliminados": len(articulo_ids),
+        "codigos_eliminados": len(codigos),
+    }
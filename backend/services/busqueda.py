@@ -0,0 +1,127 @@
+"""Índice invertido de palabras y trigramas sobre el nombre de los artículos.
+
+Los nombres se normalizan sin tildes ni mayúsculas, de modo que "Azúcar" y
+"azucar" generan los mismos términos. Las palabras completas pesan más que
+los trigramas, que permiten encontrar fragmentos y errores de tipeo.
+"""
+
+import math
+import re
+import unicodedata
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.m_articulo import Articulo as ArticuloModel
+from ..models.m_busqueda import TerminoBusqueda
+
+PREFIJO_PALABRA = "t:"
+PREFIJO_TRIGRAMA = "g:"
+PESO_PALABRA = 3
+PESO_TRIGRAMA = 1
+
+# Fracción mínima de trigramas de la consulta que debe tener un resultado
+UMBRAL_TRIGRAMAS = 0.5
+
+_NO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+
+
+def normalizar(texto: str) -> str:
+    """Quitar tildes, pasar a minúsculas y dejar solo letras y números."""
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return _NO_ALFANUMERICO.sub(" ", sin_tildes.lower()).strip()
+
+
+def palabras(texto: str) -> list:
+    """Palabras normalizadas del texto."""
+    return normalizar(texto).split()
+
+
+def trigramas(palabra: str) -> set:
+    """Trigramas de una palabra, con un espacio de relleno a cada lado."""
+    relleno = f" {palabra} "
+    return {relleno[i : i + 3] for i in range(len(relleno) - 2)}
+
+
+def terminos(texto: str) -> set:
+    """Términos indexados para un texto: palabras y trigramas con prefijo."""
+    resultado = set()
+    for palabra in palabras(texto):
+        resultado.add(PREFIJO_PALABRA + palabra[:60])
+        resultado.update(PREFIJO_TRIGRAMA + trigrama for trigrama in trigramas(palabra))
+    return resultado
+
+
+async def desindexar_articulos(db: AsyncSession, articulo_ids):
+    """Eliminar los términos de los artículos indicados."""
+    await db.execute(
+        delete(TerminoBusqueda).where(TerminoBusqueda.articulo_id.in_(articulo_ids))
+    )
+
+
+async def indexar_articulos(db: AsyncSession, articulos, reemplazar: bool = True):
+    """Indexar pares (articulo_id, nombre) con una inserción multi-fila.
+
+    Con `reemplazar` se eliminan antes los términos previos de esos artículos.
+    No hace commit: los términos se guardan en la transacción del llamador.
+    """
+    articulos = list(articulos)
+    if not articulos:
+        return
+    if reemplazar:
+        await desindexar_articulos(db, [articulo_id for articulo_id, _ in articulos])
+    filas = [
+        {"termino": termino, "articulo_id": articulo_id}
+        for articulo_id, nombre in articulos
+        for termino in terminos(nombre)
+    ]
+    if filas:
+        await db.execute(insert(TerminoBusqueda), filas)
+
+
+async def buscar_ids(
+    db: AsyncSession, texto: str, skip: int = 0, limit: int = 50
+) -> list:
+    """Devolver los IDs de artículos que coinciden con el texto, por relevancia."""
+    consulta = terminos(texto)
+    if not consulta:
+        return []
+    total_trigramas = sum(1 for t in consulta if t.startswith(PREFIJO_TRIGRAMA))
+    minimo = max(1, math.ceil(total_trigramas * UMBRAL_TRIGRAMAS))
+    puntaje = func.sum(
+        case(
+            (TerminoBusqueda.termino.like(f"{PREFIJO_PALABRA}%"), PESO_PALABRA),
+            else_=PESO_TRIGRAMA,
+        )
+    ).label("puntaje")
+    stmt = (
+        select(TerminoBusqueda.articulo_id, puntaje)
+        .where(TerminoBusqueda.termino.in_(consulta))
+        .group_by(TerminoBusqueda.articulo_id)
+        .having(puntaje >= minimo)
+        .order_by(puntaje.desc(), TerminoBusqueda.articulo_id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(await db.scalars(stmt))
+
+
+async def reconstruir_indice(db: AsyncSession, batch_size: int = 5000):
+    """Regenerar el índice completo a partir de la tabla de artículos."""
+    await db.execute(delete(TerminoBusqueda))
+    ultimo_id = 0
+    while True:
+        lote = (
+            await db.execute(
+                select(ArticuloModel.id, ArticuloModel.name)
+                .where(ArticuloModel.id > ultimo_id)
+                .order_by(ArticuloModel.id)
+                .limit(batch_size)
+            )
+        ).all()
+        if not lote:
+            break
+        await indexar_articulos(db, lote, reemplazar=False)
+        ultimo_id = lote[-1].id
+    await db.commit()
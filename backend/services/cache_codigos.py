@@ -0,0 +1,137 @@
+"""Caché en memoria para la búsqueda de artículos por código de barras.
+
+La caché es de cada proceso. Cada entrada se guarda con la versión del
+registro de cambios (`cache_cambios`) leída antes de consultar el artículo, y
+solo se sirve mientras esa siga siendo la versión actual: un cambio de
+artículos, familias o secciones hecho en cualquier worker descarta las
+entradas en cuanto se relee la versión (CATALOG_VERSION_TTL segundos). En el
+propio proceso las escrituras además invalidan sus códigos al confirmar, y una
+lectura que empezó antes de una invalidación no guarda su resultado.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheCodigos:
+    """Caché LRU con TTL que asocia códigos de barras con artículos."""
+
+    def __init__(self, max_items: int = 10000, ttl: float = 300.0):
+        self.max_items = max_items
+        self.ttl = ttl  # Segundos
+        # codigo -> (expira, articulo_id, version, valor)
+        self._datos = OrderedDict()
+        # articulo_id -> códigos en caché, para invalidar por artículo
+        self._por_articulo = {}
+        self._lock = threading.Lock()
+        # Se incrementa con cada invalidación
+        self._generacion = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def etiqueta(self, version: int) -> tuple:
+        """Etiqueta para `set` de lo que se lea a partir de ahora con `version`."""
+        with self._lock:
+            return version, self._generacion
+
+    def get(self, codigo: str, version: int):
+        """Devolver el valor en caché para el código o None si no existe, si
+        expiró o si se guardó con otra versión del catálogo."""
+        with self._lock:
+            entrada = self._datos.get(codigo)
+            if entrada is None:
+                self.misses += 1
+                return None
+            expira, _, guardada, valor = entrada
+            if expira < time.monotonic() or guardada != version:
+                self._quitar(codigo)
+                self.misses += 1
+                return None
+            self._datos.move_to_end(codigo)
+            self.hits += 1
+            return valor
+
+    def set(
+        self, codigo: str, articulo_id: int, valor, etiqueta: tuple, ttl: float = None
+    ):
+        """Guardar el valor asociado al código de barras.
+
+        `etiqueta` es la de `etiqueta()` tomada antes de leer el valor; si
+        desde entonces hubo una invalidación, el valor puede ser anterior a
+        ella y no se guarda. `ttl` acorta la vigencia de la entrada (p. ej. si
+        se leyó de una réplica).
+        """
+        if self.max_items <= 0:
+            return
+        version, generacion = etiqueta
+        with self._lock:
+            if generacion != self._generacion:
+                return
+            if codigo in self._datos:
+                self._quitar(codigo)
+            vigencia = self.ttl if ttl is None else min(ttl, self.ttl)
+            self._datos[codigo] = (
+                time.monotonic() + vigencia,
+                articulo_id,
+                version,
+                valor,
+            )
+            self._por_articulo.setdefault(articulo_id, set()).add(codigo)
+            while len(self._datos) > self.max_items:
+                antiguo = next(iter(self._datos))
+                self._quitar(antiguo)
+                self.evictions += 1
+
+    def invalidar_codigos(self, codigos):
+        """Eliminar de la caché los códigos indicados."""
+        with self._lock:
+            self._generacion += 1
+            for codigo in codigos:
+                if codigo in self._datos:
+                    self._quitar(codigo)
+
+    def invalidar_articulo(self, articulo_id: int):
+        """Eliminar de la caché todos los códigos de un artículo."""
+        with self._lock:
+            self._generacion += 1
+            for codigo in list(self._por_articulo.get(articulo_id, ())):
+                self._quitar(codigo)
+
+    def limpiar(self):
+        """Vaciar la caché por completo."""
+        with self._lock:
+            self._generacion += 1
+            self._datos.clear()
+            self._por_articulo.clear()
+
+    def stats(self) -> dict:
+        """Contadores de uso de la caché."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._datos),
+                "max_items": self.max_items,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+    def _quitar(self, codigo: str):
+        # Debe llamarse con el lock adquirido
+        _, articulo_id, _, _ = self._datos.pop(codigo)
+        codigos = self._por_articulo.get(articulo_id)
+        if codigos is not None:
+            codigos.discard(codigo)
+            if not codigos:
+                del self._por_articulo[articulo_id]
+
+
+cache_codigos = CacheCodigos(
+    max_items=int(os.getenv("BARCODE_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("BARCODE_CACHE_TTL", "300")),
+)
@@ -0,0 +1,200 @@
+"""Registro de cambios del catálogo para la sincronización incremental.
+
+Cada transacción que modifica secciones, familias o artículos (con sus códigos
+de barras) toma una versión nueva del contador "cambios" y la escribe en la
+fila de cada entidad afectada de la tabla `cambios`. El UPDATE del contador
+bloquea su fila hasta el commit, así que las versiones se confirman en orden:
+quien lee `version > N` nunca se salta una transacción confirmada después.
+
+Ese bloqueo serializa las escrituras del catálogo, y es deliberado. Con un ID
+autoincremental cada transacción toma su número al insertar, pero se confirman
+en otro orden. Un terminal que ya leyó la 11 no pediría nunca la 10 confirmada
+después, así que perdería ese cambio. El contador se incrementa una vez por
+transacción, no por fila. Además `registrar_cambios` se llama al final, justo
+antes del commit. Así el bloqueo dura solo la escritura de las filas de
+`cambios` y el commit, y las altas masivas también pagan un único UPDATE.
+
+Como hay una sola fila por entidad, `GET /changes?since=N` devuelve el estado
+compactado: un alta o modificación seguida de una baja es solo la baja.
+
+El mismo contador versiona las cachés de datos derivados de los artículos
+(`cache_cambios`), que se descartan con cualquier cambio del catálogo.
+"""
+
+import os
+
+from sqlalchemy import Select, delete, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.m_articulo import Articulo as ArticuloModel
+from ..models.m_cambio import Cambio
+from ..models.m_contador import Contador
+from ..models.m_family import Family
+from ..models.m_seccion import Section
+from .serializacion import articulos_dict, columnas_articulo
+from .version_catalogo import CacheCatalogo
+
+NOMBRE_CONTADOR = "cambios"
+
+SECCION = "seccion"
+FAMILIA = "familia"
+ARTICULO = "articulo"
+
+# Cantidad de IDs por sentencia al registrar listas
+LOTE_REGISTRO = 5000
+
+cache_cambios = CacheCatalogo(
+    ttl=float(os.getenv("CATALOG_VERSION_TTL", "1")), contador=NOMBRE_CONTADOR
+)
+
+
+async def _version_transaccion(db: AsyncSession) -> int:
+    """Versión de la transacción en curso; se incrementa una vez por transacción."""
+    transaccion = db.sync_session.get_transaction()
+    guardada = db.info.get(NOMBRE_CONTADOR)
+    if guardada is not None and guardada[0] is transaccion:
+        return guardada[1]
+    resultado = await db.execute(
+        update(Contador)
+        .where(Contador.nombre == NOMBRE_CONTADOR)
+        .values(valor=Contador.valor + 1)
+    )
+    if resultado.rowcount == 0:
+        await db.execute(insert(Contador).values(nombre=NOMBRE_CONTADOR, valor=1))
+    version = await db.scalar(
+        select(Contador.valor).where(Contador.nombre == NOMBRE_CONTADOR)
+    )
+    db.info[NOMBRE_CONTADOR] = (transaccion, version)
+    cache_cambios.invalidar()
+    return version
+
+
+async def registrar_cambios(
+    db: AsyncSession, entidad: str, ids, eliminado: bool = False
+):
+    """Marcar las entidades `ids` como cambiadas en la transacción de `db`.
+
+    `ids` es una lista de IDs o un select de una sola columna de IDs, para
+    los cambios masivos. No hace commit.
+    """
+    version = await _version_transaccion(db)
+    filtro = Cambio.entidad == entidad
+    if isinstance(ids, Select):
+        await db.execute(delete(Cambio).where(filtro, Cambio.entidad_id.in_(ids)))
+        origen = ids.subquery()
+        await db.execute(
+            insert(Cambio).from_select(
+                ["entidad", "entidad_id", "version", "eliminado"],
+                select(
+                    literal(entidad), *origen.c, literal(version), literal(eliminado)
+                ),
+            )
+        )
+        return
+    ids = sorted(set(ids))
+    for inicio in range(0, len(ids), LOTE_REGISTRO):
+        lote = ids[inicio : inicio + LOTE_REGISTRO]
+        await db.execute(delete(Cambio).where(filtro, Cambio.entidad_id.in_(lote)))
+        await db.execute(
+            insert(Cambio),
+            [
+                {
+                    "entidad": entidad,
+                    "entidad_id": entidad_id,
+                    "version": version,
+                    "eliminado": eliminado,
+                }
+                for entidad_id in lote
+            ],
+        )
+
+
+def sentencias_registro_inicial() -> list:
+    """Registrar todas las entidades existentes en la versión 1 (migración)."""
+    sentencias = [delete(Cambio)]
+    for entidad, columna in (
+        (SECCION, Section.id),
+        (FAMILIA, Family.id),
+        (ARTICULO, ArticuloModel.id),
+    ):
+        sentencias.append(
+            insert(Cambio).from_select(
+                ["entidad", "entidad_id", "version", "eliminado"],
+                select(literal(entidad), columna, literal(1), literal(False)),
+            )
+        )
+    sentencias += [
+        delete(Contador).where(Contador.nombre == NOMBRE_CONTADOR),
+        insert(Contador).values(nombre=NOMBRE_CONTADOR, valor=1),
+    ]
+    return sentencias
+
+
+async def _secciones(db: AsyncSession, ids) -> list:
+    filas = await db.execute(
+        select(Section.id, Section.cod, Section.name).where(Section.id.in_(ids))
+    )
+    return [dict(fila._mapping) for fila in filas]
+
+
+async def _familias(db: AsyncSession, ids) -> list:
+    filas = await db.execute(
+        select(Family.id, Family.cod, Family.name, Family.section_id).where(
+            Family.id.in_(ids)
+        )
+    )
+    return [dict(fila._mapping) for fila in filas]
+
+
+async def _articulos(db: AsyncSession, ids) -> list:
+    filas = await db.execute(
+        select(*columnas_articulo()).where(ArticuloModel.id.in_(ids))
+    )
+    return await articulos_dict(db, filas)
+
+
+# Clave de la respuesta y lector del estado actual de cada entidad
+ENTIDADES = {
+    SECCION: ("sections", _secciones),
+    FAMILIA: ("families", _familias),
+    ARTICULO: ("articulos", _articulos),
+}
+
+
+async def cambios_desde(db: AsyncSession, since: int, limit: int) -> dict:
+    """Altas, modificaciones y bajas posteriores a la versión `since`.
+
+    Se devuelven versiones completas: si la página se corta en medio de una
+    versión, esa versión queda para la página siguiente, salvo que sea la
+    única, que se devuelve entera aunque supere `limit`.
+    """
+    consulta = (
+        select(Cambio.entidad, Cambio.entidad_id, Cambio.version, Cambio.eliminado)
+        .where(Cambio.version > since)
+        .order_by(Cambio.version, Cambio.entidad, Cambio.entidad_id)
+    )
+    filas = (await db.execute(consulta.limit(limit + 1))).all()
+    mas = len(filas) > limit
+    if mas:
+        siguiente = filas[limit].version
+        if filas[0].version == siguiente:
+            filas = (
+                await db.execute(consulta.where(Cambio.version == siguiente))
+            ).all()
+        else:
+            filas = [fila for fila in filas[:limit] if fila.version < siguiente]
+
+    por_entidad = {entidad: ([], []) for entidad in ENTIDADES}
+    for fila in filas:
+        cambiados, eliminados = por_entidad[fila.entidad]
+        (eliminados if fila.eliminado else cambiados).append(fila.entidad_id)
+
+    respuesta = {"version": filas[-1].version if filas else since, "mas": mas}
+    for entidad, (clave, leer) in ENTIDADES.items():
+        cambiados, eliminados = por_entidad[entidad]
+        upserts = await leer(db, cambiados) if cambiados else []
+        # Una entidad borrada después de leer el registro se informa como baja
+        existentes = {upsert["id"] for upsert in upserts}
+        eliminados += [id_ for id_ in cambiados if id_ not in existentes]
+        respuesta[clave] = {"upserts": upserts, "deletes": sorted(eliminados)}
+    return respuesta
@@ -0,0 +1,174 @@
+"""Modelo de lectura desnormalizado del catálogo.
+
+`catalogo_plano` guarda una fila por código de barras con los datos del
+artículo, su familia y su sección, para que las lecturas no dependan del coste
+de los joins. Las rutas que escriben llaman a `refrescar` con los artículos,
+familias o secciones que tocaron, dentro de su misma transacción; las filas
+afectadas se regeneran con DELETE + INSERT ... SELECT por lotes de IDs.
+"""
+
+from sqlalchemy import delete, insert, select, union, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.m_articulo import (
+    Articulo as ArticuloModel,
+    CodigoBarra as CodigoBarraModel,
+)
+from ..models.m_catalogo import CatalogoPlano
+from ..models.m_family import Family
+from ..models.m_seccion import Section
+from ..schemas.sch_articulo import Articulo
+
+# Cantidad de artículos regenerados por sentencia
+LOTE_REFRESCO = 5000
+
+_COLUMNAS = {
+    "codigo_barra": CodigoBarraModel.codigos_barras,
+    "codigo_barra_id": CodigoBarraModel.id,
+    "articulo_id": ArticuloModel.id,
+    "cod_short": ArticuloModel.cod_short,
+    "name": ArticuloModel.name,
+    "purchase_price": ArticuloModel.purchase_price,
+    "sale_price": ArticuloModel.sale_price,
+    "und": ArticuloModel.und,
+    "tax": ArticuloModel.tax,
+    "family_id": ArticuloModel.family_id,
+    "family_cod": Family.cod,
+    "family_name": Family.name,
+    "section_id": Family.section_id,
+    "section_name": Section.name,
+}
+
+
+def _insertar_desde(condicion=None):
+    """INSERT ... SELECT de las filas de los artículos que cumplen `condicion`."""
+    consulta = (
+        select(*_COLUMNAS.values())
+        .select_from(ArticuloModel)
+        .outerjoin(CodigoBarraModel, CodigoBarraModel.articulo_id == ArticuloModel.id)
+        .outerjoin(Family, Family.id == ArticuloModel.family_id)
+        .outerjoin(Section, Section.id == Family.section_id)
+    )
+    if condicion is not None:
+        consulta = consulta.where(condicion)
+    return insert(CatalogoPlano).from_select(list(_COLUMNAS), consulta)
+
+
+def sentencias_reconstruccion() -> list:
+    """Sentencias que regeneran la tabla completa (conexión síncrona o asíncrona)."""
+    return [delete(CatalogoPlano), _insertar_desde()]
+
+
+async def reconstruir_catalogo_plano(db: AsyncSession):
+    """Regenerar toda la tabla a partir de las tablas normalizadas y confirmar."""
+    for sentencia in sentencias_reconstruccion():
+        await db.execute(sentencia)
+    await db.commit()
+
+
+async def refrescar(db: AsyncSession, articulos=(), familias=(), secciones=()):
+    """Regenerar las filas de los artículos indicados y de los que pertenecen,
+    o pertenecían, a las familias y secciones indicadas.
+
+    Hace flush de la sesión para que el INSERT ... SELECT vea los cambios
+    pendientes. No hace commit.
+    """
+    await db.flush()
+    consultas = []
+    if familias:
+        familias = list(familias)
+        consultas += [
+            select(ArticuloModel.id).where(ArticuloModel.family_id.in_(familias)),
+            select(CatalogoPlano.articulo_id).where(
+                CatalogoPlano.family_id.in_(familias)
+            ),
+        ]
+    if secciones:
+        secciones = list(secciones)
+        consultas += [
+            select(ArticuloModel.id)
+            .join(Family, Family.id == ArticuloModel.family_id)
+            .where(Family.section_id.in_(secciones)),
+            select(CatalogoPlano.articulo_id).where(
+                CatalogoPlano.section_id.in_(secciones)
+            ),
+        ]
+    ids = set(articulos)
+    if consultas:
+        ids.update(await db.scalars(union(*consultas)))
+    ids = sorted(ids)
+    for inicio in range(0, len(ids), LOTE_REFRESCO):
+        lote = ids[inicio : inicio + LOTE_REFRESCO]
+        await db.execute(
+            delete(CatalogoPlano).where(CatalogoPlano.articulo_id.in_(lote))
+        )
+        await db.execute(_insertar_desde(ArticuloModel.id.in_(lote)))
+
+
+def _precio_actual(columna):
+    """Subconsulta con el precio del artículo de la fila plana."""
+    return (
+        select(columna)
+        .where(ArticuloModel.id == CatalogoPlano.articulo_id)
+        .scalar_subquery()
+    )
+
+
+async def refrescar_precios(db: AsyncSession, condicion):
+    """Copiar los precios de los artículos que cumplen `condicion` con un UPDATE."""
+    articulo_ids = select(ArticuloModel.id).where(condicion)
+    await db.execute(
+        update(CatalogoPlano)
+        .where(CatalogoPlano.articulo_id.in_(articulo_ids))
+        .values(
+            sale_price=_precio_actual(ArticuloModel.sale_price),
+            purchase_price=_precio_actual(ArticuloModel.purchase_price),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _articulo(filas) -> Articulo:
+    primera = filas[0]
+    return Articulo(
+        id=primera.articulo_id,
+        cod_short=primera.cod_short,
+        name=primera.name,
+        codigos_barras=[
+            {"codigos_barras": fila.codigo_barra}
+            for fila in filas
+            if fila.codigo_barra is not None
+        ],
+        family_name=primera.family_name,
+        family_id=primera.family_id,
+        purchase_price=primera.purchase_price,
+        sale_price=primera.sale_price,
+        und=primera.und,
+        tax=primera.tax,
+    )
+
+
+async def articulos_por_codigos(db: AsyncSession, codigos) -> dict:
+    """Resolver códigos de barras a artículos con una consulta sobre una sola tabla.
+
+    Devuelve {codigo: (articulo_id, Articulo)} solo para los códigos existentes.
+    """
+    articulo_ids = select(CatalogoPlano.articulo_id).where(
+        CatalogoPlano.codigo_barra.in_(list(codigos))
+    )
+    filas = await db.execute(
+        select(CatalogoPlano.__table__)
+        .where(CatalogoPlano.articulo_id.in_(articulo_ids))
+        .order_by(CatalogoPlano.articulo_id, CatalogoPlano.codigo_barra_id)
+    )
+    por_articulo = {}
+    for fila in filas:
+        por_articulo.setdefault(fila.articulo_id, []).append(fila)
+    resultado = {}
+    buscados = set(codigos)
+    for articulo_id, filas_articulo in por_articulo.items():
+        articulo = _articulo(filas_articulo)
+        for fila in filas_articulo:
+            if fila.codigo_barra in buscados:
+                resultado[fila.codigo_barra] = (articulo_id, articulo)
+    return resultado
@@ -0,0 +1,26 @@
+"""Utilidades para códigos cortos y códigos de barras EAN-13."""
+
+# Prefijo de los códigos EAN-13 generados por el sistema
+PREFIJO_EAN13 = "775"
+
+
+def formatear_cod_short(numero: int) -> str:
+    """Código corto de 6 dígitos a partir de un número de secuencia"""
+    return f"{numero:06d}"
+
+
+def formatear_ean13(numero: int) -> str:
+    """Código EAN-13 con el prefijo del sistema a partir de un número de secuencia"""
+    base = f"{PREFIJO_EAN13}{numero:09d}"
+    return base + calcular_digito_control_ean13(base)
+
+
+def calcular_digito_control_ean13(base):
+    """Calcular el dígito de control de un código EAN-13 (pesos GS1 1 y 3).
+
+    Para lotes de códigos, ver backend.services.ean.
+    """
+    suma = sum((3 if i % 2 == 1 else 1) * int(n) for i, n in enumerate(base[:12]))
+    modulo = suma % 10
+    digito_control = (10 - modulo) % 10
+    return str(digito_control)
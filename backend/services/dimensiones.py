@@ -0,0 +1,164 @@
+"""Caché en memoria de familias y secciones por nombre y por código.
+
+Las rutas que reciben nombres (alta de artículos, familias por sección, ajuste
+de precios, importación, bajas) los resuelven aquí sin consultar la base de
+datos. Las tablas se cargan enteras, con dos consultas, al arrancar y cada vez
+que cambia la versión del catálogo (`cache_catalogo`), que incrementa toda
+alta, modificación o baja de familias y secciones en cualquier worker. Entre
+relecturas de la versión (CATALOG_VERSION_TTL segundos) un acierto puede estar
+desfasado; un fallo relee siempre la versión antes de responder que el nombre
+no existe.
+"""
+
+import asyncio
+import threading
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config.db import SessionLocal
+from ..models.m_family import Family
+from ..models.m_seccion import Section
+from .version_catalogo import cache_catalogo
+
+
+class _Tablas:
+    """Familias y secciones de una versión del catálogo, con sus índices."""
+
+    __slots__ = (
+        "version",
+        "familias",
+        "secciones",
+        "familia_por_nombre",
+        "familia_por_cod",
+        "seccion_por_nombre",
+        "seccion_por_cod",
+    )
+
+    def __init__(self, version: int, familias: dict, secciones: dict):
+        self.version = version
+        self.familias = familias  # id -> (cod, name, section_id)
+        self.secciones = secciones  # id -> (cod, name)
+        self.familia_por_nombre = {f[1]: id_ for id_, f in familias.items()}
+        self.familia_por_cod = {f[0]: id_ for id_, f in familias.items()}
+        self.seccion_por_nombre = {s[1]: id_ for id_, s in secciones.items()}
+        self.seccion_por_cod = {s[0]: id_ for id_, s in secciones.items()}
+
+
+class Dimensiones:
+    """IDs de familias y secciones por nombre o código, por proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tablas = None
+        self._carga = asyncio.Lock()
+        self.cargas = 0
+
+    async def cargar(self, db: AsyncSession, version: int = None) -> _Tablas:
+        """Leer familias y secciones y sustituir las tablas en caché."""
+        if version is None:
+            version = await cache_catalogo.version(db, releer=True)
+        secciones = {
+            id_: (cod, name)
+            for id_, cod, name in await db.execute(
+                select(Section.id, Section.cod, Section.name)
+            )
+        }
+        familias = {
+            id_: (cod, name, section_id)
+            for id_, cod, name, section_id in await db.execute(
+                select(Family.id, Family.cod, Family.name, Family.section_id)
+            )
+        }
+        tablas = _Tablas(version, familias, secciones)
+        with self._lock:
+            self._tablas = tablas
+            self.cargas += 1
+        return tablas
+
+    async def iniciar(self):
+        """Cargar las tablas al arrancar."""
+        async with SessionLocal() as db:
+            await self.cargar(db)
+
+    def invalidar(self):
+        """Descartar las tablas; se recargan en la próxima búsqueda."""
+        with self._lock:
+            self._tablas = None
+
+    async def _vigentes(self, db: AsyncSession, releer: bool = False) -> _Tablas:
+        """Tablas de la versión actual del catálogo, recargándolas si cambió.
+        Las peticiones simultáneas esperan a la carga de la primera."""
+        version = await cache_catalogo.version(db, releer=releer)
+        with self._lock:
+            tablas = self._tablas
+        if tablas is not None and tablas.version == version:
+            return tablas
+        async with self._carga:
+            with self._lock:
+                tablas = self._tablas
+            if tablas is None or tablas.version != version:
+                tablas = await self.cargar(db, version)
+        return tablas
+
+    async def _buscar(self, db: AsyncSession, indice: str, clave):
+        """ID de `clave` en el índice indicado, o None si no existe."""
+        tablas = await self._vigentes(db)
+        id_ = getattr(tablas, indice).get(clave)
+        if id_ is None:
+            # Puede haberse creado en otro worker tras la última lectura
+            tablas = await self._vigentes(db, releer=True)
+            id_ = getattr(tablas, indice).get(clave)
+        return id_
+
+    async def familia(self, db: AsyncSession, nombre: str = None, cod: str = None):
+        """ID de la familia con ese nombre (o código), o None."""
+        if cod is not None:
+            return await self._buscar(db, "familia_por_cod", cod)
+        return await self._buscar(db, "familia_por_nombre", nombre)
+
+    async def seccion(self, db: AsyncSession, nombre: str = None, cod: str = None):
+        """ID de la sección con ese nombre (o código), o None."""
+        if cod is not None:
+            return await self._buscar(db, "seccion_por_cod", cod)
+        return await self._buscar(db, "seccion_por_nombre", nombre)
+
+    async def familias(self, db: AsyncSession, nombres) -> dict:
+        """{nombre: id} de las familias existentes entre `nombres`."""
+        nombres = set(nombres)
+        tablas = await self._vigentes(db)
+        if not nombres <= tablas.familia_por_nombre.keys():
+            tablas = await self._vigentes(db, releer=True)
+        indice = tablas.familia_por_nombre
+        return {nombre: indice[nombre] for nombre in nombres if nombre in indice}
+
+    async def secciones(self, db: AsyncSession, nombres) -> dict:
+        """{nombre: id} de las secciones existentes entre `nombres`."""
+        nombres = set(nombres)
+        tablas = await self._vigentes(db)
+        if not nombres <= tablas.seccion_por_nombre.keys():
+            tablas = await self._vigentes(db, releer=True)
+        indice = tablas.seccion_por_nombre
+        return {nombre: indice[nombre] for nombre in nombres if nombre in indice}
+
+    async def datos_familia(self, db: AsyncSession, familia_id: int):
+        """(cod, name, section_id) de la familia, o None."""
+        return (await self._vigentes(db)).familias.get(familia_id)
+
+    async def datos_seccion(self, db: AsyncSession, seccion_id: int):
+        """(cod, name) de la sección, o None."""
+        return (await self._vigentes(db)).secciones.get(seccion_id)
+
+    def stats(self) -> dict:
+        """Tamaño de las tablas en caché y cantidad de cargas."""
+        with self._lock:
+            tablas = self._tablas
+            return {
+                "version": tablas.version if tablas else None,
+                "familias": len(tablas.familias) if tablas else 0,
+                "secciones": len(tablas.secciones) if tablas else 0,
+                "cargas": self.cargas,
+            }
+
+
+dimensiones = Dimensiones()
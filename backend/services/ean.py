@@ -0,0 +1,120 @@
+"""Validación y generación de códigos EAN-8, UPC-A y EAN-13 por lotes.
+
+Los códigos se convierten en una matriz de dígitos con NumPy y el dígito de
+control se calcula para todas las filas a la vez con un producto por los
+pesos, sin recorrer cada código en Python. El dígito de control sigue la norma
+GS1: de derecha a izquierda, sin contar el propio dígito de control, los
+pesos alternan 3 y 1.
+"""
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.m_articulo import CodigoBarra as CodigoBarraModel
+from .codigos import PREFIJO_EAN13
+
+# Longitudes admitidas y su formato
+FORMATOS_CODIGO = {8: "EAN-8", 12: "UPC-A", 13: "EAN-13"}
+_ANCHO = max(FORMATOS_CODIGO)
+
+# Cantidad de códigos por consulta al buscar los existentes
+LOTE_CONSULTA = 10000
+
+
+def pesos(longitud: int) -> np.ndarray:
+    """Pesos de los dígitos de un código de `longitud`, sin el de control."""
+    posiciones = np.arange(longitud - 1)
+    return np.where((longitud - 1 - posiciones) % 2 == 1, 3, 1)
+
+
+def _digitos(codigos) -> tuple:
+    """Matriz (n, 13) de dígitos, longitudes y máscara de caracteres numéricos.
+
+    Los códigos de más de 13 caracteres se truncan en la matriz; su longitud
+    los deja fuera de todos los formatos.
+    """
+    texto = np.asarray(codigos, dtype=f"U{_ANCHO}")
+    longitudes = np.fromiter(map(len, codigos), dtype=np.int64, count=len(codigos))
+    caracteres = texto.view(np.uint32).reshape(len(texto), _ANCHO)
+    numericos = (caracteres >= ord("0")) & (caracteres <= ord("9"))
+    return (caracteres - ord("0")).astype(np.uint8), longitudes, numericos
+
+
+def digitos_control(digitos: np.ndarray) -> np.ndarray:
+    """Dígito de control de cada fila de una matriz de dígitos sin el de control."""
+    suma = digitos.astype(np.int64) @ pesos(digitos.shape[1] + 1)
+    return (10 - suma % 10) % 10
+
+
+def validar(codigos) -> np.ndarray:
+    """Máscara con True para cada código EAN-8, UPC-A o EAN-13 válido."""
+    codigos = list(codigos)
+    validos = np.zeros(len(codigos), dtype=bool)
+    if not codigos:
+        return validos
+    digitos, longitudes, numericos = _digitos(codigos)
+    for longitud in FORMATOS_CODIGO:
+        filas = np.flatnonzero(longitudes == longitud)
+        if not len(filas):
+            continue
+        bloque = digitos[filas, :longitud]
+        correctos = numericos[filas, :longitud].all(axis=1)
+        correctos &= digitos_control(bloque[:, :-1]) == bloque[:, -1]
+        validos[filas] = correctos
+    return validos
+
+
+def invalidos(codigos) -> list:
+    """Códigos que no son EAN-8, UPC-A ni EAN-13 válidos."""
+    codigos = list(codigos)
+    return [codigos[i] for i in np.flatnonzero(~validar(codigos))]
+
+
+def repetidos(codigos) -> list:
+    """Códigos que aparecen más de una vez en el lote."""
+    codigos = list(codigos)
+    if not codigos:
+        return []
+    valores, cuentas = np.unique(np.asarray(codigos, dtype=str), return_counts=True)
+    return valores[cuentas > 1].tolist()
+
+
+def generar_ean13(numeros) -> list:
+    """Códigos EAN-13 con el prefijo del sistema para números de secuencia."""
+    numeros = np.asarray(numeros, dtype=np.int64)
+    bases = int(PREFIJO_EAN13) * 10**9 + numeros
+    divisores = 10 ** np.arange(11, -1, -1, dtype=np.int64)
+    control = digitos_control(bases[:, None] // divisores % 10)
+    return [f"{codigo:013d}" for codigo in (bases * 10 + control).tolist()]
+
+
+async def codigos_existentes(db: AsyncSession, codigos) -> set:
+    """Códigos del lote que ya están en `codigos_barras`.
+
+    Una consulta por cada LOTE_CONSULTA códigos distintos; los lotes de las
+    rutas nunca superan ese tamaño.
+    """
+    unicos = sorted(set(codigos))
+    encontrados = set()
+    for inicio in range(0, len(unicos), LOTE_CONSULTA):
+        encontrados.update(
+            await db.scalars(
+                select(CodigoBarraModel.codigos_barras).where(
+                    CodigoBarraModel.codigos_barras.in_(
+                        unicos[inicio : inicio + LOTE_CONSULTA]
+                    )
+                )
+            )
+        )
+    return encontrados
+
+
+async def revisar_codigos(db: AsyncSession, codigos) -> dict:
+    """Códigos inválidos, repetidos en el lote y ya existentes en la base de datos."""
+    codigos = list(codigos)
+    return {
+        "invalidos": invalidos(codigos),
+        "repetidos": repetidos(codigos),
+        "existentes": sorted(await codigos_existentes(db, codigos)),
+    }
@@ -0,0 +1,215 @@
+"""Importación masiva de artículos desde archivos CSV o JSONL."""
+
+import csv
+import json
+from itertools import islice
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.m_articulo import (
+    Articulo as ArticuloModel,
+    CodigoBarra as CodigoBarraModel,
+)
+from ..schemas.sch_articulo import ArticuloCreate
+from .busqueda import indexar_articulos
+from .asignador import asignador_cod_short, asignador_ean13
+from .cambios import ARTICULO, registrar_cambios
+from .catalogo_plano import refrescar
+from .dimensiones import dimensiones
+from .ean import codigos_existentes, invalidos
+from .indice_codigos import indice_codigos
+
+FORMATOS = ("csv", "jsonl")
+
+# Separador de los códigos de barras dentro de una columna CSV
+SEPARADOR_CODIGOS = "|"
+
+
+def _fila_csv(cabecera, valores):
+    """Convertir una fila CSV en un diccionario para ArticuloCreate."""
+    fila = {
+        clave: valor for clave, valor in zip(cabecera, valores) if valor.strip() != ""
+    }
+    if "codigos_barras" in fila:
+        fila["codigos_barras"] = [
+            {"codigos_barras": codigo.strip()}
+            for codigo in fila["codigos_barras"].split(SEPARADOR_CODIGOS)
+            if codigo.strip()
+        ]
+    return fila
+
+
+def leer_filas(texto, formato: str):
+    """Generar tuplas (número de fila, datos o excepción) desde un flujo de texto.
+
+    En CSV el flujo se lee con `csv.reader`, así que los campos entre comillas
+    pueden contener saltos de línea; el flujo debe abrirse con newline="".
+    """
+    if formato == "jsonl":
+        numero = 0
+        for linea in texto:
+            if not linea.strip():
+                continue
+            numero += 1
+            try:
+                yield numero, json.loads(linea)
+            except ValueError as exc:
+                yield numero, exc
+        return
+
+    lector = csv.reader(texto)
+    cabecera = None
+    numero = 0
+    while True:
+        try:
+            valores = next(lector)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            numero += 1
+            yield numero, exc
+            continue
+        if not any(valor.strip() for valor in valores):
+            continue
+        if cabecera is None:
+            cabecera = [columna.strip() for columna in valores]
+            continue
+        numero += 1
+        yield numero, _fila_csv(cabecera, valores)
+
+
+def siguiente_lote(filas, cantidad: int) -> list:
+    """Hasta `cantidad` filas del generador de `leer_filas`; lee del archivo,
+    así que se llama fuera del event loop."""
+    return list(islice(filas, cantidad))
+
+
+def _por_fila(errores: list) -> list:
+    """Errores en el orden de las filas del archivo, no en el de las etapas."""
+    return sorted(errores, key=lambda error: error["fila"])
+
+
+async def procesar_lote(db: AsyncSession, filas: list) -> tuple:
+    """Insertar un lote de filas en una sola transacción.
+
+    Devuelve el número de artículos creados y la lista de errores ordenada
+    por número de fila.
+    """
+    errores = []
+    validas = []
+    for numero, datos in filas:
+        if isinstance(datos, Exception):
+            errores.append({"fila": numero, "error": f"Formato inválido: {datos}"})
+            continue
+        try:
+            validas.append((numero, ArticuloCreate.model_validate(datos)))
+        except ValidationError as exc:
+            mensaje = "; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                for error in exc.errors()
+            )
+            errores.append({"fila": numero, "error": mensaje})
+
+    # Resolver las familias del lote en la caché de dimensiones
+    nombres = {articulo.family_name for _, articulo in validas}
+    familias = await dimensiones.familias(db, nombres)
+
+    # Comprobar los códigos de barras recibidos contra el lote y la base de datos
+    recibidos = [
+        codigo.codigos_barras
+        for _, articulo in validas
+        for codigo in articulo.codigos_barras
+        if codigo.codigos_barras
+    ]
+    no_validos = set(invalidos(recibidos))
+    existentes = await codigos_existentes(db, recibidos)
+
+    aceptadas = []
+    vistos = set()
+    for numero, articulo in validas:
+        if articulo.family_name not in familias:
+            errores.append({"fila": numero, "error": "Familia not found"})
+            continue
+        codigos = [
+            c.codigos_barras for c in articulo.codigos_barras if c.codigos_barras
+        ]
+        malformados = [c for c in codigos if c in no_validos]
+        if malformados:
+            errores.append(
+                {"fila": numero, "error": f"Código de barras no válido: {malformados}"}
+            )
+            continue
+        repetidos = [c for c in codigos if c in existentes or c in vistos]
+        if repetidos:
+            errores.append(
+                {"fila": numero, "error": f"Código de barras duplicado: {repetidos}"}
+            )
+            continue
+        vistos.update(codigos)
+        aceptadas.append((numero, articulo, codigos))
+
+    if not aceptadas:
+        return 0, _por_fila(errores)
+
+    # Terminar la transacción de lectura para devolver la conexión: el asignador
+    # usa la suya y, con muchas importaciones a la vez, agotaría el pool
+    await db.commit()
+
+    # Reservar códigos cortos y códigos de barras para todo el lote
+    cod_shorts = await asignador_cod_short.siguientes(len(aceptadas))
+    sin_codigo = sum(1 for _, _, codigos in aceptadas if not codigos)
+    generados = iter(await asignador_ean13.siguientes(sin_codigo))
+
+    filas_articulos = []
+    codigos_por_cod_short = {}
+    for (_, articulo, codigos), cod_short in zip(aceptadas, cod_shorts):
+        datos = articulo.model_dump(
+            exclude={"family_name", "codigos_barras", "cod_short"}
+        )
+        datos.update(
+            {"family_id": familias[articulo.family_name], "cod_short": cod_short}
+        )
+        filas_articulos.append(datos)
+        codigos_por_cod_short[cod_short] = codigos or [next(generados)]
+
+    try:
+        await db.execute(insert(ArticuloModel), filas_articulos)
+        ids = (
+            (
+                await db.execute(
+                    select(
+                        ArticuloModel.cod_short, ArticuloModel.id, ArticuloModel.name
+                    ).where(ArticuloModel.cod_short.in_(cod_shorts))
+                )
+            )
+            .tuples()
+            .all()
+        )
+        filas_codigos = [
+            {"codigos_barras": codigo, "articulo_id": articulo_id}
+            for cod_short, articulo_id, _ in ids
+            for codigo in codigos_por_cod_short[cod_short]
+        ]
+        await db.execute(insert(CodigoBarraModel), filas_codigos)
+        await indexar_articulos(
+            db, [(articulo_id, nombre) for _, articulo_id, nombre in ids], False
+        )
+        await refrescar(db, articulos=[articulo_id for _, articulo_id, _ in ids])
+        await registrar_cambios(
+            db, ARTICULO, [articulo_id for _, articulo_id, _ in ids]
+        )
+        await db.commit()
+        indice_codigos.agregar_lote(
+            (fila["codigos_barras"], fila["articulo_id"]) for fila in filas_codigos
+        )
+    except Exception as exc:  # pylint: disable=broad-except
+        await db.rollback()
+        errores.extend(
+            {"fila": numero, "error": f"Error al insertar el lote: {exc}"}
+            for numero, _, _ in aceptadas
+        )
+        return 0, _por_fila(errores)
+
+    return len(filas_articulos), _por_fila(errores)
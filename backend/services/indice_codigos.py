@@ -0,0 +1,432 @@
+"""Índice compacto de códigos de barras compartido por los workers.
+
+El índice es un archivo con los códigos numéricos ordenados (int64) seguidos
+de los IDs de sus artículos (int64): 16 bytes por código, unos 160 MB para
+diez millones. Cada worker lo abre con mmap de solo lectura, así que todos
+comparten las mismas páginas del sistema operativo, y busca con búsqueda
+binaria sobre el arreglo ordenado.
+
+Las altas y bajas posteriores a la construcción se añaden a un archivo delta
+(`<índice>.<generación>.delta`) de registros (clave, articulo_id), con
+articulo_id 0 para las bajas; cada worker lee los registros nuevos del delta
+antes de buscar. Cuando el delta supera BARCODE_INDEX_MAX_DELTA registros se
+reconstruye el índice desde `codigos_barras` y se reemplaza el archivo de forma
+atómica con una generación nueva.
+
+La clave de un código es `int(codigo) * 32 + len(codigo)`, para que códigos con
+distintos ceros a la izquierda no coincidan. Los códigos no numéricos o de más
+de LARGO_MAXIMO dígitos no se indexan y se buscan en la base de datos.
+
+Al arrancar se compara la cantidad de códigos del índice (más su delta y los
+no indexados) con la de `codigos_barras`; si difieren, el archivo quedó de otra
+base o de cargas hechas por fuera de la API y se reconstruye.
+"""
+
+import asyncio
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+from array import array
+
+import numpy as np
+from sqlalchemy import func, select
+
+from ..config.db import SessionLocal
+from ..models.m_articulo import CodigoBarra as CodigoBarraModel
+
+logger = logging.getLogger(__name__)
+
+# Encabezado: marca, generación, cantidad de códigos y cantidad de códigos de
+# `codigos_barras` que no se indexaron (no numéricos o demasiado largos)
+MARCA = b"CODIDX01"
+ENCABEZADO = struct.Struct("<8sQQQ")
+# Registro del delta: clave y articulo_id (0 = baja)
+REGISTRO = struct.Struct("<qq")
+
+# Dígitos máximos de un código indexable: la clave cabe en un int64
+LARGO_MAXIMO = 17
+
+# Resultado de `buscar` para los códigos que el índice sabe que no existen
+SIN_ARTICULO = 0
+
+# Filas leídas por lote al construir el índice
+LOTE_CONSTRUCCION = 50000
+
+
+def clave_codigo(codigo: str):
+    """Clave numérica del código, o None si no es indexable."""
+    if (
+        not codigo
+        or len(codigo) > LARGO_MAXIMO
+        or not codigo.isascii()
+        or not codigo.isdigit()
+    ):
+        return None
+    return int(codigo) * 32 + len(codigo)
+
+
+def escribir_indice(ruta: str, claves, ids, generacion: int, omitidos: int = 0):
+    """Escribir un índice ordenado en `ruta` a través de un archivo temporal.
+
+    `claves` e `ids` son arreglos int64 del mismo largo, en cualquier orden;
+    `omitidos` es la cantidad de códigos de la base que no se indexaron.
+    """
+    claves = np.asarray(claves, dtype=np.int64)
+    ids = np.asarray(ids, dtype=np.int64)
+    orden = np.argsort(claves, kind="stable")
+    temporal = f"{ruta}.tmp{os.getpid()}"
+    with open(temporal, "wb") as archivo:
+        archivo.write(ENCABEZADO.pack(MARCA, generacion, len(claves), omitidos))
+        archivo.write(claves[orden].tobytes())
+        archivo.write(ids[orden].tobytes())
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    return temporal
+
+
+def _generacion(ruta: str) -> int:
+    """Generación del índice en `ruta`, o 0 si todavía no se construyó."""
+    try:
+        with open(ruta, "rb") as archivo:
+            marca, generacion, _, _ = ENCABEZADO.unpack(archivo.read(ENCABEZADO.size))
+    except FileNotFoundError:
+        return 0
+    if marca != MARCA:
+        raise ValueError(f"{ruta} no es un índice de códigos de barras")
+    return generacion
+
+
+class _Base:
+    """Arreglos mapeados de una generación del índice."""
+
+    __slots__ = ("inodo", "generacion", "omitidos", "claves", "ids")
+
+    def __init__(self, ruta: str):
+        with open(ruta, "rb") as archivo:
+            self.inodo = os.fstat(archivo.fileno()).st_ino
+            marca, self.generacion, cantidad, self.omitidos = ENCABEZADO.unpack(
+                archivo.read(ENCABEZADO.size)
+            )
+            if marca != MARCA:
+                raise ValueError(f"{ruta} no es un índice de códigos de barras")
+            if not cantidad:
+                self.claves = self.ids = np.empty(0, dtype=np.int64)
+                return
+            # El mapa sigue válido aunque el archivo se reemplace después
+            mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self.claves = np.frombuffer(
+            mapa, dtype=np.int64, count=cantidad, offset=ENCABEZADO.size
+        )
+        self.ids = np.frombuffer(
+            mapa, dtype=np.int64, count=cantidad, offset=ENCABEZADO.size + 8 * cantidad
+        )
+
+
+class IndiceCodigos:
+    """Índice de códigos de barras en un archivo mapeado en memoria."""
+
+    def __init__(self, ruta: str = None, max_delta: int = 100000):
+        self.ruta = ruta or None
+        self.max_delta = max_delta
+        self._base = None
+        # Registros del delta ya leídos: clave -> articulo_id
+        self._delta = {}
+        self._leido = 0
+        self._lock = threading.Lock()
+        self._compactacion = None
+        self.busquedas = 0
+        self.no_indexables = 0
+
+    @property
+    def activo(self) -> bool:
+        return self.ruta is not None
+
+    def _ruta_delta(self, generacion: int) -> str:
+        return f"{self.ruta}.{generacion}.delta"
+
+    def _bloquear(self, sufijo: str, esperar: bool = True):
+        """Lock de archivo compartido entre procesos, o None si está tomado."""
+        archivo = open(f"{self.ruta}.{sufijo}.lock", "a+b")
+        try:
+            fcntl.flock(
+                archivo, fcntl.LOCK_EX if esperar else fcntl.LOCK_EX | fcntl.LOCK_NB
+            )
+        except BlockingIOError:
+            archivo.close()
+            return None
+        return archivo
+
+    def _actualizar(self) -> bool:
+        """Abrir la generación vigente y leer los registros nuevos del delta.
+
+        Debe llamarse con el lock adquirido; False si no hay índice construido.
+        """
+        try:
+            inodo = os.stat(self.ruta).st_ino
+        except FileNotFoundError:
+            self._base = None
+            return False
+        if self._base is None or self._base.inodo != inodo:
+            self._base = _Base(self.ruta)
+            self._delta = {}
+            self._leido = 0
+        ruta_delta = self._ruta_delta(self._base.generacion)
+        try:
+            if os.stat(ruta_delta).st_size - self._leido < REGISTRO.size:
+                return True
+            with open(ruta_delta, "rb") as archivo:
+                archivo.seek(self._leido)
+                nuevos = archivo.read()
+        except FileNotFoundError:
+            return True
+        completos = len(nuevos) - len(nuevos) % REGISTRO.size
+        for clave, articulo_id in REGISTRO.iter_unpack(nuevos[:completos]):
+            self._delta[clave] = articulo_id
+        self._leido += completos
+        return True
+
+    def buscar_claves(self, claves: list) -> list:
+        """articulo_id (o SIN_ARTICULO) de cada clave, o None sin índice."""
+        with self._lock:
+            if not self._actualizar():
+                return None
+            base, delta = self._base, self._delta
+        buscadas = np.asarray(claves, dtype=np.int64)
+        posiciones = np.searchsorted(base.claves, buscadas)
+        posiciones = np.minimum(posiciones, max(len(base.claves) - 1, 0))
+        resultado = np.zeros(len(buscadas), dtype=np.int64)
+        if len(base.claves):
+            encontradas = base.claves[posiciones] == buscadas
+            resultado[encontradas] = base.ids[posiciones[encontradas]]
+        resultado = resultado.tolist()
+        for i, clave in enumerate(claves):
+            if clave in delta:
+                resultado[i] = delta[clave]
+        return resultado
+
+    def buscar(self, codigos) -> dict:
+        """{codigo: articulo_id o SIN_ARTICULO} para los códigos que el índice
+        puede responder; los que faltan deben buscarse en la base de datos."""
+        if not self.activo:
+            return {}
+        indexables = {}
+        for codigo in codigos:
+            clave = clave_codigo(codigo)
+            if clave is None:
+                self.no_indexables += 1
+            else:
+                indexables[codigo] = clave
+        if not indexables:
+            return {}
+        ids = self.buscar_claves(list(indexables.values()))
+        if ids is None:
+            return {}
+        self.busquedas += len(indexables)
+        return dict(zip(indexables, ids))
+
+    def _anotar(self, registros: list) -> int:
+        """Añadir registros al delta de la generación vigente (la 0 mientras se
+        construye el primer índice) y devolver su cantidad de registros."""
+        datos = b"".join(REGISTRO.pack(*registro) for registro in registros)
+        cerrojo = self._bloquear("delta")
+        try:
+            ruta_delta = self._ruta_delta(_generacion(self.ruta))
+            with open(ruta_delta, "ab") as archivo:
+                archivo.write(datos)
+            return os.path.getsize(ruta_delta) // REGISTRO.size
+        finally:
+            cerrojo.close()
+
+    def agregar_lote(self, pares):
+        """Registrar pares (codigo, articulo_id) ya confirmados; articulo_id
+        SIN_ARTICULO para las bajas."""
+        if not self.activo:
+            return
+        registros = [
+            (clave, articulo_id)
+            for clave, articulo_id in (
+                (clave_codigo(codigo), articulo_id) for codigo, articulo_id in pares
+            )
+            if clave is not None
+        ]
+        if registros and self._anotar(registros) > self.max_delta:
+            self._programar_compactacion()
+
+    def agregar(self, codigos, articulo_id: int):
+        """Registrar códigos nuevos de un artículo (después del commit)."""
+        self.agregar_lote((codigo, articulo_id) for codigo in codigos)
+
+    def quitar(self, codigos):
+        """Registrar la baja de códigos (después del commit)."""
+        self.agregar_lote((codigo, SIN_ARTICULO) for codigo in codigos)
+
+    async def reconstruir(self, db) -> int:
+        """Construir una generación nueva desde `codigos_barras`.
+
+        Los registros del delta añadidos mientras se leía la base de datos se
+        copian al delta de la generación nueva. Devuelve la cantidad de códigos.
+        """
+        cerrojo = await asyncio.to_thread(self._bloquear, "construccion")
+        try:
+            cerrojo_delta = await asyncio.to_thread(self._bloquear, "delta")
+            try:
+                generacion = _generacion(self.ruta)
+                anterior = self._ruta_delta(generacion)
+                inicio_delta = (
+                    os.path.getsize(anterior) if os.path.exists(anterior) else 0
+                )
+            finally:
+                cerrojo_delta.close()
+
+            claves, ids = array("q"), array("q")
+            omitidos = 0
+            consulta = select(
+                CodigoBarraModel.codigos_barras, CodigoBarraModel.articulo_id
+            ).where(CodigoBarraModel.articulo_id.is_not(None))
+            resultado = await db.stream(
+                consulta.execution_options(yield_per=LOTE_CONSTRUCCION)
+            )
+            async for filas in resultado.partitions():
+                for codigo, articulo_id in filas:
+                    clave = clave_codigo(codigo)
+                    if clave is not None:
+                        claves.append(clave)
+                        ids.append(articulo_id)
+                    else:
+                        omitidos += 1
+            await db.commit()
+            temporal = await asyncio.to_thread(
+                escribir_indice, self.ruta, claves, ids, generacion + 1, omitidos
+            )
+
+            cerrojo_delta = await asyncio.to_thread(self._bloquear, "delta")
+            try:
+                pendientes = b""
+                if os.path.exists(anterior):
+                    with open(anterior, "rb") as archivo:
+                        archivo.seek(inicio_delta)
+                        pendientes = archivo.read()
+                with open(self._ruta_delta(generacion + 1), "wb") as archivo:
+                    archivo.write(pendientes)
+                os.replace(temporal, self.ruta)
+                if os.path.exists(anterior):
+                    os.remove(anterior)
+            finally:
+                cerrojo_delta.close()
+        finally:
+            cerrojo.close()
+        logger.info("Índice de códigos de barras: %d códigos", len(claves))
+        return len(claves)
+
+    async def _compactar(self):
+        cerrojo = await asyncio.to_thread(self._bloquear, "compactacion", False)
+        if cerrojo is None:
+            return  # otro worker ya está compactando
+        try:
+            async with SessionLocal() as db:
+                await self.reconstruir(db)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("No se pudo compactar el índice de códigos de barras")
+        finally:
+            cerrojo.close()
+
+    def _programar_compactacion(self):
+        if self._compactacion is None or self._compactacion.done():
+            self._compactacion = asyncio.get_running_loop().create_task(
+                self._compactar()
+            )
+
+    def _cantidad(self):
+        """Códigos de `codigos_barras` que representa el índice con su delta,
+        contando los no indexados; None si no hay índice construido."""
+        with self._lock:
+            if not self._actualizar():
+                return None
+            base, delta = self._base, dict(self._delta)
+        claves = np.fromiter(delta, dtype=np.int64, count=len(delta))
+        en_base = np.zeros(len(claves), dtype=bool)
+        if len(base.claves) and len(claves):
+            posiciones = np.minimum(
+                np.searchsorted(base.claves, claves), len(base.claves) - 1
+            )
+            en_base = base.claves[posiciones] == claves
+        activos = np.fromiter(
+            (articulo_id != SIN_ARTICULO for articulo_id in delta.values()),
+            dtype=bool,
+            count=len(delta),
+        )
+        altas = int(np.count_nonzero(activos & ~en_base))
+        bajas = int(np.count_nonzero(~activos & en_base))
+        return len(base.claves) + altas - bajas + base.omitidos
+
+    async def vigente(self, db) -> bool:
+        """Comprobar que el índice tiene tantos códigos como la base de datos.
+
+        Detecta los archivos que quedaron de antes de restaurar la base o de
+        cargas hechas por fuera de la API, que darían 404 falsos.
+        """
+        cantidad = await asyncio.to_thread(self._cantidad)
+        if cantidad is None:
+            return False
+        en_base = await db.scalar(
+            select(func.count()).where(CodigoBarraModel.articulo_id.is_not(None))
+        )
+        await db.commit()
+        if en_base != cantidad:
+            logger.warning(
+                "Índice de códigos de barras desactualizado: %d códigos, la base "
+                "tiene %d",
+                cantidad,
+                en_base,
+            )
+            return False
+        return True
+
+    async def iniciar(self):
+        """Construir el índice si no existe o si no coincide con la base de
+        datos (un solo worker lo hace)."""
+        if not self.activo:
+            return
+        cerrojo = await asyncio.to_thread(self._bloquear, "inicio")
+        try:
+            async with SessionLocal() as db:
+                if not await self.vigente(db):
+                    await self.reconstruir(db)
+        finally:
+            cerrojo.close()
+
+    async def cerrar(self):
+        """Esperar la compactación en curso y soltar los mapas del proceso."""
+        if self._compactacion is not None:
+            await self._compactacion
+            self._compactacion = None
+        with self._lock:
+            self._base = None
+            self._delta = {}
+            self._leido = 0
+
+    def stats(self) -> dict:
+        """Tamaño del índice y del delta y contadores de búsqueda."""
+        with self._lock:
+            if not self.activo or not self._actualizar():
+                return {"activo": self.activo, "codigos": 0}
+            base = self._base
+            return {
+                "activo": True,
+                "ruta": self.ruta,
+                "generacion": base.generacion,
+                "codigos": len(base.claves),
+                "bytes": ENCABEZADO.size + 16 * len(base.claves),
+                "delta": len(self._delta),
+                "busquedas": self.busquedas,
+                "no_indexables": self.no_indexables,
+            }
+
+
+indice_codigos = IndiceCodigos(
+    ruta=os.getenv("BARCODE_INDEX_PATH"),
+    max_delta=int(os.getenv("BARCODE_INDEX_MAX_DELTA", "100000")),
+)
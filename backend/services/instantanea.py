@@ -0,0 +1,385 @@
+"""Instantánea compacta del catálogo para el arranque de los terminales.
+
+Un terminal nuevo descarga un solo archivo con secciones, familias, artículos y
+códigos de barras por columnas, y después pide `GET /changes?since=<version>`.
+La versión es la del registro de cambios leída antes que los datos, así que la
+instantánea puede incluir cambios posteriores pero nunca le falta uno anterior;
+aplicar esos cambios otra vez no altera el resultado.
+
+Formato del archivo:
+
+- marca `CATSNAP1` (8 bytes) y largo del manifiesto (uint32 little-endian);
+- manifiesto JSON en UTF-8 con la versión y, por tabla, sus filas y columnas;
+- los bloques de las columnas, cada uno comprimido con zlib por separado.
+
+Cada columna del manifiesto indica `tipo`, `inicio` y `largo` del bloque
+(desde el final del manifiesto), de modo que puede pedirse sola con un Range.
+Los tipos numéricos (`i4`, `f8`) son arreglos little-endian; con `delta` se
+guardan las diferencias con el valor anterior (se decodifica con una suma
+acumulada). Los IDs nulos se guardan como 0 y los precios nulos como NaN. El
+tipo `str` son `filas + 1` desplazamientos uint32 seguidos de los textos en
+UTF-8 concatenados; los textos nulos quedan vacíos.
+
+Con SNAPSHOT_DIR configurado, una tarea comprueba cada SNAPSHOT_INTERVAL
+segundos si cambió el catálogo y genera la instantánea nueva en ese directorio
+(un solo worker a la vez); se conservan las SNAPSHOT_KEEP más recientes para
+las descargas en curso.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import re
+import struct
+import tempfile
+import zlib
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import select
+
+from ..config.db import SessionLocal
+from ..models.m_articulo import (
+    Articulo as ArticuloModel,
+    CodigoBarra as CodigoBarraModel,
+)
+from ..models.m_contador import Contador
+from ..models.m_family import Family
+from ..models.m_seccion import Section
+from .cambios import NOMBRE_CONTADOR
+
+logger = logging.getLogger(__name__)
+
+MARCA = b"CATSNAP1"
+ENCABEZADO = struct.Struct("<8sI")
+NIVEL_COMPRESION = 3
+
+_ARCHIVO = re.compile(r"^catalogo-(\d+)\.snap$")
+
+# (tabla, tabla SQL, columna de orden, columnas (nombre, columna SQL, tipo, delta))
+TABLAS = (
+    (
+        "secciones",
+        Section.__table__,
+        "id",
+        (
+            ("id", "id", "i4", True),
+            ("cod", "cod", "str", False),
+            ("name", "name", "str", False),
+        ),
+    ),
+    (
+        "familias",
+        Family.__table__,
+        "id",
+        (
+            ("id", "id", "i4", True),
+            ("cod", "cod", "str", False),
+            ("name", "name", "str", False),
+            ("section_id", "section_id", "i4", False),
+        ),
+    ),
+    (
+        "articulos",
+        ArticuloModel.__table__,
+        "id",
+        (
+            ("id", "id", "i4", True),
+            ("cod_short", "cod_short", "str", False),
+            ("name", "name", "str", False),
+            ("family_id", "family_id", "i4", False),
+            ("purchase_price", "purchase_price", "f8", False),
+            ("sale_price", "sale_price", "f8", False),
+            ("und", "und", "str", False),
+            ("tax", "tax", "f8", False),
+        ),
+    ),
+    (
+        "codigos_barras",
+        CodigoBarraModel.__table__,
+        "articulo_id",
+        (
+            ("articulo_id", "articulo_id", "i4", True),
+            ("codigo", "codigos_barras", "str", False),
+        ),
+    ),
+)
+
+_DTYPES = {"i4": "<i4", "f8": "<f8"}
+
+
+def _codificar(valores: list, tipo: str, delta: bool) -> bytes:
+    """Bloque sin comprimir de una columna."""
+    if tipo == "str":
+        textos = [(valor or "").encode() for valor in valores]
+        desplazamientos = np.zeros(len(textos) + 1, dtype="<u4")
+        np.cumsum([len(texto) for texto in textos], out=desplazamientos[1:])
+        return desplazamientos.tobytes() + b"".join(textos)
+    if tipo == "f8":
+        arreglo = np.array(
+            [np.nan if valor is None else valor for valor in valores], dtype="<f8"
+        )
+    else:
+        arreglo = np.array([valor or 0 for valor in valores], dtype=np.int64)
+        if delta:
+            arreglo = np.diff(arreglo, prepend=0)
+        arreglo = arreglo.astype(_DTYPES[tipo])
+    return arreglo.tobytes()
+
+
+def _decodificar(bloque: bytes, tipo: str, delta: bool, filas: int):
+    """Columna a partir de su bloque sin comprimir: arreglo numpy o lista de str."""
+    if tipo == "str":
+        desplazamientos = np.frombuffer(bloque, dtype="<u4", count=filas + 1)
+        textos = bloque[4 * (filas + 1) :]
+        return [
+            textos[inicio:fin].decode()
+            for inicio, fin in zip(
+                desplazamientos[:-1].tolist(), desplazamientos[1:].tolist()
+            )
+        ]
+    arreglo = np.frombuffer(bloque, dtype=_DTYPES[tipo], count=filas)
+    return np.cumsum(arreglo, dtype=arreglo.dtype) if delta else arreglo
+
+
+def escribir_instantanea(ruta: str, version: int, datos: dict) -> dict:
+    """Escribir `datos` ({tabla: {columna: valores}}) en `ruta` de forma atómica
+    y devolver el manifiesto."""
+    manifiesto = {
+        "version": version,
+        "generado": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "tablas": {},
+    }
+    bloques, inicio = [], 0
+    for tabla, _, _, columnas in TABLAS:
+        filas = len(datos[tabla][columnas[0][0]])
+        descripcion = {"filas": filas, "columnas": {}}
+        for nombre, _, tipo, delta in columnas:
+            crudo = _codificar(datos[tabla][nombre], tipo, delta)
+            bloque = zlib.compress(crudo, NIVEL_COMPRESION)
+            descripcion["columnas"][nombre] = {
+                "tipo": tipo,
+                "delta": delta,
+                "inicio": inicio,
+                "largo": len(bloque),
+                "bytes": len(crudo),
+            }
+            bloques.append(bloque)
+            inicio += len(bloque)
+        manifiesto["tablas"][tabla] = descripcion
+    cabecera = json.dumps(manifiesto, separators=(",", ":")).encode()
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as archivo:
+            archivo.write(ENCABEZADO.pack(MARCA, len(cabecera)))
+            archivo.write(cabecera)
+            for bloque in bloques:
+                archivo.write(bloque)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+    return manifiesto
+
+
+def leer_manifiesto(archivo) -> tuple:
+    """(manifiesto, inicio de los bloques) de un archivo abierto en binario."""
+    marca, largo = ENCABEZADO.unpack(archivo.read(ENCABEZADO.size))
+    if marca != MARCA:
+        raise ValueError("El archivo no es una instantánea del catálogo")
+    return json.loads(archivo.read(largo)), ENCABEZADO.size + largo
+
+
+def leer_instantanea(ruta: str) -> tuple:
+    """(versión, {tabla: {columna: valores}}) de una instantánea; decodificador
+    de referencia para los terminales."""
+    with open(ruta, "rb") as archivo:
+        manifiesto, _ = leer_manifiesto(archivo)
+        contenido = archivo.read()
+    tablas = {}
+    for tabla, descripcion in manifiesto["tablas"].items():
+        tablas[tabla] = {
+            nombre: _decodificar(
+                zlib.decompress(
+                    contenido[columna["inicio"] : columna["inicio"] + columna["largo"]]
+                ),
+                columna["tipo"],
+                columna["delta"],
+                descripcion["filas"],
+            )
+            for nombre, columna in descripcion["columnas"].items()
+        }
+    return manifiesto["version"], tablas
+
+
+class Instantaneas:
+    """Generación periódica de instantáneas en un directorio compartido."""
+
+    def __init__(self, directorio: str = None, intervalo=60.0, conservar: int = 2):
+        self.directorio = directorio or None
+        self.intervalo = intervalo
+        self.conservar = max(conservar, 1)
+        self._tarea = None
+        self._pedida = None
+        self.generadas = 0
+        self.errores = 0
+
+    @property
+    def activo(self) -> bool:
+        return self.directorio is not None
+
+    def ruta(self, version: int) -> str:
+        return os.path.join(self.directorio, f"catalogo-{version}.snap")
+
+    def versiones(self) -> list:
+        """Versiones disponibles en el directorio, de la más reciente a la más antigua."""
+        try:
+            nombres = os.listdir(self.directorio)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            (int(m.group(1)) for m in map(_ARCHIVO.match, nombres) if m),
+            reverse=True,
+        )
+
+    def ultima(self):
+        """Versión de la instantánea más reciente, o None si no hay ninguna."""
+        versiones = self.versiones()
+        return versiones[0] if versiones else None
+
+    async def _leer(self, db) -> tuple:
+        """Versión del registro de cambios y columnas de todas las tablas.
+
+        Se consultan las tablas con Core, sin el ORM, que duplicaría el tiempo
+        de lectura en los catálogos grandes.
+        """
+        version = (
+            await db.scalar(
+                select(Contador.valor).where(Contador.nombre == NOMBRE_CONTADOR)
+            )
+            or 0
+        )
+        datos = {}
+        for tabla, tabla_sql, orden, columnas in TABLAS:
+            consulta = (
+                select(*(tabla_sql.c[columna] for _, columna, _, _ in columnas))
+                .where(tabla_sql.c[orden].is_not(None))
+                .order_by(tabla_sql.c[orden])
+            )
+            filas = (await db.execute(consulta)).all()
+            valores = list(zip(*filas)) or [()] * len(columnas)
+            datos[tabla] = {
+                nombre: lista for (nombre, _, _, _), lista in zip(columnas, valores)
+            }
+        await db.commit()
+        return version, datos
+
+    def _bloquear(self):
+        """Lock de archivo entre workers, o None si otro está generando."""
+        archivo = open(os.path.join(self.directorio, ".generacion.lock"), "a+b")
+        try:
+            fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            archivo.close()
+            return None
+        return archivo
+
+    def _limpiar(self):
+        """Borrar las instantáneas que exceden `conservar`."""
+        for version in self.versiones()[self.conservar :]:
+            try:
+                os.remove(self.ruta(version))
+            except FileNotFoundError:
+                pass
+
+    async def generar(self, db, forzar: bool = False):
+        """Generar la instantánea si el catálogo cambió desde la última.
+
+        Devuelve el manifiesto, o None si estaba al día o si otro worker la
+        está generando.
+        """
+        os.makedirs(self.directorio, exist_ok=True)
+        cerrojo = await asyncio.to_thread(self._bloquear)
+        if cerrojo is None:
+            return None
+        try:
+            actual = await db.scalar(
+                select(Contador.valor).where(Contador.nombre == NOMBRE_CONTADOR)
+            )
+            await db.commit()
+            ultima = self.ultima()
+            if not forzar and ultima is not None and ultima >= (actual or 0):
+                return None
+            version, datos = await self._leer(db)
+            manifiesto = await asyncio.to_thread(
+                escribir_instantanea, self.ruta(version), version, datos
+            )
+            await asyncio.to_thread(self._limpiar)
+        finally:
+            cerrojo.close()
+        self.generadas += 1
+        logger.info(
+            "Instantánea del catálogo %d: %d artículos",
+            version,
+            manifiesto["tablas"]["articulos"]["filas"],
+        )
+        return manifiesto
+
+    async def _generar_con_sesion(self):
+        try:
+            async with SessionLocal() as db:
+                await self.generar(db)
+        except Exception:  # pylint: disable=broad-except
+            self.errores += 1
+            logger.exception("No se pudo generar la instantánea del catálogo")
+
+    async def _generar_siempre(self):
+        while True:
+            await self._generar_con_sesion()
+            try:
+                await asyncio.wait_for(self._pedida.wait(), timeout=self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            self._pedida.clear()
+
+    def pedir(self):
+        """Adelantar la próxima comprobación de la tarea."""
+        if self._pedida is not None:
+            self._pedida.set()
+
+    async def iniciar(self):
+        """Lanzar la tarea que mantiene la instantánea al día."""
+        if self.activo and self._tarea is None:
+            self._pedida = asyncio.Event()
+            self._tarea = asyncio.create_task(self._generar_siempre())
+
+    async def cerrar(self):
+        """Detener la tarea (la instantánea en curso se descarta)."""
+        if self._tarea is None:
+            return
+        self._tarea.cancel()
+        try:
+            await self._tarea
+        except asyncio.CancelledError:
+            pass
+        self._tarea = None
+
+    def stats(self) -> dict:
+        """Instantáneas disponibles y contadores de generación."""
+        return {
+            "activo": self.activo,
+            "directorio": self.directorio,
+            "versiones": self.versiones() if self.activo else [],
+            "intervalo": self.intervalo,
+            "generadas": self.generadas,
+            "errores": self.errores,
+        }
+
+
+instantaneas = Instantaneas(
+    directorio=os.getenv("SNAPSHOT_DIR"),
+    intervalo=float(os.getenv("SNAPSHOT_INTERVAL", "60")),
+    conservar=int(os.getenv("SNAPSHOT_KEEP", "2")),
+)
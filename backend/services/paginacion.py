@@ -0,0 +1,24 @@
+"""Cursores opacos para la paginación por clave (keyset)."""
+
+import base64
+import binascii
+
+from fastapi import HTTPException
+
+
+def codificar_cursor(ultimo_id: int) -> str:
+    """Codificar el último ID devuelto como un cursor opaco."""
+    return base64.urlsafe_b64encode(f"id:{ultimo_id}".encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> int:
+    """Obtener el último ID a partir de un cursor generado por codificar_cursor."""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        texto = base64.urlsafe_b64decode(cursor + relleno).decode()
+        prefijo, valor = texto.split(":", 1)
+        if prefijo != "id":
+            raise ValueError(prefijo)
+        return int(valor)
+    except (ValueError, binascii.Error, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail="Cursor inválido") from exc
@@ -0,0 +1,109 @@
+"""Ajuste masivo de precios con una sola sentencia UPDATE.
+
+Los precios nuevos se expresan como columnas calculadas en SQL, de modo que la
+misma expresión sirve para el resumen previo (dry run) y para el UPDATE, sin
+cargar artículos en memoria ni confirmar una transacción por fila.
+"""
+
+from fastapi import HTTPException
+from sqlalchemy import case, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.m_articulo import Articulo as ArticuloModel
+from ..models.m_family import Family
+from ..schemas.sch_articulo import AjustePrecios
+from .cambios import ARTICULO, registrar_cambios
+from .catalogo_plano import refrescar_precios
+from .dimensiones import dimensiones
+
+
+def _ajustar(columna, ajuste: AjustePrecios):
+    """Expresión del precio ajustado, redondeado y nunca negativo."""
+    if ajuste.tipo == "porcentaje":
+        nuevo = columna * (1 + ajuste.valor / 100)
+    else:
+        nuevo = columna + ajuste.valor
+    if ajuste.redondeo:
+        nuevo = func.round(nuevo / ajuste.redondeo) * ajuste.redondeo
+    nuevo = func.round(nuevo, 2)
+    return case((nuevo < 0, literal(0.0)), else_=nuevo)
+
+
+def expresiones_precios(ajuste: AjustePrecios):
+    """Expresiones (compra, venta, subida_por_margen) sobre los precios actuales."""
+    compra = ArticuloModel.purchase_price
+    venta = ArticuloModel.sale_price
+    if ajuste.campo in ("purchase_price", "ambos"):
+        compra = _ajustar(compra, ajuste)
+    if ajuste.campo in ("sale_price", "ambos"):
+        venta = _ajustar(venta, ajuste)
+    por_margen = literal(False)
+    if ajuste.margen_minimo is not None:
+        minimo = func.round(compra * (1 + ajuste.margen_minimo), 2)
+        por_margen = venta < minimo
+        venta = case((por_margen, minimo), else_=venta)
+    return compra, venta, por_margen
+
+
+async def condicion_articulos(db: AsyncSession, ajuste: AjustePrecios):
+    """Condición WHERE para los artículos del ajuste; 404 si el filtro no existe."""
+    if ajuste.cod_shorts is not None:
+        return ArticuloModel.cod_short.in_(ajuste.cod_shorts)
+    if ajuste.family_name is not None:
+        familia_id = await dimensiones.familia(db, ajuste.family_name)
+        if familia_id is None:
+            raise HTTPException(status_code=404, detail="Familia not found")
+        return ArticuloModel.family_id == familia_id
+    seccion_id = await dimensiones.seccion(db, ajuste.section_name)
+    if seccion_id is None:
+        raise HTTPException(status_code=404, detail="Section not found")
+    return ArticuloModel.family_id.in_(
+        select(Family.id).where(Family.section_id == seccion_id)
+    )
+
+
+async def ajustar_precios(db: AsyncSession, ajuste: AjustePrecios) -> dict:
+    """Calcular el impacto del ajuste y, salvo en dry run, aplicarlo.
+
+    El resumen es una consulta agregada; el cambio, un único UPDATE con las
+    mismas expresiones. Ambos en la misma transacción, que se confirma aquí.
+    """
+    condicion = await condicion_articulos(db, ajuste)
+    compra, venta, por_margen = expresiones_precios(ajuste)
+    resumen = (
+        await db.execute(
+            select(
+                func.count(),
+                func.coalesce(func.sum(ArticuloModel.sale_price), 0),
+                func.coalesce(func.sum(venta), 0),
+                func.coalesce(func.sum(ArticuloModel.purchase_price), 0),
+                func.coalesce(func.sum(compra), 0),
+                func.coalesce(func.sum(case((por_margen, 1), else_=0)), 0),
+            ).where(condicion)
+        )
+    ).one()
+    aplicado = not ajuste.dry_run and resumen[0] > 0
+    if aplicado:
+        # La venta se asigna primero: MySQL evalúa el SET de izquierda a derecha
+        # y la expresión del margen debe leer el precio de compra anterior
+        valores = []
+        if ajuste.campo != "purchase_price" or ajuste.margen_minimo is not None:
+            valores.append((ArticuloModel.sale_price, venta))
+        if ajuste.campo != "sale_price":
+            valores.append((ArticuloModel.purchase_price, compra))
+        await db.execute(
+            update(ArticuloModel)
+            .where(condicion)
+            .ordered_values(*valores)
+            .execution_options(synchronize_session=False)
+        )
+        await refrescar_precios(db, condicion)
+        await registrar_cambios(db, ARTICULO, select(ArticuloModel.id).where(condicion))
+        await db.commit()
+    return {
+        "articulos": resumen[0],
+        "sale_price": {"antes": resumen[1], "despues": resumen[2]},
+        "purchase_price": {"antes": resumen[3], "despues": resumen[4]},
+        "ajustados_por_margen": resumen[5],
+        "aplicado": aplicado,
+    }
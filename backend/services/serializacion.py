@@ -0,0 +1,93 @@
+"""Serialización rápida de los listados grandes.
+
+Los listados leen columnas como tuplas, arman diccionarios planos con las
+mismas claves que su esquema y los codifican con orjson en una sola pasada.
+Así se evitan la validación `from_attributes` de cada objeto ORM, la segunda
+validación de FastAPI contra `response_model` y `jsonable_encoder`. Los tipos
+de las columnas (Integer, Float, String) ya garantizan los del esquema; el
+`response_model` de cada ruta se conserva para la documentación OpenAPI.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.m_articulo import (
+    Articulo as ArticuloModel,
+    CodigoBarra as CodigoBarraModel,
+)
+from ..models.m_family import Family
+
+# Columnas de un artículo leídas como tupla
+COLUMNAS_ARTICULO = (
+    "id",
+    "cod_short",
+    "name",
+    "family_id",
+    "purchase_price",
+    "sale_price",
+    "und",
+    "tax",
+    "family_name",
+)
+
+
+def columnas_articulo():
+    """Columnas de `COLUMNAS_ARTICULO` para usar en un select.
+
+    `family_name` es una subconsulta correlacionada por la clave primaria de
+    la familia, así que sirve en cualquier select sobre artículos sin joins.
+    """
+    nombre_familia = (
+        select(Family.name)
+        .where(Family.id == ArticuloModel.family_id)
+        .scalar_subquery()
+        .label("family_name")
+    )
+    return [getattr(ArticuloModel, columna) for columna in COLUMNAS_ARTICULO[:-1]] + [
+        nombre_familia
+    ]
+
+
+def articulo_dict(fila, codigos: list) -> dict:
+    """Artículo con las claves y el orden del esquema `Articulo`."""
+    (
+        id_,
+        cod_short,
+        name,
+        family_id,
+        purchase_price,
+        sale_price,
+        und,
+        tax,
+        family_name,
+    ) = fila
+    return {
+        "cod_short": cod_short,
+        "name": name,
+        "codigos_barras": [{"codigos_barras": codigo} for codigo in codigos],
+        "family_name": family_name,
+        "purchase_price": purchase_price,
+        "sale_price": sale_price,
+        "und": und,
+        "tax": tax,
+        "id": id_,
+        "family_id": family_id,
+    }
+
+
+async def articulos_dict(db: AsyncSession, filas) -> list:
+    """Completar filas de `columnas_articulo()` con sus códigos de barras.
+
+    Los códigos se leen con una sola consulta IN para toda la página.
+    """
+    filas = list(filas)
+    codigos = {fila[0]: [] for fila in filas}
+    if codigos:
+        resultado = await db.execute(
+            select(CodigoBarraModel.articulo_id, CodigoBarraModel.codigos_barras)
+            .where(CodigoBarraModel.articulo_id.in_(list(codigos)))
+            .order_by(CodigoBarraModel.id)
+        )
+        for articulo_id, codigo in resultado:
+            codigos[articulo_id].append(codigo)
+    return [articulo_dict(fila, codigos[fila[0]]) for fila in filas]
@@ -0,0 +1,226 @@
+"""Ingesta de ventas con escritura diferida por lotes.
+
+Los tickets aceptados se guardan en un buffer en memoria y una tarea los
+escribe en la base de datos con INSERT de varias filas cuando el buffer junta
+SALES_FLUSH_LINES líneas o cada SALES_FLUSH_INTERVAL segundos, lo que ocurra
+antes. Si las líneas pendientes llegan a SALES_BUFFER_MAX_LINES, `agregar`
+rechaza los tickets nuevos y la ruta responde 503 hasta que se vacíe.
+
+Los tickets del buffer se pierden si el proceso termina de forma abrupta; al
+cerrar la aplicación se escriben los pendientes. Reenviar un ticket ya escrito,
+o ya pendiente, no lo duplica: (terminal, numero) lo identifica.
+"""
+
+import asyncio
+import logging
+import os
+
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+
+from ..config.db import SessionLocal
+from ..models.m_articulo import Articulo as ArticuloModel
+from ..models.m_venta import Ticket, TicketLinea
+
+logger = logging.getLogger(__name__)
+
+# Cantidad de tickets por consulta al buscar sus IDs
+LOTE_CLAVES = 500
+# Espera tras un error de escritura antes de reintentar
+ESPERA_REINTENTO = 1.0
+
+
+async def articulos_inexistentes(db, ids) -> list:
+    """IDs de artículo que no existen, con una sola consulta."""
+    ids = set(ids)
+    existentes = set(
+        await db.scalars(select(ArticuloModel.id).where(ArticuloModel.id.in_(ids)))
+    )
+    return sorted(ids - existentes)
+
+
+async def _ids_tickets(db, claves: list) -> dict:
+    """{(terminal, numero): id} de los tickets ya escritos."""
+    ids = {}
+    for inicio in range(0, len(claves), LOTE_CLAVES):
+        filas = await db.execute(
+            select(Ticket.terminal, Ticket.numero, Ticket.id).where(
+                tuple_(Ticket.terminal, Ticket.numero).in_(
+                    claves[inicio : inicio + LOTE_CLAVES]
+                )
+            )
+        )
+        ids.update(((terminal, numero), id_) for terminal, numero, id_ in filas)
+    return ids
+
+
+async def escribir_tickets(db, tickets: list) -> int:
+    """Escribir tickets (terminal, numero, fecha, total, lineas) con un INSERT de
+    varias filas para los tickets y otro para sus líneas, y confirmar.
+
+    Se omiten los tickets ya escritos. Devuelve la cantidad de líneas escritas.
+    """
+    por_clave = {}
+    for ticket in tickets:
+        por_clave.setdefault((ticket[0], ticket[1]), ticket)
+    escritos = await _ids_tickets(db, list(por_clave))
+    nuevos = [ticket for clave, ticket in por_clave.items() if clave not in escritos]
+    if not nuevos:
+        await db.commit()
+        return 0
+    await db.execute(
+        insert(Ticket),
+        [
+            {"terminal": terminal, "numero": numero, "fecha": fecha, "total": total}
+            for terminal, numero, fecha, total, _ in nuevos
+        ],
+    )
+    ids = await _ids_tickets(db, [(ticket[0], ticket[1]) for ticket in nuevos])
+    filas_lineas = [
+        {
+            "ticket_id": ids[(terminal, numero)],
+            "articulo_id": articulo_id,
+            "cantidad": cantidad,
+            "precio": precio,
+            "importe": importe,
+        }
+        for terminal, numero, _, _, lineas in nuevos
+        for articulo_id, cantidad, precio, importe in lineas
+    ]
+    await db.execute(insert(TicketLinea), filas_lineas)
+    await db.commit()
+    return len(filas_lineas)
+
+
+class BufferVentas:
+    """Buffer de tickets pendientes de escribir y la tarea que lo vacía."""
+
+    def __init__(self, max_lineas: int = 100000, lote: int = 5000, intervalo=0.5):
+        self.max_lineas = max_lineas
+        self.lote = lote
+        self.intervalo = intervalo
+        self._tickets = []
+        self._lineas = 0
+        self._lleno = None
+        self._escribiendo = None
+        self._tarea = None
+        self.lineas_escritas = 0
+        self.lotes = 0
+        self.rechazados = 0
+        self.descartados = 0
+        self.errores = 0
+
+    @property
+    def pendientes(self) -> int:
+        """Líneas aceptadas que todavía no se escribieron."""
+        return self._lineas
+
+    def agregar(self, tickets: list) -> bool:
+        """Añadir tickets al buffer; False si no hay lugar para todas sus líneas."""
+        lineas = sum(len(ticket[4]) for ticket in tickets)
+        if self._lineas + lineas > self.max_lineas:
+            self.rechazados += len(tickets)
+            return False
+        self._tickets.extend(tickets)
+        self._lineas += lineas
+        if self._lineas >= self.lote and self._lleno is not None:
+            self._lleno.set()
+        return True
+
+    def _tomar_lote(self) -> list:
+        lineas = 0
+        for cantidad, ticket in enumerate(self._tickets, 1):
+            lineas += len(ticket[4])
+            if lineas >= self.lote:
+                break
+        return self._tickets[:cantidad]
+
+    async def _escribir_uno_a_uno(self, tickets: list) -> int:
+        """Escribir cada ticket en su transacción y descartar los que fallen."""
+        escritas = 0
+        for ticket in tickets:
+            try:
+                async with SessionLocal() as db:
+                    escritas += await escribir_tickets(db, [ticket])
+            except IntegrityError as exc:
+                self.descartados += 1
+                logger.error(
+                    "Ticket %s/%s descartado: %s", ticket[0], ticket[1], exc.orig
+                )
+        return escritas
+
+    async def vaciar(self):
+        """Escribir todo lo pendiente por lotes; ante un error de la base de datos
+        se deja el lote en el buffer para el próximo intento."""
+        async with self._escribiendo:
+            while self._tickets:
+                tickets = self._tomar_lote()
+                try:
+                    try:
+                        async with SessionLocal() as db:
+                            escritas = await escribir_tickets(db, tickets)
+                    except IntegrityError:
+                        # Un ticket con un artículo ya borrado, o escrito a la vez
+                        # por otro worker: se aísla para no perder el resto
+                        escritas = await self._escribir_uno_a_uno(tickets)
+                except Exception:  # pylint: disable=broad-except
+                    self.errores += 1
+                    logger.exception("No se pudieron escribir las ventas")
+                    return False
+                del self._tickets[: len(tickets)]
+                self._lineas -= sum(len(ticket[4]) for ticket in tickets)
+                self.lineas_escritas += escritas
+                self.lotes += 1
+        return True
+
+    async def _vaciar_siempre(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._lleno.wait(), timeout=self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            self._lleno.clear()
+            if not await self.vaciar():
+                await asyncio.sleep(ESPERA_REINTENTO)
+
+    async def iniciar(self):
+        """Lanzar la tarea que vacía el buffer."""
+        if self._tarea is None:
+            self._lleno = asyncio.Event()
+            self._escribiendo = asyncio.Lock()
+            self._tarea = asyncio.create_task(self._vaciar_siempre())
+
+    async def cerrar(self):
+        """Detener la tarea y escribir los tickets pendientes."""
+        if self._tarea is None:
+            return
+        self._tarea.cancel()
+        try:
+            await self._tarea
+        except asyncio.CancelledError:
+            pass
+        self._tarea = None
+        if self._tickets and not await self.vaciar():
+            logger.error("Se perdieron %d líneas de venta sin escribir", self._lineas)
+
+    def stats(self) -> dict:
+        """Estado del buffer y contadores de escritura."""
+        return {
+            "pendientes": self._lineas,
+            "tickets_pendientes": len(self._tickets),
+            "max_lineas": self.max_lineas,
+            "lote": self.lote,
+            "intervalo": self.intervalo,
+            "lineas_escritas": self.lineas_escritas,
+            "lotes": self.lotes,
+            "rechazados": self.rechazados,
+            "descartados": self.descartados,
+            "errores": self.errores,
+        }
+
+
+buffer_ventas = BufferVentas(
+    max_lineas=int(os.getenv("SALES_BUFFER_MAX_LINES", "100000")),
+    lote=int(os.getenv("SALES_FLUSH_LINES", "5000")),
+    intervalo=float(os.getenv("SALES_FLUSH_INTERVAL", "0.5")),
+)
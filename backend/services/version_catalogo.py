@@ -0,0 +1,152 @@
+"""Versión del catálogo de secciones y familias y caché de sus listados.
+
+Cada alta, modificación o baja de secciones y familias incrementa la fila
+"catalogo" de la tabla `contadores` dentro de su propia transacción, así que
+todos los workers ven la misma versión. Los listados se guardan ya
+serializados por versión y se sirven con un ETag fuerte; los clientes que
+envían `If-None-Match` reciben 304 sin tocar la base de datos mientras la
+versión leída siga vigente (CATALOG_VERSION_TTL segundos).
+
+Cada cuerpo se guarda con la versión leída en la misma sesión que lo
+construye, no con la guardada: en una réplica atrasada esa versión es la
+anterior y el cuerpo no se sirve como el de la versión vigente.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+
+import orjson
+from fastapi import Request, Response
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config.replicas import LECTURA_PROPIA, origen_sesion
+from ..models.m_contador import Contador
+
+NOMBRE_CONTADOR = "catalogo"
+
+
+class CacheCatalogo:
+    """Versión del catálogo y cuerpos serializados por recurso.
+
+    `contador` es la fila de `contadores` que da la versión.
+    """
+
+    def __init__(self, ttl: float = 1.0, contador: str = NOMBRE_CONTADOR):
+        self.ttl = ttl
+        self.contador = contador
+        self._lock = threading.Lock()
+        self._version = None
+        self._leida = 0.0
+        self._cuerpos = {}  # recurso -> (version, etag, cuerpo)
+        self._construcciones = {}  # recurso -> asyncio.Lock
+
+    async def version(self, db: AsyncSession, releer: bool = False) -> int:
+        """Versión actual; se relee de la base de datos cada `ttl` segundos,
+        o siempre con `releer`."""
+        with self._lock:
+            vigente = time.monotonic() - self._leida < self.ttl
+            if self._version is not None and vigente and not releer:
+                return self._version
+        version = await self.leer(db)
+        with self._lock:
+            self._version = version
+            self._leida = time.monotonic()
+            return self._version
+
+    async def leer(self, db: AsyncSession) -> int:
+        """Versión vista por la sesión `db`, sin pasar por la guardada."""
+        version = await db.scalar(
+            select(Contador.valor).where(Contador.nombre == self.contador)
+        )
+        return version or 0
+
+    async def incrementar(self, db: AsyncSession):
+        """Incrementar la versión en la transacción de `db` (sin commit)."""
+        resultado = await db.execute(
+            update(Contador)
+            .where(Contador.nombre == self.contador)
+            .values(valor=Contador.valor + 1)
+        )
+        if resultado.rowcount == 0:
+            await db.execute(insert(Contador).values(nombre=self.contador, valor=1))
+        self.invalidar()
+
+    def invalidar(self):
+        """Forzar la relectura de la versión en la próxima petición."""
+        with self._lock:
+            self._version = None
+
+    def obtener(self, recurso: str, version: int):
+        """Devolver (etag, cuerpo) si el recurso está en caché para la versión."""
+        with self._lock:
+            entrada = self._cuerpos.get(recurso)
+        if entrada is None or entrada[0] != version:
+            return None
+        return entrada[1], entrada[2]
+
+    def construyendo(self, recurso: str) -> asyncio.Lock:
+        """Cerrojo del recurso: una sola petición lo construye a la vez."""
+        with self._lock:
+            return self._construcciones.setdefault(recurso, asyncio.Lock())
+
+    def guardar(self, recurso: str, version: int, cuerpo: bytes):
+        """Guardar el cuerpo serializado y devolver (etag, cuerpo).
+
+        No reemplaza un cuerpo de una versión posterior.
+        """
+        huella = hashlib.sha1(cuerpo).hexdigest()[:16]
+        etag = f'"{version}-{huella}"'
+        with self._lock:
+            actual = self._cuerpos.get(recurso)
+            if actual is None or actual[0] <= version:
+                self._cuerpos[recurso] = (version, etag, cuerpo)
+        return etag, cuerpo
+
+
+cache_catalogo = CacheCatalogo(ttl=float(os.getenv("CATALOG_VERSION_TTL", "1")))
+
+
+def _coincide_etag(cabecera: str, etag: str) -> bool:
+    """Comprobar una cabecera If-None-Match contra el ETag actual."""
+    if not cabecera:
+        return False
+    etiquetas = [valor.strip() for valor in cabecera.split(",")]
+    return "*" in etiquetas or any(
+        valor.removeprefix("W/") == etag for valor in etiquetas
+    )
+
+
+async def responder_con_cache(
+    request: Request, db: AsyncSession, recurso: str, construir, cache=None
+) -> Response:
+    """Servir un listado del catálogo desde caché, con ETag y soporte de 304.
+
+    `construir` es una corrutina que devuelve los datos planos (dict, list)
+    cuando no hay caché; se codifican una vez con orjson. `cache` es
+    `cache_catalogo` si no se indica otra.
+    """
+    cache = cache or cache_catalogo
+    # Quien acaba de escribir lee la versión del primario, sin la guardada
+    version = await cache.version(db, releer=origen_sesion(db) == LECTURA_PROPIA)
+    entrada = cache.obtener(recurso, version)
+    if entrada is None:
+        # Las peticiones simultáneas esperan al cuerpo que construye la primera
+        async with cache.construyendo(recurso):
+            entrada = cache.obtener(recurso, version)
+            if entrada is None:
+                # El cuerpo se guarda con la versión que ve la sesión que lo
+                # construye: una réplica atrasada no lo publica como actual
+                version_sesion = await cache.leer(db)
+                entrada = cache.obtener(recurso, version_sesion)
+                if entrada is None:
+                    cuerpo = orjson.dumps(await construir())
+                    entrada = cache.guardar(recurso, version_sesion, cuerpo)
+    etag, cuerpo = entrada
+    cabeceras = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _coincide_etag(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=cabeceras)
+    return Response(cuerpo, media_type="application/json", headers=cabeceras)
@@ -0,0 +1 @@
+"""Benchmarks del backend, ejecutados en proceso contra SQLite."""
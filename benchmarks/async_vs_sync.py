@@ -0,0 +1,211 @@
+"""Compara el rendimiento concurrente de la sesión síncrona y la asíncrona.
+
+"antes" reproduce el patrón anterior: una ruta `async def` que usa una
+`Session` síncrona y bloquea el event loop en cada consulta. "despues" usa la
+aplicación real con `AsyncSession`. Ambas ejecutan la misma búsqueda por
+código de barras sobre el mismo archivo SQLite.
+
+`--latencia-ms` añade una espera por sentencia dentro del driver para simular
+la latencia de red de MySQL; sin ella solo se mide el coste local de SQLite.
+
+Uso: python -m benchmarks.async_vs_sync --concurrencia 50 --latencia-ms 2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("BARCODE_CACHE_SIZE", "0")  # medir la base de datos
+
+# pylint: disable=wrong-import-position
+import httpx
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from backend.config.database import Base
+from backend.config.db import _engine_options, get_db
+from backend.models.m_articulo import (
+    Articulo as ArticuloModel,
+    CodigoBarra as CodigoBarraModel,
+)
+from backend.models.m_family import Family
+from backend.models.m_seccion import Section
+from backend.schemas.sch_articulo import Articulo
+from main import app as app_async
+
+
+def conexion_con_latencia(latencia: float):
+    """Fábrica de conexiones sqlite3 que esperan `latencia` segundos por sentencia."""
+
+    class CursorConLatencia(sqlite3.Cursor):
+        """Cursor que simula el tiempo de ida y vuelta a un servidor."""
+
+        def execute(self, *args, **kwargs):
+            time.sleep(latencia)
+            return super().execute(*args, **kwargs)
+
+    class ConexionConLatencia(sqlite3.Connection):
+        """Conexión que devuelve cursores con latencia."""
+
+        def cursor(self, factory=CursorConLatencia):
+            return super().cursor(factory)
+
+    return ConexionConLatencia
+
+
+def poblar(ruta: str, articulos: int) -> list:
+    """Crear el catálogo de prueba y devolver sus códigos de barras."""
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(engine)
+    codigos = [f"775{i:010d}" for i in range(articulos)]
+    with Session(engine) as db:
+        db.execute(insert(Section), [{"id": 1, "cod": "SECC", "name": "Seccion"}])
+        db.execute(
+            insert(Family),
+            [{"id": 1, "cod": "FAMI", "name": "Familia", "section_id": 1}],
+        )
+        db.execute(
+            insert(ArticuloModel),
+            [
+                {
+                    "id": i + 1,
+                    "cod_short": f"{i:06d}",
+                    "name": f"Articulo {i}",
+                    "family_id": 1,
+                    "purchase_price": 1.0,
+                    "sale_price": 1.5,
+                    "und": "UND",
+                }
+                for i in range(articulos)
+            ],
+        )
+        db.execute(
+            insert(CodigoBarraModel),
+            [
+                {"codigos_barras": c, "articulo_id": i + 1}
+                for i, c in enumerate(codigos)
+            ],
+        )
+        db.commit()
+    engine.dispose()
+    return codigos
+
+
+def app_sincrona(ruta: str, latencia: float) -> FastAPI:
+    """Aplicación con el patrón anterior: sesión síncrona dentro de `async def`."""
+    engine = create_engine(
+        f"sqlite:///{ruta}",
+        connect_args={
+            "factory": conexion_con_latencia(latencia),
+            "check_same_thread": False,
+        },
+    )
+    app = FastAPI()
+
+    @app.get("/articulos/codigo/{codigo_barra}")
+    async def read_articulo_by_codigo(codigo_barra: str):
+        with Session(engine) as db:
+            db_articulo = (
+                db.query(ArticuloModel)
+                .join(CodigoBarraModel)
+                .filter(CodigoBarraModel.codigos_barras == codigo_barra)
+                .first()
+            )
+            if db_articulo is None:
+                raise HTTPException(status_code=404, detail="Articulo not found")
+            return Articulo.model_validate(db_articulo, from_attributes=True)
+
+    return app
+
+
+def app_asincrona(ruta: str, latencia: float):
+    """La aplicación real apuntando al mismo archivo SQLite."""
+    url = f"sqlite+aiosqlite:///{ruta}"
+    engine = create_async_engine(
+        url,
+        connect_args={"factory": conexion_con_latencia(latencia)},
+        **_engine_options(url),
+    )
+    sesiones = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def get_db_benchmark():
+        async with sesiones() as db:
+            yield db
+
+    app_async.dependency_overrides[get_db] = get_db_benchmark
+    return app_async, engine
+
+
+async def medir(app: FastAPI, codigos: list, peticiones: int, concurrencia: int):
+    """Lanzar `peticiones` búsquedas con `concurrencia` clientes simultáneos."""
+    latencias = []
+    pendientes = iter(range(peticiones))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as cli:
+
+        async def cliente():
+            for _ in pendientes:
+                codigo = random.choice(codigos)
+                inicio = time.perf_counter()
+                respuesta = await cli.get(f"/articulos/codigo/{codigo}")
+                latencias.append(time.perf_counter() - inicio)
+                respuesta.raise_for_status()
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente() for _ in range(concurrencia)))
+        duracion = time.perf_counter() - inicio
+
+    cuantiles = statistics.quantiles(latencias, n=100)
+    return {
+        "peticiones": peticiones,
+        "req_s": round(peticiones / duracion, 1),
+        "p50_ms": round(cuantiles[49] * 1000, 3),
+        "p95_ms": round(cuantiles[94] * 1000, 3),
+    }
+
+
+async def comparar(ruta: str, codigos: list, args) -> dict:
+    """Medir ambas variantes sobre el mismo catálogo."""
+    latencia = args.latencia_ms / 1000
+    antes = await medir(
+        app_sincrona(ruta, latencia), codigos, args.peticiones, args.concurrencia
+    )
+    app, engine = app_asincrona(ruta, latencia)
+    try:
+        despues = await medir(app, codigos, args.peticiones, args.concurrencia)
+    finally:
+        await engine.dispose()
+    return {
+        "concurrencia": args.concurrencia,
+        "latencia_ms": args.latencia_ms,
+        "antes": antes,
+        "despues": despues,
+    }
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articulos", type=int, default=20000)
+    parser.add_argument("--peticiones", type=int, default=2000)
+    parser.add_argument("--concurrencia", type=int, default=50)
+    parser.add_argument("--latencia-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "benchmark.db")
+        codigos = poblar(ruta, args.articulos)
+        resultado = asyncio.run(comparar(ruta, codigos, args))
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Catálogo sintético y reproducible para los benchmarks.
+
+Genera secciones, familias, artículos y códigos de barras con los modelos de
+la aplicación, junto con el índice de búsqueda y los contadores de códigos,
+de modo que las rutas se comporten como sobre un catálogo real. Con la misma
+semilla y los mismos tamaños el catálogo es idéntico entre ejecuciones.
+"""
+
+import random
+import string
+
+from sqlalchemy import insert
+
+from backend.config.database import Base
+from backend.config.esquema import MIGRACIONES, NOMBRE_CONTADOR, VERSION_ESQUEMA
+from backend.models.m_articulo import (
+    Articulo as ArticuloModel,
+    CodigoBarra as CodigoBarraModel,
+)
+from backend.models.m_busqueda import TerminoBusqueda
+from backend.models.m_contador import Contador
+from backend.models.m_family import Family
+from backend.models.m_seccion import Section
+from backend.services.busqueda import terminos
+from backend.services.codigos import formatear_cod_short
+from backend.services.ean import generar_ean13
+from backend.services.version_catalogo import NOMBRE_CONTADOR as contador_catalogo
+
+TAMANO_LOTE = 20000
+
+MARCAS = (
+    "Gloria Laive Nestle Alicorp Costa Field Donofrio Molitalia Pilsen Cusquena "
+    "Inca Kola Backus Sapolio Bolivar Opal Primor Cocinero Florida Campomar"
+).split()
+PRODUCTOS = (
+    "leche yogurt queso mantequilla galletas chocolate fideos arroz azúcar aceite "
+    "atun cerveza gaseosa agua jabon detergente lejia papel cafe te avena harina "
+    "sal mermelada sardina panetón caramelos refresco vinagre mayonesa"
+).split()
+VARIANTES = (
+    "clasico light entero deslactosado familiar personal fresa vainilla limon "
+    "natural picante integral extra premium economico grande mediano pequeno x6 x12"
+).split()
+
+
+def prefijo(numero: int) -> str:
+    """Cuatro letras distintas por número; las rutas derivan el código de ellas."""
+    letras = []
+    for _ in range(4):
+        numero, resto = divmod(numero, 26)
+        letras.append(string.ascii_uppercase[resto])
+    return "".join(reversed(letras))
+
+
+def nombre_seccion(numero: int) -> str:
+    """Nombre de la sección número `numero`."""
+    return f"{prefijo(numero)} seccion"
+
+
+def nombre_familia(numero: int) -> str:
+    """Nombre de la familia número `numero`."""
+    return f"{prefijo(numero)} familia"
+
+
+def nombre_articulo(rnd: random.Random) -> str:
+    """Nombre de artículo con marca, producto y variante."""
+    return f"{rnd.choice(PRODUCTOS)} {rnd.choice(MARCAS)} {rnd.choice(VARIANTES)}"
+
+
+def _insertar(conn, tabla, filas):
+    for inicio in range(0, len(filas), TAMANO_LOTE):
+        conn.execute(insert(tabla), filas[inicio : inicio + TAMANO_LOTE])
+
+
+def poblar(
+    conn,
+    secciones: int,
+    familias: int,
+    articulos: int,
+    codigos: int,
+    semilla: int = 0,
+    indice: bool = True,
+) -> dict:
+    """Crear el esquema y el catálogo sobre una conexión síncrona.
+
+    Pensada para `AsyncConnection.run_sync`, así sirve tanto para un archivo
+    SQLite como para una base en memoria. Los artículos reciben los números de
+    secuencia 0..articulos-1 y los códigos de barras los 0..codigos-1.
+    """
+    if codigos < articulos:
+        raise ValueError("Se necesita al menos un código de barras por artículo")
+    rnd = random.Random(semilla)
+    Base.metadata.create_all(conn)
+
+    _insertar(
+        conn,
+        Section,
+        [
+            {"id": i + 1, "cod": prefijo(i), "name": nombre_seccion(i)}
+            for i in range(secciones)
+        ],
+    )
+    _insertar(
+        conn,
+        Family,
+        [
+            {
+                "id": i + 1,
+                "cod": prefijo(i),
+                "name": nombre_familia(i),
+                "section_id": i % secciones + 1,
+            }
+            for i in range(familias)
+        ],
+    )
+
+    terminos_por_nombre = {}
+    for inicio in range(0, articulos, TAMANO_LOTE):
+        filas, filas_indice = [], []
+        for i in range(inicio, min(inicio + TAMANO_LOTE, articulos)):
+            nombre = nombre_articulo(rnd)
+            compra = round(rnd.uniform(0.5, 200), 2)
+            filas.append(
+                {
+                    "id": i + 1,
+                    "cod_short": formatear_cod_short(i),
+                    "name": nombre,
+                    "family_id": rnd.randrange(familias) + 1,
+                    "purchase_price": compra,
+                    "sale_price": round(compra * rnd.uniform(1.1, 1.6), 2),
+                    "und": rnd.choice(("UND", "KG", "LT", "PAQ")),
+                    "tax": 0.18,
+                }
+            )
+            if indice:
+                if nombre not in terminos_por_nombre:
+                    terminos_por_nombre[nombre] = terminos(nombre)
+                filas_indice.extend(
+                    {"termino": termino, "articulo_id": i + 1}
+                    for termino in terminos_por_nombre[nombre]
+                )
+        conn.execute(insert(ArticuloModel), filas)
+        _insertar(conn, TerminoBusqueda, filas_indice)
+
+    # El primer código de cada artículo es el suyo; el resto, al azar
+    for inicio in range(0, codigos, TAMANO_LOTE):
+        numeros = range(inicio, min(inicio + TAMANO_LOTE, codigos))
+        filas = []
+        for n, codigo in zip(numeros, generar_ean13(numeros)):
+            articulo = n if n < articulos else rnd.randrange(articulos)
+            filas.append({"codigos_barras": codigo, "articulo_id": articulo + 1})
+        conn.execute(insert(CodigoBarraModel), filas)
+
+    # Catálogo plano y registro de cambios, como en una migración
+    for _version, sentencias in sorted(MIGRACIONES.items()):
+        for sentencia in sentencias():
+            conn.execute(sentencia)
+
+    # Los asignadores continúan después de los códigos ya usados
+    conn.execute(
+        insert(Contador),
+        [
+            {"nombre": NOMBRE_CONTADOR, "valor": VERSION_ESQUEMA},
+            {"nombre": contador_catalogo, "valor": 1},
+            {"nombre": "cod_short", "valor": articulos},
+            {"nombre": "ean13", "valor": codigos},
+        ],
+    )
+    return {
+        "secciones": secciones,
+        "familias": familias,
+        "articulos": articulos,
+        "codigos_barras": codigos,
+        "indice_busqueda": indice,
+        "semilla": semilla,
+    }
@@ -0,0 +1,90 @@
+"""Validación de un archivo de proveedor de códigos de barras.
+
+Genera `--codigos` códigos EAN-13, UPC-A y EAN-8 con una fracción de
+dígitos de control erróneos, caracteres no numéricos y repetidos, y mide la
+validación y la detección de repetidos por lotes (backend.services.ean) frente
+al cálculo código a código en Python.
+
+Uso: python -m benchmarks.ean --codigos 1000000
+"""
+
+import argparse
+import json
+import random
+import time
+
+from backend.services.ean import FORMATOS_CODIGO, pesos, repetidos, validar
+
+
+def archivo_proveedor(cantidad: int, semilla: int) -> list:
+    """Códigos de prueba: ~90 % válidos, el resto erróneos o repetidos."""
+    rnd = random.Random(semilla)
+    pesos_formato = {longitud: pesos(longitud).tolist() for longitud in FORMATOS_CODIGO}
+    longitudes = list(FORMATOS_CODIGO)
+    codigos = []
+    for _ in range(cantidad):
+        longitud = rnd.choice(longitudes)
+        base = [rnd.randrange(10) for _ in range(longitud - 1)]
+        suma = sum(p * digito for p, digito in zip(pesos_formato[longitud], base))
+        control = (10 - suma % 10) % 10
+        azar = rnd.random()
+        if azar < 0.04:
+            control = (control + 1) % 10
+        codigo = "".join(map(str, base)) + str(control)
+        if azar > 0.98:
+            codigo = codigo[:-2] + "X" + codigo[-1]
+        elif 0.96 < azar <= 0.98 and codigos:
+            codigo = rnd.choice(codigos)
+        codigos.append(codigo)
+    return codigos
+
+
+def valido_escalar(codigo: str) -> bool:
+    """Validación código a código, como referencia."""
+    if len(codigo) not in FORMATOS_CODIGO or not codigo.isdigit():
+        return False
+    longitud = len(codigo)
+    suma = sum(
+        (3 if (longitud - 1 - i) % 2 == 1 else 1) * int(n)
+        for i, n in enumerate(codigo[:-1])
+    )
+    return (10 - suma % 10) % 10 == int(codigo[-1])
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--codigos", type=int, default=1000000)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    codigos = archivo_proveedor(args.codigos, args.semilla)
+
+    inicio = time.perf_counter()
+    validos = validar(codigos)
+    validacion = time.perf_counter() - inicio
+    duplicados = repetidos(codigos)
+    deteccion = time.perf_counter() - inicio - validacion
+
+    inicio = time.perf_counter()
+    referencia = [valido_escalar(codigo) for codigo in codigos]
+    escalar = time.perf_counter() - inicio
+
+    print(
+        json.dumps(
+            {
+                "codigos": len(codigos),
+                "validos": int(validos.sum()),
+                "repetidos": len(duplicados),
+                "coinciden": validos.tolist() == referencia,
+                "segundos_validacion": round(validacion, 3),
+                "segundos_repetidos": round(deteccion, 3),
+                "segundos_validacion_escalar": round(escalar, 3),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Memoria y latencia del índice de códigos de barras mapeado en memoria.
+
+Escribe un índice de `--codigos` códigos EAN-13 sintéticos, lo abre con
+backend.services.indice_codigos y mide el tamaño del archivo, la latencia de
+búsquedas sueltas y por lotes, y la memoria que ocuparía en cada worker un
+diccionario de Python con los mismos códigos.
+
+Uso: python -m benchmarks.indice_codigos --codigos 10000000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from backend.services.ean import generar_ean13
+from backend.services.indice_codigos import (
+    IndiceCodigos,
+    clave_codigo,
+    escribir_indice,
+)
+
+
+def memoria_diccionario(codigos: list) -> int:
+    """Bytes de un diccionario {codigo: articulo_id} con los códigos dados."""
+    tracemalloc.start()
+    diccionario = {codigo: i for i, codigo in enumerate(codigos, 1)}
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del diccionario
+    return actual
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--codigos", type=int, default=10000000)
+    parser.add_argument("--busquedas", type=int, default=100000)
+    parser.add_argument("--lote", type=int, default=50)
+    parser.add_argument("--muestra-diccionario", type=int, default=1000000)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+    rnd = random.Random(args.semilla)
+
+    numeros = np.arange(args.codigos, dtype=np.int64) * 7
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "codigos.idx")
+        inicio = time.perf_counter()
+        codigos = generar_ean13(numeros)
+        claves = np.fromiter(map(clave_codigo, codigos), np.int64, len(codigos))
+        os.replace(
+            escribir_indice(ruta, claves, np.arange(1, len(codigos) + 1), 1), ruta
+        )
+        construccion = time.perf_counter() - inicio
+        indice = IndiceCodigos(ruta)
+
+        # Mitad de los códigos buscados existen y mitad no
+        buscados = [
+            (
+                codigos[rnd.randrange(len(codigos))]
+                if i % 2
+                else generar_ean13([args.codigos * 7 + rnd.randrange(10**6)])[0]
+            )
+            for i in range(args.busquedas)
+        ]
+        tiempos = []
+        for codigo in buscados:
+            inicio = time.perf_counter()
+            indice.buscar([codigo])
+            tiempos.append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        for posicion in range(0, len(buscados), args.lote):
+            indice.buscar(buscados[posicion : posicion + args.lote])
+        por_lote = (time.perf_counter() - inicio) / len(buscados)
+
+        muestra = codigos[: args.muestra_diccionario]
+        bytes_diccionario = memoria_diccionario(muestra) * len(codigos) / len(muestra)
+        resultado = {
+            "codigos": len(codigos),
+            "segundos_construccion": round(construccion, 2),
+            "mb_indice": round(os.path.getsize(ruta) / 2**20, 1),
+            "mb_diccionario_por_worker": round(bytes_diccionario / 2**20, 1),
+            "us_busqueda_p50": round(statistics.median(tiempos) * 1e6, 2),
+            "us_busqueda_p99": round(statistics.quantiles(tiempos, n=100)[98] * 1e6, 2),
+            "us_por_codigo_en_lotes": round(por_lote * 1e6, 2),
+        }
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Tamaño y tiempo de carga de la instantánea del catálogo.
+
+Puebla un catálogo sintético en un archivo SQLite, genera la instantánea con
+backend.services.instantanea y mide su tamaño, el tiempo de generación y el de
+decodificarla con `leer_instantanea`. Lo compara con descargar el catálogo
+completo en JSON desde `GET /articulos/export`.
+
+Uso: python -m benchmarks.instantanea --articulos 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from backend.config.db import SessionLocal, dispose_engine, get_engine
+from backend.services.instantanea import Instantaneas, leer_instantanea
+from benchmarks.catalogo import poblar
+
+
+async def exportar_json(app) -> dict:
+    """Bytes y duración de la exportación NDJSON completa."""
+    transport = httpx.ASGITransport(app=app)
+    inicio = time.perf_counter()
+    total = 0
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as cli:
+        async with cli.stream(
+            "GET", "/articulos/export", params={"batch_size": 10000}
+        ) as respuesta:
+            async for trozo in respuesta.aiter_bytes():
+                total += len(trozo)
+    return {"bytes": total, "segundos": round(time.perf_counter() - inicio, 2)}
+
+
+async def ejecutar(args, directorio: str) -> dict:
+    """Poblar el catálogo, generar y leer la instantánea y exportar en JSON."""
+    from main import app  # pylint: disable=import-outside-toplevel
+
+    try:
+        async with get_engine().begin() as conn:
+            await conn.run_sync(
+                poblar,
+                args.secciones,
+                args.familias,
+                args.articulos,
+                args.codigos,
+                0,
+                False,
+            )
+        instantaneas = Instantaneas(os.path.join(directorio, "instantaneas"))
+        inicio = time.perf_counter()
+        async with SessionLocal() as db:
+            manifiesto = await instantaneas.generar(db, forzar=True)
+        generacion = time.perf_counter() - inicio
+        ruta = instantaneas.ruta(manifiesto["version"])
+
+        inicio = time.perf_counter()
+        _, tablas = leer_instantanea(ruta)
+        lectura = time.perf_counter() - inicio
+
+        instantanea = {
+            "bytes": os.path.getsize(ruta),
+            "articulos": len(tablas["articulos"]["id"]),
+            "codigos_barras": len(tablas["codigos_barras"]["codigo"]),
+            "generacion_segundos": round(generacion, 2),
+            "lectura_segundos": round(lectura, 2),
+        }
+        ndjson = await exportar_json(app)
+        return {
+            "instantanea": instantanea,
+            "json": ndjson,
+            "proporcion_bytes": round(instantanea["bytes"] / ndjson["bytes"], 3),
+        }
+    finally:
+        await dispose_engine()
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articulos", type=int, default=1000000)
+    parser.add_argument("--codigos", type=int, default=1300000)
+    parser.add_argument("--familias", type=int, default=2000)
+    parser.add_argument("--secciones", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "instantanea.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{ruta}"
+        resultado = asyncio.run(ejecutar(args, directorio))
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
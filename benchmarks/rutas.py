@@ -0,0 +1,478 @@
+"""Benchmark de carga de las rutas de artículos, catálogo, familias y secciones.
+
+Puebla un catálogo sintético en SQLite (archivo o memoria) y ejecuta cada
+ruta en proceso, con `--concurrencia` clientes simultáneos, contra la
+aplicación real. El resultado es un JSON con el rendimiento y las latencias
+p50/p95/p99 de cada ruta, pensado para comparar ejecuciones entre commits.
+
+Las rutas que modifican datos trabajan sobre registros creados por el propio
+benchmark (artículos, secciones y familias que luego se editan y eliminan), de
+modo que las lecturas siempre ven el catálogo sembrado. Los códigos cortos
+tienen 6 dígitos: con 10**6 artículos sembrados ya no quedan libres y las
+altas responden 409.
+
+Uso:
+    python -m benchmarks.rutas --articulos 1000000 --codigos 1500000 \\
+        --familias 2000 --secciones 50 --concurrencia 20 --salida base.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+
+import httpx
+
+from backend.config.db import get_engine
+from backend.services.paginacion import codificar_cursor
+from backend.services.codigos import formatear_ean13
+from benchmarks.catalogo import (
+    MARCAS,
+    PRODUCTOS,
+    nombre_familia,
+    nombre_seccion,
+    poblar,
+    prefijo,
+)
+
+# Los registros creados por el benchmark usan prefijos fuera del catálogo
+PRIMER_PREFIJO_NUEVO = 26**3 * 20
+
+# Base en memoria compartida entre las conexiones del pool. SQLite bloquea por
+# tabla en este modo, así que las escrituras concurrentes pueden fallar con
+# "database table is locked" y contar como errores; para medir escrituras
+# conviene un archivo.
+URL_MEMORIA = "sqlite+aiosqlite:///file:benchmark?mode=memory&cache=shared&uri=true"
+
+LOTE_CODIGOS = 100
+LOTE_IMPORTACION = 100
+
+
+class Estado:
+    """Datos compartidos entre escenarios: tamaños y registros creados."""
+
+    def __init__(self, catalogo: dict, semilla: int):
+        self.catalogo = catalogo
+        self.rnd = random.Random(semilla)
+        self.articulos_creados = []
+        self.secciones_creadas = []
+        self.ids_secciones = []
+        self.familias_creadas = []
+        self._siguiente_prefijo = PRIMER_PREFIJO_NUEVO
+
+    def nuevo_prefijo(self) -> str:
+        """Prefijo de cuatro letras aún sin usar en secciones ni familias."""
+        self._siguiente_prefijo += 1
+        return prefijo(self._siguiente_prefijo)
+
+    def codigo_existente(self) -> str:
+        """Código de barras sembrado al azar."""
+        return formatear_ean13(self.rnd.randrange(self.catalogo["codigos_barras"]))
+
+    def familia_existente(self) -> str:
+        """Nombre de una familia sembrada al azar."""
+        return nombre_familia(self.rnd.randrange(self.catalogo["familias"]))
+
+    def articulo_nuevo(self) -> dict:
+        """Cuerpo de alta de artículo sin códigos (los asigna el servidor)."""
+        return {
+            "name": f"{self.rnd.choice(PRODUCTOS)} {self.rnd.choice(MARCAS)} bench",
+            "family_name": self.familia_existente(),
+            "purchase_price": 10.0,
+            "sale_price": 14.5,
+            "und": "UND",
+        }
+
+
+# Cada escenario recibe (cliente, estado, índice) y devuelve la respuesta
+
+
+async def _listar_secciones(cli, _estado, _i):
+    return await cli.get("/sections")
+
+
+async def _listar_familias(cli, _estado, _i):
+    return await cli.get("/families")
+
+
+async def _listar_articulos(cli, estado, _i):
+    desde = estado.rnd.randrange(estado.catalogo["articulos"])
+    return await cli.get(
+        "/articulos", params={"limit": 100, "cursor": codificar_cursor(desde)}
+    )
+
+
+async def _exportar_articulos(cli, _estado, _i):
+    return await cli.get("/articulos/export")
+
+
+async def _articulo_por_codigo(cli, estado, _i):
+    return await cli.get(f"/articulos/codigo/{estado.codigo_existente()}")
+
+
+async def _resolver_codigos(cli, estado, _i):
+    codigos = [estado.codigo_existente() for _ in range(LOTE_CODIGOS)]
+    return await cli.post("/articulos/codigos", json={"codigos": codigos})
+
+
+async def _estadisticas_cache(cli, _estado, _i):
+    return await cli.get("/articulos/cache")
+
+
+async def _buscar_por_nombre(cli, estado, _i):
+    texto = f"{estado.rnd.choice(PRODUCTOS)} {estado.rnd.choice(MARCAS)}"
+    return await cli.get(f"/articulos/nombre/{texto}", params={"limit": 50})
+
+
+async def _listar_catalogo(cli, estado, _i):
+    desde = estado.rnd.randrange(estado.catalogo["codigos_barras"])
+    return await cli.get(
+        "/catalogo", params={"limit": 100, "cursor": codificar_cursor(desde)}
+    )
+
+
+async def _catalogo_por_codigo(cli, estado, _i):
+    return await cli.get(f"/catalogo/codigo/{estado.codigo_existente()}")
+
+
+async def _margenes_familias(cli, _estado, _i):
+    return await cli.get("/analitica/familias")
+
+
+async def _margenes_secciones(cli, _estado, _i):
+    return await cli.get("/analitica/secciones")
+
+
+async def _crear_articulo(cli, estado, _i):
+    respuesta = await cli.post("/articulos/", json=estado.articulo_nuevo())
+    if respuesta.status_code == 200:
+        estado.articulos_creados.append(respuesta.json()["id"])
+    return respuesta
+
+
+async def _actualizar_articulo(cli, estado, i):
+    articulo_id = estado.articulos_creados[i % len(estado.articulos_creados)]
+    cuerpo = estado.articulo_nuevo()
+    cuerpo["sale_price"] = 15.0
+    return await cli.put(f"/articulos/{articulo_id}", json=cuerpo)
+
+
+async def _eliminar_articulo(cli, estado, i):
+    return await cli.delete(f"/articulos/{estado.articulos_creados[i]}")
+
+
+async def _importar_articulos(cli, estado, _i):
+    cuerpo = "\n".join(
+        json.dumps(estado.articulo_nuevo()) for _ in range(LOTE_IMPORTACION)
+    )
+    return await cli.post(
+        "/articulos/import",
+        files={"archivo": ("articulos.jsonl", cuerpo.encode(), "application/jsonl")},
+    )
+
+
+async def _crear_seccion(cli, estado, _i):
+    nombre = f"{estado.nuevo_prefijo()} bench"
+    respuesta = await cli.post("/sections", json={"cod": None, "nombre": nombre})
+    if respuesta.status_code == 200:
+        estado.secciones_creadas.append(nombre)
+    return respuesta
+
+
+async def _actualizar_seccion_por_nombre(cli, estado, i):
+    nombre = estado.secciones_creadas[i]
+    estado.secciones_creadas[i] = f"{nombre} editada"
+    return await cli.put(
+        f"/sections/by-name/{nombre}",
+        json={"cod": None, "nombre": estado.secciones_creadas[i]},
+    )
+
+
+async def _actualizar_seccion(cli, estado, i):
+    estado.secciones_creadas[i] = f"{estado.secciones_creadas[i]} 2"
+    return await cli.put(
+        f"/sections/{estado.ids_secciones[i]}",
+        json={"cod": None, "nombre": estado.secciones_creadas[i]},
+    )
+
+
+async def _eliminar_seccion(cli, estado, i):
+    return await cli.delete(f"/sections/{estado.ids_secciones[2 * i]}")
+
+
+async def _eliminar_seccion_por_nombre(cli, estado, i):
+    return await cli.delete(f"/sections/by-name/{estado.secciones_creadas[2 * i + 1]}")
+
+
+async def _crear_familia(cli, estado, _i):
+    nombre = f"{estado.nuevo_prefijo()} bench"
+    seccion = nombre_seccion(estado.rnd.randrange(estado.catalogo["secciones"]))
+    respuesta = await cli.post(
+        "/families",
+        json={"id": None, "cod": "", "name": nombre, "section_name": seccion},
+    )
+    if respuesta.status_code == 200:
+        estado.familias_creadas.append((respuesta.json()["id"], nombre))
+    return respuesta
+
+
+async def _actualizar_familia_por_nombre(cli, estado, i):
+    familia_id, nombre = estado.familias_creadas[i]
+    estado.familias_creadas[i] = (familia_id, f"{nombre} editada")
+    return await cli.put(
+        f"/families/by-name/{nombre}",
+        json={"name": estado.familias_creadas[i][1], "cod": None, "section_name": None},
+    )
+
+
+async def _eliminar_familia(cli, estado, i):
+    return await cli.delete(f"/families/{estado.familias_creadas[2 * i][0]}")
+
+
+async def _eliminar_familia_por_nombre(cli, estado, i):
+    return await cli.delete(
+        f"/families/by-name/{estado.familias_creadas[2 * i + 1][1]}"
+    )
+
+
+async def _cambios(cli, _estado, _i):
+    # El catálogo poblado está en la versión 1; se piden los cambios posteriores
+    return await cli.get("/changes", params={"since": 1})
+
+
+async def _ingerir_tickets(cli, estado, i):
+    rnd = estado.rnd
+    articulos = estado.catalogo["articulos"]
+    tickets = [
+        {
+            "terminal": "BENCH",
+            "numero": f"{i}-{n}",
+            "lineas": [
+                {
+                    "articulo_id": rnd.randrange(articulos) + 1,
+                    "cantidad": 1,
+                    "precio": round(rnd.uniform(0.5, 300), 2),
+                }
+                for _ in range(10)
+            ],
+        }
+        for n in range(10)
+    ]
+    return await cli.post("/ventas/tickets", json={"tickets": tickets})
+
+
+async def _ids_secciones_creadas(cli, estado):
+    """Las altas de sección no devuelven el ID; se obtiene del listado."""
+    secciones = (await cli.get("/sections")).json()["sections"]
+    por_nombre = {seccion["name"]: seccion["id"] for seccion in secciones}
+    estado.ids_secciones = [por_nombre[nombre] for nombre in estado.secciones_creadas]
+
+
+def _creados(atributo, divisor=1, resto=0):
+    """Cantidad de peticiones según los registros creados por otro escenario."""
+    return lambda estado: (len(getattr(estado, atributo)) + resto) // divisor
+
+
+# (ruta, función, fracción de --peticiones o cantidad según el estado)
+ESCENARIOS = [
+    ("GET /sections", _listar_secciones, 1.0),
+    ("GET /families", _listar_familias, 1.0),
+    ("GET /articulos", _listar_articulos, 1.0),
+    ("GET /articulos/export", _exportar_articulos, 0.01),
+    ("GET /articulos/codigo/{codigo_barra}", _articulo_por_codigo, 1.0),
+    ("POST /articulos/codigos", _resolver_codigos, 0.2),
+    ("GET /articulos/cache", _estadisticas_cache, 1.0),
+    ("GET /articulos/nombre/{nombre}", _buscar_por_nombre, 0.2),
+    ("GET /catalogo", _listar_catalogo, 1.0),
+    ("GET /catalogo/codigo/{codigo_barra}", _catalogo_por_codigo, 1.0),
+    ("GET /analitica/familias", _margenes_familias, 0.5),
+    ("GET /analitica/secciones", _margenes_secciones, 0.5),
+    ("POST /articulos/", _crear_articulo, 0.5),
+    (
+        "PUT /articulos/{articulo_id}",
+        _actualizar_articulo,
+        _creados("articulos_creados"),
+    ),
+    (
+        "DELETE /articulos/{articulo_id}",
+        _eliminar_articulo,
+        _creados("articulos_creados"),
+    ),
+    ("POST /articulos/import", _importar_articulos, 0.05),
+    ("POST /sections", _crear_seccion, 0.2),
+    (
+        "PUT /sections/by-name/{section_name}",
+        _actualizar_seccion_por_nombre,
+        _creados("secciones_creadas"),
+    ),
+    ("PUT /sections/{section_id}", _actualizar_seccion, _creados("ids_secciones")),
+    (
+        "DELETE /sections/{section_id}",
+        _eliminar_seccion,
+        _creados("ids_secciones", 2, 1),
+    ),
+    (
+        "DELETE /sections/by-name/{section_name}",
+        _eliminar_seccion_por_nombre,
+        _creados("secciones_creadas", 2),
+    ),
+    ("POST /families", _crear_familia, 0.2),
+    (
+        "PUT /families/by-name/{family_name}",
+        _actualizar_familia_por_nombre,
+        _creados("familias_creadas"),
+    ),
+    (
+        "DELETE /families/{family_id}",
+        _eliminar_familia,
+        _creados("familias_creadas", 2, 1),
+    ),
+    (
+        "DELETE /families/by-name/{family_name}",
+        _eliminar_familia_por_nombre,
+        _creados("familias_creadas", 2),
+    ),
+    ("GET /changes", _cambios, 0.2),
+    ("POST /ventas/tickets", _ingerir_tickets, 0.5),
+]
+
+
+def resumen(latencias: list, duracion: float, errores: int) -> dict:
+    """Rendimiento y percentiles de una serie de latencias (en segundos)."""
+    if len(latencias) > 1:
+        cuantiles = statistics.quantiles(latencias, n=100, method="inclusive")
+        p50, p95, p99 = cuantiles[49], cuantiles[94], cuantiles[98]
+    else:
+        p50 = p95 = p99 = latencias[0] if latencias else 0.0
+    return {
+        "peticiones": len(latencias),
+        "errores": errores,
+        "req_s": round(len(latencias) / duracion, 1) if duracion else 0.0,
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "p99_ms": round(p99 * 1000, 3),
+    }
+
+
+async def medir(cli, estado, funcion, cantidad: int, concurrencia: int) -> dict:
+    """Ejecutar `cantidad` peticiones de un escenario con `concurrencia` clientes."""
+    latencias = []
+    errores = 0
+    pendientes = iter(range(cantidad))
+
+    async def cliente():
+        nonlocal errores
+        for i in pendientes:
+            inicio = time.perf_counter()
+            respuesta = await funcion(cli, estado, i)
+            latencias.append(time.perf_counter() - inicio)
+            if respuesta.status_code >= 400:
+                errores += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(min(concurrencia, cantidad))))
+    return resumen(latencias, time.perf_counter() - inicio, errores)
+
+
+async def ejecutar(args) -> dict:
+    """Poblar el catálogo, levantar la aplicación y medir cada ruta."""
+    from main import app  # pylint: disable=import-outside-toplevel
+
+    inicio = time.perf_counter()
+    async with get_engine().begin() as conn:
+        catalogo = await conn.run_sync(
+            poblar,
+            args.secciones,
+            args.familias,
+            args.articulos,
+            args.codigos,
+            args.semilla,
+            not args.sin_indice,
+        )
+    catalogo["segundos_poblado"] = round(time.perf_counter() - inicio, 1)
+
+    estado = Estado(catalogo, args.semilla)
+    rutas = {}
+    # Las excepciones de la aplicación se cuentan como errores 500
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as cli:
+            for ruta, funcion, cantidad in ESCENARIOS:
+                if funcion is _actualizar_seccion:
+                    await _ids_secciones_creadas(cli, estado)
+                if args.rutas and not any(filtro in ruta for filtro in args.rutas):
+                    continue
+                if callable(cantidad):
+                    total = cantidad(estado)
+                else:
+                    total = max(1, round(args.peticiones * cantidad))
+                if total:
+                    rutas[ruta] = await medir(
+                        cli, estado, funcion, total, args.concurrencia
+                    )
+    return {"catalogo": catalogo, "rutas": rutas}
+
+
+def _commit_actual() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--secciones", type=int, default=50)
+    parser.add_argument("--familias", type=int, default=2000)
+    parser.add_argument("--articulos", type=int, default=100000)
+    parser.add_argument("--codigos", type=int, default=150000)
+    parser.add_argument("--sin-indice", action="store_true")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--peticiones", type=int, default=500)
+    parser.add_argument("--concurrencia", type=int, default=20)
+    parser.add_argument(
+        "--db", help="archivo SQLite (se recrea) o ':memory:'; por defecto, temporal"
+    )
+    parser.add_argument("--rutas", nargs="*", help="medir solo las rutas que contengan")
+    parser.add_argument("--salida", help="guardar el JSON en este archivo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = args.db or os.path.join(directorio, "benchmark.db")
+        if ruta == ":memory:":
+            os.environ["DATABASE_URL"] = URL_MEMORIA
+        else:
+            if os.path.exists(ruta):
+                os.remove(ruta)
+            os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{ruta}"
+        resultado = asyncio.run(ejecutar(args))
+
+    resultado = {
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "concurrencia": args.concurrencia,
+        **resultado,
+    }
+    texto = json.dumps(resultado, indent=2)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto + "\n")
+    print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Coste por fila de la serialización de `GET /articulos`.
+
+"antes" reproduce la ruta anterior: objetos ORM con `selectinload`, validación
+`from_attributes` en `ArticulosResponse`, la segunda validación de FastAPI
+contra `response_model` y `JSONResponse` con `jsonable_encoder`. "despues" usa
+la ruta actual: columnas como tuplas, diccionarios planos y orjson. Se mide por
+separado la consulta y la serialización de páginas de distintos tamaños sobre
+el mismo catálogo SQLite.
+
+Uso: python -m benchmarks.serializacion --articulos 20000 --paginas 100 1000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from backend.config.db import SessionLocal, dispose_engine, get_engine
+from backend.models.m_articulo import Articulo as ArticuloModel
+from backend.schemas.sch_articulo import ArticulosResponse
+from backend.services.serializacion import articulos_dict, columnas_articulo
+from benchmarks.catalogo import poblar
+
+CAMPO_RESPUESTA = create_response_field("respuesta", ArticulosResponse)
+
+
+async def _consulta_antes(db, limite):
+    consulta = (
+        select(ArticuloModel)
+        .options(selectinload(ArticuloModel.codigos_barras))
+        .order_by(ArticuloModel.id)
+        .limit(limite)
+    )
+    return (await db.scalars(consulta)).all()
+
+
+async def _serializar_antes(articulos) -> bytes:
+    respuesta = ArticulosResponse(articulos=articulos, next_cursor=None)
+    contenido = await serialize_response(
+        field=CAMPO_RESPUESTA, response_content=respuesta
+    )
+    return JSONResponse(contenido).body
+
+
+async def _consulta_despues(db, limite):
+    filas = await db.execute(
+        select(*columnas_articulo()).order_by(ArticuloModel.id).limit(limite)
+    )
+    return await articulos_dict(db, filas)
+
+
+async def _serializar_despues(articulos) -> bytes:
+    return ORJSONResponse({"articulos": articulos, "next_cursor": None}).body
+
+
+VARIANTES = {
+    "antes": (_consulta_antes, _serializar_antes),
+    "despues": (_consulta_despues, _serializar_despues),
+}
+
+
+async def medir(consulta, serializar, limite: int, repeticiones: int) -> dict:
+    """Microsegundos por fila (mediana) de la consulta y de la serialización."""
+    tiempos_consulta, tiempos_serializacion = [], []
+    filas = 0
+    for _ in range(repeticiones):
+        async with SessionLocal() as db:
+            inicio = time.perf_counter()
+            articulos = await consulta(db, limite)
+            medio = time.perf_counter()
+            cuerpo = await serializar(articulos)
+            fin = time.perf_counter()
+            await db.commit()
+        filas = len(articulos)
+        tiempos_consulta.append(medio - inicio)
+        tiempos_serializacion.append(fin - medio)
+    por_fila = 1e6 / max(filas, 1)
+    consulta_us = statistics.median(tiempos_consulta) * por_fila
+    serializacion_us = statistics.median(tiempos_serializacion) * por_fila
+    return {
+        "filas": filas,
+        "bytes": len(cuerpo),
+        "consulta_us_fila": round(consulta_us, 2),
+        "serializacion_us_fila": round(serializacion_us, 2),
+        "total_us_fila": round(consulta_us + serializacion_us, 2),
+    }
+
+
+async def ejecutar(args) -> dict:
+    """Poblar el catálogo y medir cada variante con cada tamaño de página."""
+    async with get_engine().begin() as conn:
+        await conn.run_sync(
+            poblar, 10, 100, args.articulos, args.articulos * 3 // 2, 0, False
+        )
+    resultado = {}
+    try:
+        for limite in args.paginas:
+            resultado[limite] = {
+                nombre: await medir(consulta, serializar, limite, args.repeticiones)
+                for nombre, (consulta, serializar) in VARIANTES.items()
+            }
+    finally:
+        await dispose_engine()
+    return resultado
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articulos", type=int, default=20000)
+    parser.add_argument("--paginas", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeticiones", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "serializacion.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{ruta}"
+        resultado = asyncio.run(ejecutar(args))
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Rendimiento sostenido de la ingesta de ventas.
+
+Puebla un catálogo sintético en un archivo SQLite, levanta la aplicación y envía
+`POST /ventas/tickets` desde `--concurrencia` clientes hasta completar
+`--tickets` tickets de `--lineas` líneas, reintentando las respuestas 503. Mide
+las líneas aceptadas por segundo y las líneas escritas por segundo hasta vaciar
+el buffer, y lo compara con escribir una muestra de tickets uno a uno, cada
+uno en su transacción.
+
+Uso: python -m benchmarks.ventas --tickets 20000 --lineas 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+
+from backend.config.db import SessionLocal, dispose_engine, get_engine
+from backend.services.ventas import buffer_ventas, escribir_tickets
+from benchmarks.catalogo import poblar
+
+# Fecha de los tickets escritos fuera de la ruta
+FECHA = datetime(2024, 1, 1)
+
+
+def ticket(rnd: random.Random, terminal: str, numero: int, lineas: int, articulos):
+    """Ticket sintético con `lineas` artículos al azar."""
+    return {
+        "terminal": terminal,
+        "numero": str(numero),
+        "lineas": [
+            {
+                "articulo_id": rnd.randrange(articulos) + 1,
+                "cantidad": rnd.choice((1, 1, 1, 2, 3, 0.5)),
+                "precio": round(rnd.uniform(0.5, 300), 2),
+            }
+            for _ in range(lineas)
+        ],
+    }
+
+
+async def ingerir(cli, args) -> dict:
+    """Enviar todos los tickets y esperar a que el buffer se vacíe."""
+    rechazos = 0
+    por_cliente = args.tickets // args.concurrencia
+
+    async def cliente(numero_cliente):
+        nonlocal rechazos
+        rnd = random.Random(numero_cliente)
+        terminal = f"BENCH{numero_cliente:03d}"
+        for inicio in range(0, por_cliente, args.por_peticion):
+            lote = [
+                ticket(rnd, terminal, numero, args.lineas, args.articulos)
+                for numero in range(
+                    inicio, min(inicio + args.por_peticion, por_cliente)
+                )
+            ]
+            while True:
+                respuesta = await cli.post("/ventas/tickets", json={"tickets": lote})
+                if respuesta.status_code != 503:
+                    respuesta.raise_for_status()
+                    break
+                rechazos += 1
+                await asyncio.sleep(0.05)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(i) for i in range(args.concurrencia)))
+    aceptadas = time.perf_counter() - inicio
+    while buffer_ventas.pendientes:
+        await asyncio.sleep(0.01)
+    escritas = time.perf_counter() - inicio
+    lineas = por_cliente * args.concurrencia * args.lineas
+    return {
+        "lineas": lineas,
+        "lineas_aceptadas_por_segundo": round(lineas / aceptadas),
+        "lineas_escritas_por_segundo": round(lineas / escritas),
+        "respuestas_503": rechazos,
+        "lotes": buffer_ventas.lotes,
+    }
+
+
+async def uno_a_uno(args) -> dict:
+    """Escribir una muestra de tickets, cada uno en su transacción."""
+    rnd = random.Random(-1)
+    muestra = []
+    for numero in range(args.muestra):
+        datos = ticket(rnd, "UNOAUNO", numero, args.lineas, args.articulos)
+        lineas = [
+            (
+                linea["articulo_id"],
+                linea["cantidad"],
+                linea["precio"],
+                linea["cantidad"] * linea["precio"],
+            )
+            for linea in datos["lineas"]
+        ]
+        total = sum(linea[3] for linea in lineas)
+        muestra.append(("UNOAUNO", str(numero), FECHA, total, lineas))
+    inicio = time.perf_counter()
+    for datos in muestra:
+        async with SessionLocal() as db:
+            await escribir_tickets(db, [datos])
+    duracion = time.perf_counter() - inicio
+    return {
+        "lineas": args.muestra * args.lineas,
+        "lineas_escritas_por_segundo": round(args.muestra * args.lineas / duracion),
+    }
+
+
+async def ejecutar(args) -> dict:
+    """Poblar el catálogo y medir la ingesta con y sin buffer."""
+    from main import app  # pylint: disable=import-outside-toplevel
+
+    async with get_engine().begin() as conn:
+        await conn.run_sync(poblar, 10, 100, args.articulos, args.articulos, 0, False)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as cli:
+            con_buffer = await ingerir(cli, args)
+    try:
+        return {"con_buffer": con_buffer, "uno_a_uno": await uno_a_uno(args)}
+    finally:
+        await dispose_engine()
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articulos", type=int, default=10000)
+    parser.add_argument("--tickets", type=int, default=20000)
+    parser.add_argument("--lineas", type=int, default=10)
+    parser.add_argument("--por-peticion", type=int, default=20)
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--muestra", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "ventas.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{ruta}"
+        resultado = asyncio.run(ejecutar(args))
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,52 @@
 """
 Este modulo es principal"""
+
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.routes.r_seccion import Seccion
 from backend.routes.r_family import Familia
 from backend.routes.r_articulo import articulo_router
-from backend.config.db import Base, engine
+from backend.routes.r_catalogo import Catalogo
+from backend.routes.r_analitica import Analitica
+from backend.routes.r_cambios import Cambios
+from backend.routes.r_sistema import Sistema
+from backend.routes.r_ventas import Ventas
+from backend.config.db import dispose_engine
+from backend.config.esquema import verificar_esquema
+from backend.config.metricas import MetricasMiddleware
+from backend.config.monitor import RutaActualMiddleware
+from backend.config.replicas import LecturaPropiaMiddleware, replicas
+from backend.services.dimensiones import dimensiones
+from backend.services.indice_codigos import indice_codigos
+from backend.services.instantanea import instantaneas
+from backend.services.ventas import buffer_ventas
 
 
-# Función para crear las tablas
-def create_tables():
-    """create tables"""
-    Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Comprobar el esquema y las réplicas, cargar las familias y secciones,
+    construir el índice de códigos y lanzar la escritura de ventas y la de
+    instantáneas al iniciar; escribir las ventas pendientes y liberar los pools
+    al terminar"""
+    try:
+        await verificar_esquema()
+        await replicas.iniciar()
+        await dimensiones.iniciar()
+        await indice_codigos.iniciar()
+        await buffer_ventas.iniciar()
+        await instantaneas.iniciar()
+        yield
+    finally:
+        await instantaneas.cerrar()
+        await buffer_ventas.cerrar()
+        await indice_codigos.cerrar()
+        await replicas.cerrar()
+        await dispose_engine()
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Configuración de CORS
 app.add_middleware(
@@ -24,10 +56,19 @@ app.add_middleware(
     allow_methods=["*"],  # Permite todos los métodos
     allow_headers=["*"],  # Permite todos los headers
 )
+# Guarda la ruta en curso para atribuir conexiones y sesiones abiertas
+app.add_middleware(RutaActualMiddleware)
+# Latencia y sentencias SQL por ruta, expuestas en /metrics
+app.add_middleware(MetricasMiddleware)
+# Tras una escritura, el cliente lee del primario durante unos segundos
+app.add_middleware(LecturaPropiaMiddleware)
 
 
-create_tables()
-
 app.include_router(Seccion)
 app.include_router(Familia)
 app.include_router(articulo_router)
+app.include_router(Catalogo)
+app.include_router(Analitica)
+app.include_router(Cambios)
+app.include_router(Ventas)
+app.include_router(Sistema)
@@ -0,0 +1,51 @@
+"""Fixtures comunes: la aplicación sobre una base SQLite temporal."""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+_DIRECTORIO = tempfile.TemporaryDirectory()
+# Antes de importar la aplicación: el engine y los servicios leen el entorno
+os.environ["DATABASE_URL"] = (
+    f"sqlite+aiosqlite:///{os.path.join(_DIRECTORIO.name, 'tests.db')}"
+)
+os.environ.pop("BARCODE_INDEX_PATH", None)
+os.environ.pop("SNAPSHOT_DIR", None)
+os.environ.pop("DATABASE_REPLICA_URLS", None)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from backend.config.db import get_engine  # noqa: E402
+from main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def cliente():
+    """Cliente HTTP con la aplicación arrancada (lifespan incluido)."""
+    with TestClient(app) as cli:
+        yield cli
+    _DIRECTORIO.cleanup()
+
+
+@pytest.fixture
+def sentencias():
+    """Contexto que devuelve las sentencias SQL ejecutadas dentro de él."""
+
+    @contextmanager
+    def contar():
+        ejecutadas = []
+
+        def registrar(_conn, _cursor, sentencia, *_):
+            ejecutadas.append(sentencia)
+
+        motor = get_engine().sync_engine
+        event.listen(motor, "before_cursor_execute", registrar)
+        try:
+            yield ejecutadas
+        finally:
+            event.remove(motor, "before_cursor_execute", registrar)
+
+    return contar
@@ -0,0 +1,42 @@
+"""Altas de secciones, familias y artículos por la API para las pruebas."""
+
+import json
+
+
+def crear_seccion(cliente, nombre: str):
+    """Alta de una sección por la API."""
+    respuesta = cliente.post("/sections", json={"cod": None, "nombre": nombre})
+    assert respuesta.status_code == 200, respuesta.text
+
+
+def crear_familia(cliente, nombre: str, seccion: str):
+    """Alta de una familia por la API."""
+    respuesta = cliente.post(
+        "/families",
+        json={"id": None, "cod": "", "name": nombre, "section_name": seccion},
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()
+
+
+def importar_articulos(cliente, familia: str, cantidad: int, prefijo: str):
+    """Alta de `cantidad` artículos de la familia con una importación JSONL."""
+    filas = (
+        json.dumps(
+            {
+                "name": f"{prefijo} {numero}",
+                "family_name": familia,
+                "purchase_price": 1,
+                "sale_price": 2,
+                "und": "u",
+                "tax": 0.18,
+            }
+        )
+        for numero in range(cantidad)
+    )
+    respuesta = cliente.post(
+        "/articulos/import",
+        files={"archivo": ("articulos.jsonl", "\n".join(filas), "application/jsonl")},
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["creados"] == cantidad, respuesta.json()
@@ -0,0 +1,71 @@
+"""Informes de márgenes y precios por familia y por sección."""
+
+import pytest
+
+from datos import crear_familia, crear_seccion
+
+
+def _crear_articulo(cliente, familia: str, compra: float, venta: float, tax: float):
+    respuesta = cliente.post(
+        "/articulos/",
+        json={
+            "name": f"Analizado {familia} {venta}",
+            "family_name": familia,
+            "purchase_price": compra,
+            "sale_price": venta,
+            "und": "u",
+            "tax": tax,
+        },
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()
+
+
+def _informe(cliente, ruta: str, clave: str, nombre: str) -> dict:
+    respuesta = cliente.get(ruta)
+    assert respuesta.status_code == 200, respuesta.text
+    return {fila["name"]: fila for fila in respuesta.json()[clave]}[nombre]
+
+
+def test_margenes_y_tramos_por_familia_y_seccion(cliente):
+    crear_seccion(cliente, "Analizada")
+    crear_familia(cliente, "Quesos", "Analizada")
+    crear_familia(cliente, "Embutidos", "Analizada")
+    _crear_articulo(cliente, "Quesos", 1, 2, 0)  # 50 %, 2 con impuesto
+    _crear_articulo(cliente, "Quesos", 3, 4, 0.25)  # 25 %, 5 con impuesto
+    embutido = _crear_articulo(cliente, "Embutidos", 8, 10, 0)  # 20 %, 10
+
+    quesos = _informe(cliente, "/analitica/familias", "familias", "Quesos")
+    assert quesos["section_name"] == "Analizada"
+    assert quesos["articulos"] == 2
+    assert quesos["margen"] == {"articulos": 2, "promedio": 37.5, "min": 25, "max": 50}
+    precio = quesos["precio_con_impuesto"]
+    assert (precio["promedio"], precio["min"], precio["max"]) == (3.5, 2, 5)
+    # Tramos [0, 1), [1, 2), [2, 5), [5, 10), ...
+    assert precio["distribucion"][:5] == [0, 0, 1, 1, 0]
+
+    seccion = _informe(cliente, "/analitica/secciones", "secciones", "Analizada")
+    assert seccion["articulos"] == 3
+    assert seccion["margen"]["promedio"] == pytest.approx(31.67)
+    assert (seccion["margen"]["min"], seccion["margen"]["max"]) == (20, 50)
+    assert seccion["precio_con_impuesto"]["distribucion"][:6] == [0, 0, 1, 1, 1, 0]
+
+    # Sin cambios se responde 304; un cambio de precio recalcula el informe
+    etag = cliente.get("/analitica/secciones").headers["etag"]
+    respuesta = cliente.get("/analitica/secciones", headers={"If-None-Match": etag})
+    assert respuesta.status_code == 304
+    cliente.put(
+        f"/articulos/{embutido['id']}",
+        json={
+            "name": embutido["name"],
+            "purchase_price": 8,
+            "sale_price": 16,
+            "und": "u",
+            "tax": 0,
+        },
+    )
+    respuesta = cliente.get("/analitica/secciones", headers={"If-None-Match": etag})
+    assert respuesta.status_code == 200
+    seccion = {fila["name"]: fila for fila in respuesta.json()["secciones"]}
+    assert seccion["Analizada"]["margen"]["max"] == 50
+    assert seccion["Analizada"]["margen"]["promedio"] == pytest.approx(41.67)
@@ -0,0 +1,46 @@
+"""Alta de artículos."""
+
+from backend.routes import r_articulo
+from datos import crear_familia, crear_seccion
+
+ARTICULO = {"purchase_price": 1, "sale_price": 2, "und": "u", "tax": 0.18}
+
+
+def test_codigo_registrado_por_otra_alta_simultanea(cliente, monkeypatch):
+    crear_seccion(cliente, "Ferreteria")
+    crear_familia(cliente, "Tornillos", "Ferreteria")
+    respuesta = cliente.post(
+        "/articulos/",
+        json={"name": "Tornillo 4mm", "family_name": "Tornillos", **ARTICULO},
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    codigo = respuesta.json()["codigos_barras"][0]["codigos_barras"]
+
+    # La otra alta confirma el código entre la revisión y el INSERT
+    revisar_codigos = r_articulo.revisar_codigos
+    revisiones = []
+
+    async def revisar_antes_de_la_otra_alta(db, codigos):
+        revision = await revisar_codigos(db, codigos)
+        if not revisiones:
+            revision["existentes"] = []
+        revisiones.append(revision)
+        return revision
+
+    monkeypatch.setattr(r_articulo, "revisar_codigos", revisar_antes_de_la_otra_alta)
+    respuesta = cliente.post(
+        "/articulos/",
+        json={
+            "name": "Tornillo 5mm",
+            "family_name": "Tornillos",
+            "codigos_barras": [{"codigos_barras": codigo}],
+            **ARTICULO,
+        },
+    )
+    assert respuesta.status_code == 400, respuesta.text
+    assert respuesta.json()["detail"] == f"Código de barras duplicado: ['{codigo}']"
+    assert len(revisiones) == 2
+
+    # No queda un artículo sin códigos
+    respuesta = cliente.get("/articulos/nombre/Tornillo")
+    assert [articulo["name"] for articulo in respuesta.json()] == ["Tornillo 4mm"]
@@ -0,0 +1,80 @@
+"""Caché de búsquedas por código de barras."""
+
+import os
+import sqlite3
+
+from backend.services.cache_codigos import CacheCodigos
+from backend.services.cambios import cache_cambios
+from datos import crear_familia, crear_seccion
+
+ARTICULO = {"purchase_price": 1, "sale_price": 2, "und": "u", "tax": 0.18}
+
+
+def _crear_articulo(cliente, nombre: str, familia: str) -> dict:
+    respuesta = cliente.post(
+        "/articulos/", json={"name": nombre, "family_name": familia, **ARTICULO}
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()
+
+
+def test_cambios_por_la_api_visibles_en_la_siguiente_busqueda(cliente):
+    crear_seccion(cliente, "Panaderia")
+    crear_familia(cliente, "Panes", "Panaderia")
+    articulo = _crear_articulo(cliente, "Pan De Molde", "Panes")
+    codigo = articulo["codigos_barras"][0]["codigos_barras"]
+
+    assert cliente.get(f"/articulos/codigo/{codigo}").json()["sale_price"] == 2
+    aciertos = cliente.get("/articulos/cache").json()["hits"]
+    assert cliente.get(f"/articulos/codigo/{codigo}").json()["sale_price"] == 2
+    assert cliente.get("/articulos/cache").json()["hits"] == aciertos + 1
+
+    respuesta = cliente.put(
+        f"/articulos/{articulo['id']}",
+        json={"name": "Pan De Molde", **ARTICULO, "sale_price": 2.5},
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    assert cliente.get(f"/articulos/codigo/{codigo}").json()["sale_price"] == 2.5
+    lote = cliente.post("/articulos/codigos", json={"codigos": [codigo]}).json()
+    assert lote["encontrados"][0]["articulo"]["sale_price"] == 2.5
+
+    assert cliente.delete(f"/articulos/{articulo['id']}").status_code == 200
+    assert cliente.get(f"/articulos/codigo/{codigo}").status_code == 404
+    lote = cliente.post("/articulos/codigos", json={"codigos": [codigo]}).json()
+    assert lote["desconocidos"] == [codigo]
+
+
+def test_cambio_de_otro_worker_invalida_por_version(cliente):
+    crear_seccion(cliente, "Lacteos")
+    crear_familia(cliente, "Yogures", "Lacteos")
+    articulo = _crear_articulo(cliente, "Yogur Natural", "Yogures")
+    codigo = articulo["codigos_barras"][0]["codigos_barras"]
+    assert cliente.get(f"/articulos/codigo/{codigo}").json()["sale_price"] == 2
+
+    # Otro worker cambia el precio: este proceso no invalida nada
+    ruta = os.environ["DATABASE_URL"].split("///", 1)[1]
+    with sqlite3.connect(ruta) as conexion:
+        conexion.execute(
+            "UPDATE catalogo_plano SET sale_price = 3 WHERE articulo_id = ?",
+            (articulo["id"],),
+        )
+        conexion.execute(
+            "UPDATE contadores SET valor = valor + 1 WHERE nombre = 'cambios'"
+        )
+    assert cliente.get(f"/articulos/codigo/{codigo}").json()["sale_price"] == 2
+
+    # Al releer la versión (CATALOG_VERSION_TTL) la entrada deja de servirse
+    cache_cambios.invalidar()
+    assert cliente.get(f"/articulos/codigo/{codigo}").json()["sale_price"] == 3
+
+
+def test_lectura_anterior_a_una_invalidacion_no_se_guarda():
+    cache = CacheCodigos()
+    etiqueta = cache.etiqueta(7)
+    cache.invalidar_articulo(1)  # Se confirma una escritura durante la lectura
+    cache.set("779", 1, "viejo", etiqueta)
+    assert cache.get("779", 7) is None
+
+    cache.set("779", 1, "nuevo", cache.etiqueta(7))
+    assert cache.get("779", 7) == "nuevo"
+    assert cache.get("779", 8) is None
@@ -0,0 +1,64 @@
+"""Cantidad de consultas de los listados: sin N+1 por artículo ni por familia."""
+
+from datos import crear_familia, crear_seccion, importar_articulos
+
+
+def _sin_version(ejecutadas):
+    """Sentencias sin la lectura de la versión del catálogo (`contadores`)."""
+    return [sentencia for sentencia in ejecutadas if "contadores" not in sentencia]
+
+
+def test_pagina_de_articulos_cuesta_dos_consultas(cliente, sentencias):
+    crear_seccion(cliente, "Consultas")
+    crear_familia(cliente, "Listados", "Consultas")
+    importar_articulos(cliente, "Listados", 120, "Listado")
+
+    with sentencias() as ejecutadas:
+        respuesta = cliente.get("/articulos", params={"limit": 100})
+
+    assert respuesta.status_code == 200
+    articulos = respuesta.json()["articulos"]
+    assert len(articulos) == 100
+    assert all(articulo["codigos_barras"] for articulo in articulos)
+    # Otras pruebas pueden haber dado de alta artículos antes que estos
+    listados = [a for a in articulos if a["name"].startswith("Listado ")]
+    assert listados
+    assert {articulo["family_name"] for articulo in listados} == {"Listados"}
+    # Una consulta para la página y otra, con IN, para sus códigos de barras
+    assert len(ejecutadas) == 2, ejecutadas
+
+
+def test_listado_de_familias_cuesta_una_consulta(cliente, sentencias):
+    crear_seccion(cliente, "Familias")
+    for nombre in ("Primera", "Segunda", "Tercera"):
+        crear_familia(cliente, nombre, "Familias")
+
+    with sentencias() as ejecutadas:
+        respuesta = cliente.get("/families")
+
+    assert respuesta.status_code == 200
+    familias = {f["name"]: f for f in respuesta.json()["families"]}
+    assert familias["Segunda"]["section_name"] == "Familias"
+    # Las familias y el nombre de su sección salen de un solo SELECT con join
+    assert len(_sin_version(ejecutadas)) == 1, ejecutadas
+
+    # Mientras la versión no cambie, el listado se sirve desde memoria
+    with sentencias() as ejecutadas:
+        assert cliente.get("/families").status_code == 200
+    assert _sin_version(ejecutadas) == []
+
+
+def test_busqueda_por_nombre_cuesta_tres_consultas(cliente, sentencias):
+    crear_seccion(cliente, "Busquedas")
+    crear_familia(cliente, "Buscables", "Busquedas")
+    importar_articulos(cliente, "Buscables", 60, "Buscable")
+
+    with sentencias() as ejecutadas:
+        respuesta = cliente.get("/articulos/nombre/buscable", params={"limit": 50})
+
+    assert respuesta.status_code == 200
+    articulos = respuesta.json()
+    assert len(articulos) == 50
+    assert all(articulo["codigos_barras"] for articulo in articulos)
+    # IDs por relevancia en el índice, la página de artículos y sus códigos
+    assert len(ejecutadas) == 3, ejecutadas
@@ -0,0 +1,87 @@
+"""Caché de familias y secciones por nombre."""
+
+import os
+import sqlite3
+
+from backend.services.version_catalogo import cache_catalogo
+from datos import crear_familia, crear_seccion
+
+ARTICULO = {"purchase_price": 1, "sale_price": 2, "und": "u", "tax": 0.18}
+
+
+def _alta(cliente, familia: str):
+    return cliente.post(
+        "/articulos/",
+        json={"name": f"Articulo de {familia}", "family_name": familia, **ARTICULO},
+    )
+
+
+def _ejecutar(sentencia: str, *parametros):
+    """Escritura de otro worker: cambia la base y la versión del catálogo."""
+    with sqlite3.connect(os.environ["DATABASE_URL"].split("///", 1)[1]) as conexion:
+        conexion.execute(sentencia, parametros)
+        conexion.execute(
+            "UPDATE contadores SET valor = valor + 1 WHERE nombre = 'catalogo'"
+        )
+
+
+def test_altas_sin_consultar_familias_ni_secciones(cliente, sentencias):
+    crear_seccion(cliente, "Dimensiones")
+    crear_familia(cliente, "Cacheadas", "Dimensiones")
+    assert _alta(cliente, "Cacheadas").status_code == 200
+
+    with sentencias() as ejecutadas:
+        assert _alta(cliente, "Cacheadas").status_code == 200
+    assert not [
+        sentencia
+        for sentencia in ejecutadas
+        if sentencia.lstrip().startswith("SELECT")
+        and ("FROM families" in sentencia or "FROM sections" in sentencia)
+    ], ejecutadas
+
+
+def test_renombrar_familia_y_seccion(cliente):
+    crear_seccion(cliente, "Renombrable")
+    crear_familia(cliente, "Original", "Renombrable")
+    assert _alta(cliente, "Original").status_code == 200
+    cargas = cliente.get("/families/cache").json()["cargas"]
+
+    respuesta = cliente.put(
+        "/families/by-name/Original",
+        json={"name": "Renombrada", "cod": None, "section_name": None},
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    assert _alta(cliente, "Original").status_code == 404
+    assert _alta(cliente, "Renombrada").status_code == 200
+    assert cliente.get("/families/cache").json()["cargas"] > cargas
+
+    respuesta = cliente.put(
+        "/sections/by-name/Renombrable", json={"nombre": "Movida", "cod": None}
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    crear_familia(cliente, "Trasladada", "Movida")
+    respuesta = cliente.post(
+        "/families",
+        json={"id": None, "cod": "", "name": "Perdida", "section_name": "Renombrable"},
+    )
+    assert respuesta.status_code == 404
+
+
+def test_cambios_de_otro_worker(cliente):
+    crear_seccion(cliente, "Compartida")
+    crear_familia(cliente, "Remota", "Compartida")
+    assert _alta(cliente, "Remota").status_code == 200
+
+    # Un nombre desconocido relee la versión antes de responder 404
+    _ejecutar(
+        "INSERT INTO families (cod, name, section_id) "
+        "SELECT 'NUEV', 'Nueva Remota', section_id FROM families WHERE name = ?",
+        "Remota",
+    )
+    assert _alta(cliente, "Nueva Remota").status_code == 200
+
+    # Un nombre conocido se sirve de la caché hasta releer la versión
+    _ejecutar("UPDATE families SET name = 'Remota Renombrada' WHERE name = 'Remota'")
+    cache_catalogo.invalidar()  # Vence CATALOG_VERSION_TTL
+    assert _alta(cliente, "Remota").status_code == 404
+    assert _alta(cliente, "Remota Renombrada").status_code == 200
@@ -0,0 +1,135 @@
+"""Familias sin sección y artículos sin familia tras dar de baja la suya."""
+
+from backend.services.instantanea import instantaneas, leer_instantanea
+from datos import crear_familia, crear_seccion
+
+
+def test_actualizar_familia_desvinculada_de_su_seccion(cliente):
+    crear_seccion(cliente, "Desvinculada")
+    crear_familia(cliente, "Refrescos", "Desvinculada")
+
+    respuesta = cliente.delete("/sections/by-name/Desvinculada")
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["familias_movidas"] == 1
+
+    respuesta = cliente.put(
+        "/families/by-name/Refrescos",
+        json={"name": "Refrescos Sin Azucar", "cod": None, "section_name": None},
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json() == {
+        "id": respuesta.json()["id"],
+        "cod": "REFR",
+        "name": "Refrescos Sin Azucar",
+        "section_name": None,
+    }
+    familias = {f["name"]: f for f in cliente.get("/families").json()["families"]}
+    assert familias["Refrescos Sin Azucar"]["section_id"] is None
+
+
+def _crear_articulo(cliente, nombre: str, familia: str) -> dict:
+    respuesta = cliente.post(
+        "/articulos/",
+        json={
+            "name": nombre,
+            "family_name": familia,
+            "purchase_price": 1,
+            "sale_price": 2,
+            "und": "u",
+            "tax": 0.18,
+        },
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()
+
+
+def test_articulos_de_una_familia_eliminada(cliente):
+    crear_seccion(cliente, "Limpieza")
+    crear_familia(cliente, "Detergentes", "Limpieza")
+    articulo = _crear_articulo(cliente, "Detergente Liquido", "Detergentes")
+    otro = _crear_articulo(cliente, "Detergente En Polvo", "Detergentes")
+    codigo = articulo["codigos_barras"][0]["codigos_barras"]
+
+    # Por omisión los artículos se desvinculan: quedan con family_id nulo
+    respuesta = cliente.delete("/families/by-name/Detergentes")
+    assert respuesta.status_code == 204, respuesta.text
+
+    respuesta = cliente.get(f"/articulos/codigo/{codigo}")
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["family_id"] is None
+    assert respuesta.json()["family_name"] is None
+
+    respuesta = cliente.post("/articulos/codigos", json={"codigos": [codigo]})
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["encontrados"][0]["articulo"]["family_id"] is None
+
+    respuesta = cliente.put(
+        f"/articulos/{articulo['id']}",
+        json={
+            "name": "Detergente Liquido 1L",
+            "purchase_price": 1.5,
+            "sale_price": 3,
+            "und": "u",
+            "tax": 0.18,
+        },
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["family_id"] is None
+    assert cliente.get(f"/articulos/codigo/{codigo}").json()["sale_price"] == 3
+
+    respuesta = cliente.delete(f"/articulos/{otro['id']}")
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["family_id"] is None
+
+
+def test_familias_de_una_seccion_eliminada(cliente):
+    crear_seccion(cliente, "Perfumeria")
+    familia = crear_familia(cliente, "Colonias", "Perfumeria")
+    articulo = _crear_articulo(cliente, "Colonia Lavanda", "Colonias")
+    codigo = articulo["codigos_barras"][0]["codigos_barras"]
+
+    respuesta = cliente.delete("/sections/by-name/Perfumeria")
+    assert respuesta.status_code == 200, respuesta.text
+
+    familias = {f["name"]: f for f in cliente.get("/families").json()["families"]}
+    assert familias["Colonias"]["section_id"] is None
+    assert familias["Colonias"]["section_name"] is None
+
+    # Las filas planas se regeneran sin sección
+    respuesta = cliente.get(f"/catalogo/codigo/{codigo}")
+    assert respuesta.status_code == 200, respuesta.text
+    fila = respuesta.json()
+    assert (fila["family_id"], fila["section_id"]) == (familia["id"], None)
+    assert fila["section_name"] is None
+    filas = cliente.get("/catalogo", params={"family_id": familia["id"]}).json()
+    assert [item["section_id"] for item in filas["items"]] == [None]
+
+    respuesta = cliente.get("/analitica/familias")
+    assert respuesta.status_code == 200, respuesta.text
+    por_nombre = {f["name"]: f for f in respuesta.json()["familias"]}
+    assert por_nombre["Colonias"]["section_id"] is None
+    assert cliente.get("/analitica/secciones").status_code == 200
+
+
+def test_instantanea_con_ids_nulos(cliente, tmp_path, monkeypatch):
+    crear_seccion(cliente, "Jardineria")
+    familia = crear_familia(cliente, "Semillas", "Jardineria")
+    crear_familia(cliente, "Macetas", "Jardineria")
+    articulo = _crear_articulo(cliente, "Maceta De Barro", "Macetas")
+    cliente.delete("/families/by-name/Macetas")
+    cliente.delete("/sections/by-name/Jardineria")
+
+    monkeypatch.setattr(instantaneas, "directorio", str(tmp_path))
+    cliente.portal.call(instantaneas._generar_con_sesion)
+    assert instantaneas.errores == 0
+
+    # Los IDs nulos se guardan como 0
+    _, tablas = leer_instantanea(instantaneas.ruta(instantaneas.ultima()))
+    familias = tablas["familias"]
+    secciones = dict(zip(familias["id"].tolist(), familias["section_id"].tolist()))
+    assert secciones[familia["id"]] == 0
+    articulos = tablas["articulos"]
+    familias_articulos = dict(
+        zip(articulos["id"].tolist(), articulos["family_id"].tolist())
+    )
+    assert familias_articulos[articulo["id"]] == 0
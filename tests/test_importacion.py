@@ -0,0 +1,52 @@
+"""Importación masiva de artículos desde archivos CSV y JSONL."""
+
+from datos import crear_familia, crear_seccion
+
+CSV = (
+    "name,family_name,purchase_price,sale_price,und,tax\r\n"
+    '"Cafe Molido\r\nTueste Natural",Cafes,3,5,u,0.18\r\n'
+    "Cafe En Grano,Cafes,4,no es un precio,u,0.18\r\n"
+    "\r\n"
+    'Cafe Soluble,Cafes,2,"3.5",u,0.18\r\n'
+)
+
+
+def test_csv_con_saltos_de_linea_entre_comillas(cliente):
+    crear_seccion(cliente, "Desayunos")
+    crear_familia(cliente, "Cafes", "Desayunos")
+
+    respuesta = cliente.post(
+        "/articulos/import",
+        files={"archivo": ("cafes.csv", CSV.encode("utf-8-sig"), "text/csv")},
+        params={"chunk_size": 2},
+    )
+
+    assert respuesta.status_code == 200, respuesta.text
+    resultado = respuesta.json()
+    assert (resultado["total"], resultado["creados"]) == (3, 2)
+    assert [error["fila"] for error in resultado["errores"]] == [2]
+    assert "sale_price" in resultado["errores"][0]["error"]
+
+    nombres = {a["name"] for a in cliente.get("/articulos/nombre/cafe").json()}
+    assert nombres == {"Cafe Molido\r\nTueste Natural", "Cafe Soluble"}
+
+
+def test_formato_por_extension_y_filas_jsonl_invalidas(cliente):
+    crear_seccion(cliente, "Meriendas")
+    crear_familia(cliente, "Galletas", "Meriendas")
+    jsonl = (
+        '{"name": "Galleta Maria", "family_name": "Galletas", "purchase_price": 1,'
+        ' "sale_price": 2, "und": "u"}\n'
+        "{no es json}\n"
+    )
+
+    respuesta = cliente.post(
+        "/articulos/import",
+        files={"archivo": ("galletas.jsonl", jsonl, "application/octet-stream")},
+    )
+
+    assert respuesta.status_code == 200, respuesta.text
+    resultado = respuesta.json()
+    assert (resultado["total"], resultado["creados"]) == (2, 1)
+    assert resultado["errores"][0]["fila"] == 2
+    assert resultado["errores"][0]["error"].startswith("Formato inválido")
@@ -0,0 +1,73 @@
+"""Índice de códigos de barras mapeado en memoria."""
+
+import os
+import sqlite3
+
+from backend.config.db import SessionLocal
+from backend.services.indice_codigos import SIN_ARTICULO, IndiceCodigos
+from datos import crear_familia, crear_seccion, importar_articulos
+
+
+async def _vigente(indice) -> bool:
+    async with SessionLocal() as db:
+        return await indice.vigente(db)
+
+
+def _ejecutar(sentencia: str, *parametros):
+    """Cambio hecho por fuera de la API, p. ej. una carga por SQL."""
+    with sqlite3.connect(os.environ["DATABASE_URL"].split("///", 1)[1]) as conexion:
+        conexion.execute(sentencia, parametros)
+
+
+def test_se_reconstruye_si_no_coincide_con_la_base(cliente, tmp_path):
+    crear_seccion(cliente, "Indexadas")
+    familia = crear_familia(cliente, "Escaneables", "Indexadas")
+    importar_articulos(cliente, "Escaneables", 3, "Escaneable")
+    filas = cliente.get("/catalogo", params={"family_id": familia["id"]}).json()
+    articulo_id = filas["items"][0]["articulo_id"]
+
+    indice = IndiceCodigos(ruta=str(tmp_path / "codigos.idx"))
+    cliente.portal.call(indice.iniciar)
+    try:
+        assert cliente.portal.call(_vigente, indice)
+        generacion = indice.stats()["generacion"]
+
+        # Las altas por la API se anotan en el delta y el índice sigue vigente
+        _ejecutar(
+            "INSERT INTO codigos_barras (codigos_barras, articulo_id) VALUES (?, ?)",
+            "40000000000017",
+            articulo_id,
+        )
+        indice.agregar(["40000000000017"], articulo_id)
+        assert cliente.portal.call(_vigente, indice)
+
+        # Una carga por SQL y un código no indexable: se reconstruye al arrancar
+        for codigo in ("40000000000024", "SIN-EAN"):
+            _ejecutar(
+                "INSERT INTO codigos_barras (codigos_barras, articulo_id) "
+                "VALUES (?, ?)",
+                codigo,
+                articulo_id,
+            )
+        assert not cliente.portal.call(_vigente, indice)
+        cliente.portal.call(indice.iniciar)
+        assert indice.stats()["generacion"] == generacion + 1
+        assert indice.buscar(["40000000000024"]) == {"40000000000024": articulo_id}
+        # Los no indexables cuentan: no se reconstruye en cada arranque
+        assert cliente.portal.call(_vigente, indice)
+
+        # Un índice de antes de restaurar la base tiene códigos de más
+        _ejecutar(
+            "DELETE FROM codigos_barras WHERE codigos_barras = ?", "40000000000017"
+        )
+        assert not cliente.portal.call(_vigente, indice)
+        cliente.portal.call(indice.iniciar)
+        assert indice.buscar(["40000000000017"]) == {"40000000000017": SIN_ARTICULO}
+        assert cliente.portal.call(_vigente, indice)
+    finally:
+        cliente.portal.call(indice.cerrar)
+        _ejecutar(
+            "DELETE FROM codigos_barras WHERE codigos_barras IN (?, ?)",
+            "40000000000024",
+            "SIN-EAN",
+        )
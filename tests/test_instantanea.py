@@ -0,0 +1,66 @@
+"""Descarga de la instantánea del catálogo, completa o por columnas."""
+
+import zlib
+
+import numpy as np
+
+from backend.config.db import SessionLocal
+from backend.services.instantanea import instantaneas, leer_instantanea
+from datos import crear_familia, crear_seccion, importar_articulos
+
+
+async def _generar() -> dict:
+    async with SessionLocal() as db:
+        return await instantaneas.generar(db, forzar=True)
+
+
+def test_range_de_una_columna_y_validadores(cliente, tmp_path, monkeypatch):
+    crear_seccion(cliente, "Instantanea")
+    crear_familia(cliente, "Columnas", "Instantanea")
+    importar_articulos(cliente, "Columnas", 4, "Columna")
+
+    # Sin SNAPSHOT_DIR no hay instantáneas
+    assert cliente.get("/catalogo/snapshot").status_code == 503
+    monkeypatch.setattr(instantaneas, "directorio", str(tmp_path))
+    manifiesto = cliente.portal.call(_generar)
+    version = manifiesto["version"]
+
+    completa = cliente.get("/catalogo/snapshot")
+    assert completa.status_code == 200
+    assert completa.headers["x-catalog-version"] == str(version)
+    etag = completa.headers["etag"]
+    _, tablas = leer_instantanea(instantaneas.ruta(version))
+
+    # Un terminal pide solo los precios de venta con un Range
+    datos = cliente.get("/catalogo/snapshot/manifiesto").json()
+    columna = datos["tablas"]["articulos"]["columnas"]["sale_price"]
+    inicio = datos["inicio_bloques"] + columna["inicio"]
+    fin = inicio + columna["largo"] - 1
+    respuesta = cliente.get(
+        "/catalogo/snapshot",
+        headers={"Range": f"bytes={inicio}-{fin}", "If-Range": etag},
+    )
+    assert respuesta.status_code == 206
+    assert (
+        respuesta.headers["content-range"] == f"bytes {inicio}-{fin}/{datos['tamano']}"
+    )
+    assert respuesta.content == completa.content[inicio : fin + 1]
+    # Columna `f8` sin delta: float64 little-endian, como describe el formato
+    assert (columna["tipo"], columna["delta"]) == ("f8", False)
+    precios = np.frombuffer(zlib.decompress(respuesta.content), dtype="<f8")
+    np.testing.assert_array_equal(precios, tablas["articulos"]["sale_price"])
+
+    # Validadores: 304 con el mismo ETag, archivo completo si If-Range no
+    # coincide y 416 fuera del archivo
+    respuesta = cliente.get("/catalogo/snapshot", headers={"If-None-Match": etag})
+    assert respuesta.status_code == 304
+    respuesta = cliente.get(
+        "/catalogo/snapshot", headers={"Range": "bytes=0-9", "If-Range": '"snap-0"'}
+    )
+    assert respuesta.status_code == 200
+    assert respuesta.content == completa.content
+    respuesta = cliente.get(
+        "/catalogo/snapshot", headers={"Range": f"bytes={datos['tamano']}-"}
+    )
+    assert respuesta.status_code == 416
+    assert cliente.get("/catalogo/snapshot", params={"version": -1}).status_code == 404
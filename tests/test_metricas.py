@@ -0,0 +1,34 @@
+"""Métricas por ruta en formato Prometheus."""
+
+RUTA = 'route="/articulos/codigo/{codigo_barra}"'
+
+
+def _metricas(cliente) -> dict:
+    respuesta = cliente.get("/metrics")
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"].startswith("text/plain")
+    valores = {}
+    for linea in respuesta.text.splitlines():
+        if linea and not linea.startswith("#"):
+            nombre, valor = linea.rsplit(" ", 1)
+            valores[nombre] = float(valor)
+    return valores
+
+
+def test_peticiones_y_sentencias_por_plantilla_de_ruta(cliente, sentencias):
+    antes = _metricas(cliente)
+    with sentencias() as ejecutadas:
+        for codigo in ("0000000000017", "0000000000024"):
+            assert cliente.get(f"/articulos/codigo/{codigo}").status_code == 404
+    despues = _metricas(cliente)
+
+    def aumento(nombre):
+        return despues.get(nombre, 0) - antes.get(nombre, 0)
+
+    # Se agrupan por plantilla, no por el código consultado
+    assert aumento(f'http_requests_total{{method="GET",{RUTA},status="404"}}') == 2
+    assert not [nombre for nombre in despues if "0000000000017" in nombre]
+    assert aumento(f'http_request_duration_seconds_count{{method="GET",{RUTA}}}') == 2
+    assert aumento(f'db_statements_per_request_count{{method="GET",{RUTA}}}') == 2
+    assert aumento(f"db_statements_total{{{RUTA}}}") == len(ejecutadas) > 0
+    assert "db_pool_checked_out" in despues
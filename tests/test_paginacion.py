@@ -0,0 +1,20 @@
+"""Límites de paginación de los listados de artículos."""
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "ruta, params",
+    [
+        ("/articulos", {"limit": 0}),
+        ("/articulos", {"limit": 1001}),
+        ("/articulos", {"skip": -1}),
+        ("/articulos/nombre/pan", {"limit": 0}),
+        ("/articulos/nombre/pan", {"limit": 501}),
+        ("/articulos/nombre/pan", {"skip": -1}),
+    ],
+)
+def test_parametros_fuera_de_rango(cliente, ruta, params):
+    respuesta = cliente.get(ruta, params=params)
+    assert respuesta.status_code == 400, respuesta.text
+    assert respuesta.json()["detail"].endswith("fuera de rango")
@@ -0,0 +1,69 @@
+"""Ajuste masivo de precios por familia, sección o códigos cortos."""
+
+import pytest
+
+from datos import crear_familia, crear_seccion, importar_articulos
+
+
+def _ajustar(cliente, **ajuste):
+    return cliente.post("/articulos/precios", json=ajuste)
+
+
+def _precios(cliente, familia_id: int) -> dict:
+    filas = cliente.get("/catalogo", params={"family_id": familia_id}).json()
+    return {fila["codigo_barra"]: fila["sale_price"] for fila in filas["items"]}
+
+
+def test_dry_run_y_ajuste_con_margen_minimo(cliente):
+    crear_seccion(cliente, "Enlatados")
+    familia = crear_familia(cliente, "Atunes", "Enlatados")
+    importar_articulos(cliente, "Atunes", 3, "Atun")
+    codigos = list(_precios(cliente, familia["id"]))
+    assert len(codigos) == 3
+
+    respuesta = _ajustar(
+        cliente,
+        family_name="Atunes",
+        tipo="porcentaje",
+        valor=10,
+        redondeo=0.1,
+        dry_run=True,
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    impacto = respuesta.json()
+    assert impacto["articulos"] == 3 and not impacto["aplicado"]
+    assert impacto["sale_price"] == {"antes": 6, "despues": pytest.approx(6.6)}
+    assert set(_precios(cliente, familia["id"]).values()) == {2}
+
+    # Un código consultado antes del ajuste no se sirve con el precio viejo
+    assert cliente.get(f"/articulos/codigo/{codigos[0]}").json()["sale_price"] == 2
+    cambios = cliente.get("/changes").json()["version"]
+
+    # +10 % deja la venta en 2.2, por debajo del margen mínimo sobre la compra
+    respuesta = _ajustar(
+        cliente,
+        section_name="Enlatados",
+        tipo="porcentaje",
+        valor=10,
+        margen_minimo=1.5,
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    impacto = respuesta.json()
+    assert impacto["aplicado"] and impacto["ajustados_por_margen"] == 3
+    assert set(_precios(cliente, familia["id"]).values()) == {2.5}
+    assert cliente.get(f"/articulos/codigo/{codigos[0]}").json()["sale_price"] == 2.5
+    cambiados = cliente.get("/changes", params={"since": cambios}).json()
+    assert len(cambiados["articulos"]["upserts"]) == 3
+
+    respuesta = _ajustar(cliente, cod_shorts=[], tipo="monto", valor=-1)
+    assert respuesta.json()["articulos"] == 0
+    assert not respuesta.json()["aplicado"]
+
+
+def test_filtros_del_ajuste(cliente):
+    respuesta = _ajustar(
+        cliente, family_name="Atunes", section_name="Enlatados", tipo="monto", valor=1
+    )
+    assert respuesta.status_code == 422
+    respuesta = _ajustar(cliente, family_name="Inexistente", tipo="monto", valor=1)
+    assert respuesta.status_code == 404
@@ -0,0 +1,40 @@
+"""Listados serializados con orjson desde tuplas."""
+
+import orjson
+
+from backend.schemas.sch_articulo import Articulo
+from datos import crear_familia, crear_seccion, importar_articulos
+
+
+def _recorrer(cliente, limit: int) -> tuple:
+    """Artículos de todas las páginas siguiendo `next_cursor`, y cuántas hubo."""
+    articulos, params, paginas = [], {"limit": limit}, 0
+    while True:
+        respuesta = cliente.get("/articulos", params=params).json()
+        articulos += respuesta["articulos"]
+        paginas += 1
+        if respuesta["next_cursor"] is None:
+            return articulos, paginas
+        params["cursor"] = respuesta["next_cursor"]
+
+
+def test_paginas_por_cursor_iguales_a_la_exportacion(cliente):
+    crear_seccion(cliente, "Serializadas")
+    crear_familia(cliente, "Tuplas", "Serializadas")
+    importar_articulos(cliente, "Tuplas", 5, "Tupla")
+
+    respuesta = cliente.get("/articulos/export", params={"batch_size": 3})
+    exportados = [orjson.loads(linea) for linea in respuesta.text.splitlines()]
+    total = len(exportados)
+
+    # Una página llena trae cursor aunque sea la última; la siguiente, vacía, no
+    assert _recorrer(cliente, total) == (exportados, 2)
+    assert _recorrer(cliente, 2) == (exportados, total // 2 + 1)
+
+    # Cada fila tiene exactamente la forma del esquema de respuesta
+    for articulo in exportados:
+        assert Articulo.model_validate(articulo).model_dump() == articulo
+    tuplas = [a for a in exportados if a["name"].startswith("Tupla ")]
+    assert len(tuplas) == 5
+    assert {a["family_name"] for a in tuplas} == {"Tuplas"}
+    assert all(a["codigos_barras"] for a in tuplas)
@@ -0,0 +1,73 @@
+"""Ingesta de tickets de venta por el buffer de escritura."""
+
+import os
+import sqlite3
+
+from backend.services.ventas import buffer_ventas
+from datos import crear_familia, crear_seccion, importar_articulos
+
+
+def _consultar(sentencia: str, *parametros):
+    with sqlite3.connect(os.environ["DATABASE_URL"].split("///", 1)[1]) as conexion:
+        return conexion.execute(sentencia, parametros).fetchone()
+
+
+def _ticket(numero: str, articulo_id: int, lineas: int = 1) -> dict:
+    return {
+        "terminal": "caja-pruebas",
+        "numero": numero,
+        "fecha": "2026-10-18T10:00:00-03:00",
+        "lineas": [
+            {"articulo_id": articulo_id, "cantidad": 1.5, "precio": 2}
+            for _ in range(lineas)
+        ],
+    }
+
+
+def test_tickets_se_escriben_al_vaciar_sin_duplicarse(cliente):
+    crear_seccion(cliente, "Ventas")
+    familia = crear_familia(cliente, "Vendibles", "Ventas")
+    importar_articulos(cliente, "Vendibles", 1, "Vendible")
+    filas = cliente.get("/catalogo", params={"family_id": familia["id"]}).json()
+    articulo_id = filas["items"][0]["articulo_id"]
+    tickets = [_ticket("1", articulo_id, 2), _ticket("2", articulo_id)]
+
+    respuesta = cliente.post("/ventas/tickets", json={"tickets": tickets})
+    assert respuesta.status_code == 202, respuesta.text
+    assert respuesta.json()["tickets"] == 2 and respuesta.json()["lineas"] == 3
+    # El terminal reenvía un ticket cuya respuesta no le llegó
+    assert (
+        cliente.post("/ventas/tickets", json={"tickets": tickets[:1]}).status_code
+        == 202
+    )
+    assert cliente.portal.call(buffer_ventas.vaciar)
+    assert cliente.get("/ventas/buffer").json()["pendientes"] == 0
+
+    cantidad, total, fecha = _consultar(
+        "SELECT count(*), sum(total), max(fecha) FROM tickets WHERE terminal = ?",
+        "caja-pruebas",
+    )
+    assert (cantidad, total) == (2, 9)
+    assert fecha.startswith("2026-10-18 13:00:00")  # Guardada en UTC
+    (lineas,) = _consultar(
+        "SELECT count(*) FROM ticket_lineas JOIN tickets ON tickets.id = ticket_id "
+        "WHERE terminal = ?",
+        "caja-pruebas",
+    )
+    assert lineas == 3
+
+    # Los artículos con ventas no se eliminan
+    assert cliente.delete(f"/articulos/{articulo_id}").status_code == 409
+
+
+def test_buffer_lleno_y_articulos_inexistentes(cliente, monkeypatch):
+    respuesta = cliente.post("/ventas/tickets", json={"tickets": [_ticket("x", 10**9)]})
+    assert respuesta.status_code == 422
+
+    articulo_id = cliente.get("/articulos", params={"limit": 1}).json()["articulos"]
+    monkeypatch.setattr(buffer_ventas, "max_lineas", buffer_ventas.pendientes)
+    respuesta = cliente.post(
+        "/ventas/tickets", json={"tickets": [_ticket("3", articulo_id[0]["id"])]}
+    )
+    assert respuesta.status_code == 503
+    assert respuesta.headers["retry-after"] == "1"
@@ -0,0 +1,56 @@
+"""Listados cacheados por versión del catálogo, con ETag y réplicas."""
+
+import os
+import sqlite3
+
+from backend.config.replicas import _Replica, replicas
+
+
+def _familias(respuesta) -> set:
+    return {familia["name"] for familia in respuesta.json()["families"]}
+
+
+def test_etag_cambia_tras_una_escritura(cliente):
+    cliente.post("/sections", json={"cod": None, "nombre": "Etiquetas"})
+    respuesta = cliente.get("/families")
+    etag = respuesta.headers["etag"]
+    assert cliente.get("/families", headers={"If-None-Match": etag}).status_code == 304
+
+    cliente.post(
+        "/families",
+        json={"id": None, "cod": "", "name": "Precintos", "section_name": "Etiquetas"},
+    )
+    respuesta = cliente.get("/families", headers={"If-None-Match": etag})
+    assert respuesta.status_code == 200
+    assert respuesta.headers["etag"] != etag
+    assert "Precintos" in _familias(respuesta)
+
+
+def test_cuerpo_de_una_replica_atrasada_no_pasa_por_actual(cliente, tmp_path):
+    cliente.post("/sections", json={"cod": None, "nombre": "Replicadas"})
+    nueva = {"id": None, "cod": "", "section_name": "Replicadas"}
+    cliente.post("/families", json={**nueva, "name": "Copiada"})
+
+    # La réplica se queda con el estado anterior a la siguiente escritura
+    copia = tmp_path / "replica.db"
+    with sqlite3.connect(os.environ["DATABASE_URL"].split("///", 1)[1]) as origen:
+        with sqlite3.connect(copia) as destino:
+            origen.backup(destino)
+    cliente.post("/families", json={**nueva, "name": "Sin Replicar"})
+    # Otra lectura del primario deja guardada la versión nueva
+    assert cliente.get("/sections").status_code == 200
+
+    replica = _Replica(f"sqlite+aiosqlite:///{copia}")
+    replicas._replicas = [replica]
+    cliente.cookies.clear()
+    try:
+        respuesta = cliente.get("/families")
+    finally:
+        replicas._replicas = []
+        cliente.portal.call(replica.engine.dispose)
+    assert "Copiada" in _familias(respuesta)
+    assert "Sin Replicar" not in _familias(respuesta)
+
+    # El cuerpo de la réplica quedó con su versión, no con la del primario
+    respuesta = cliente.get("/families")
+    assert "Sin Replicar" in _familias(respuesta)